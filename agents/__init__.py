@@ -2,5 +2,6 @@ from .prosecutor import Prosecutor
 from .judge import Judge
 from .witness_agent import WitnessAgent
 from .jury_agent import JuryAgent
+from .defense import Defense
 
-__all__ = ['Prosecutor', 'Judge', 'WitnessAgent', 'JuryAgent'] 
\ No newline at end of file
+__all__ = ['Prosecutor', 'Judge', 'WitnessAgent', 'JuryAgent', 'Defense'] 
\ No newline at end of file
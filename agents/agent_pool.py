@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from settings import CREW_POOL_MAX_CONFIGS, CREW_POOL_MAX_IDLE
+
+@dataclass(frozen=True)
+class AgentConfig:
+    """
+    Immutable configuration of an agent.
+
+    Agents with equal configurations (e.g. "Juror 3" in every trial) share pooled
+    CrewAI objects, so the configuration must not hold any per-trial state.
+    """
+    name: str
+    role: str
+    goal: str
+    backstory: str
+    model: str
+    max_tokens: int
+    temperature: float
+    timeout: float | None = None  # Client-side request timeout, in seconds
+
+class CrewPool:
+    """
+    Pool of CrewAI (Agent, Crew) pairs keyed by AgentConfig.
+
+    A pair is leased for one call and returned afterwards, so concurrent calls
+    never share a crew and a long-running host does not rebuild these objects
+    for every trial. Idle pairs are kept for at most max_configs configurations,
+    least recently used first out.
+    """
+    def __init__(self, max_configs=CREW_POOL_MAX_CONFIGS, max_idle=CREW_POOL_MAX_IDLE):
+        self.max_configs = max_configs
+        self.max_idle = max_idle
+        self._idle = OrderedDict()  # AgentConfig -> list of (agent, crew)
+        self._lock = threading.Lock()
+        self.agents_created = 0
+        self.crews_created = 0
+        self.leases = 0
+        self.reuses = 0
+
+    @contextmanager
+    def lease(self, config: AgentConfig):
+        """Yields an (agent, crew) pair for the configuration, creating one if none is idle."""
+        pair = None
+        with self._lock:
+            self.leases += 1
+            idle = self._idle.get(config)
+            if idle:
+                pair = idle.pop()
+                self.reuses += 1
+        if pair is None:
+            pair = self._create(config)
+        try:
+            yield pair
+        finally:
+            pair[1].tasks = []
+            self._release(config, pair)
+
+    def _release(self, config, pair):
+        with self._lock:
+            idle = self._idle.setdefault(config, [])
+            self._idle.move_to_end(config)
+            if len(idle) < self.max_idle:
+                idle.append(pair)
+            while len(self._idle) > self.max_configs:
+                self._idle.popitem(last=False)
+
+    def _create(self, config):
+        from crewai import Agent, Crew, LLM  # Imported on first use; crewai is slow to import
+        # The model, output limit and temperature only take effect through the agent's LLM
+        llm = LLM(model=config.model, max_tokens=config.max_tokens, temperature=config.temperature,
+                  timeout=config.timeout)
+        agent = Agent(
+            name=config.name,
+            role=config.role,
+            goal=config.goal,
+            backstory=config.backstory,
+            verbose=True,
+            llm=llm
+        )
+        crew = Crew(
+            agents=[agent],
+            tasks=[],
+            verbose=True
+        )
+        with self._lock:
+            self.agents_created += 1
+            self.crews_created += 1
+        return agent, crew
+
+    def stats(self) -> dict:
+        """Allocation counters for the pool."""
+        with self._lock:
+            idle = sum(len(pairs) for pairs in self._idle.values())
+        return {
+            "agents_created": self.agents_created,
+            "crews_created": self.crews_created,
+            "leases": self.leases,
+            "reuses": self.reuses,
+            "idle": idle,
+        }
+
+# Shared by all agents in the process
+crew_pool = CrewPool()
@@ -1,74 +1,101 @@
-from crewai import Agent, Task, Crew
+import dataclasses
+import itertools
 from settings import DEFAULT_MODEL, MAX_TOKENS, TEMPERATURE
+from .agent_pool import AgentConfig, crew_pool
+from tracing import tracer
+from resilience import resilient_caller, call_deadline
+from generation import generate
+
+# Counts BaseAgent constructions so agent churn across trials can be measured
+_instance_counter = itertools.count(1)
+# Set by stub_model.install() to answer every call locally instead of through CrewAI (load tests)
+model_stub = None
 
 class BaseAgent:
+    instances_created = 0
+
     def __init__(self, name, role, goal, backstory=None):
         self.name = name
         self.role = role
         self.goal = goal
         self.backstory = backstory or ""
-        self._agent = None
-        self._crew = None
-
-    def create_agent(self):
-        """Create and return a CrewAI agent with the specified configuration."""
-        self._agent = Agent(
+        # Immutable part of the agent; per-trial state lives in subclass attributes cleared by reset()
+        self.config = AgentConfig(
             name=self.name,
             role=self.role,
             goal=self.goal,
             backstory=self.backstory,
-            verbose=True,
-            llm_model=DEFAULT_MODEL,
+            model=DEFAULT_MODEL,
             max_tokens=MAX_TOKENS,
             temperature=TEMPERATURE
         )
-        return self._agent
+        # Set by the QoS governor to switch to a cheaper model under load
+        self.model_override = None
+        BaseAgent.instances_created = next(_instance_counter)
 
-    def get_agent(self):
-        """Get the CrewAI agent instance, creating it if it doesn't exist."""
-        if not self._agent:
-            self._agent = self.create_agent()
-        return self._agent
+    def reset(self):
+        """Clear per-trial state so the agent can be reused in another trial."""
 
-    def get_crew(self):
-        """Get or create a Crew instance for task execution."""
-        if not self._crew:
-            self._crew = Crew(
-                agents=[self.get_agent()],
-                tasks=[],
-                verbose=True
-            )
-        return self._crew
-
-    def execute_prompt(self, description, prompt=None):
+    def execute_prompt(self, description, prompt=None, call_type="agent"):
         """Execute a prompt using the agent.
-        
+
         Args:
             description (str): Description of what the task does
             prompt (str, optional): The prompt to execute. If None, description is used as prompt.
-            
+            call_type (str): Kind of call (e.g. "ruling", "witness_answer"), used to group traces.
+
         Returns:
             str: The response from the agent
+
+        Raises:
+            resilience.DeadlineExceeded: If no attempt finished within the call's deadline.
         """
-        agent = self.get_agent()
-        crew = self.get_crew()
-        
-        # Create task with proper keyword arguments and minimal required fields
-        task = Task(
-            description=description,
-            expected_output="A response to the given prompt",
-            agent=agent,
-            input=prompt if prompt is not None else description
-        )
-        
-        # Update crew's tasks and execute
-        crew.tasks = [task]
-        result = crew.kickoff()
-        
-        # Get the result from the CrewOutput object
-        # The result should be in the result attribute
-        return str(result)
+        # Model, output budget and temperature come from the call type's generation profile,
+        # and an answer that fails validation is retried once with a larger profile
+        def run(profile):
+            # Deadline, retries and hedging per call type; each attempt is its own span
+            return resilient_caller.call(call_type, lambda: self._run_task(description, prompt, call_type, profile))
+        return generate(call_type, run, self.model_override)
+
+    def _run_task(self, description, prompt, call_type, profile):
+        """One attempt at the prompt on a pooled CrewAI crew, with the generation profile's settings."""
+        prompt_chars = len(description) + (len(prompt) if prompt is not None else 0)
+        if model_stub is not None:
+            with tracer.span(f"llm.{call_type}", agent=self.name, prompt_chars=prompt_chars, model="stub") as span:
+                response = model_stub.complete(call_type, description)
+                span.set(completion_chars=len(response))
+            return response
+
+        from crewai import Task  # Imported on first use; crewai is slow to import
+        with tracer.span(f"llm.{call_type}", agent=self.name, prompt_chars=prompt_chars, model=profile.model) as span:
+            # The CrewAI agent and crew come from a shared pool and are leased for this call only
+            # The request times out with the attempt, so a hung provider does not hold the worker thread
+            config = dataclasses.replace(self.config, model=profile.model, max_tokens=profile.max_tokens,
+                                         temperature=profile.temperature, timeout=call_deadline(call_type))
+            with crew_pool.lease(config) as (agent, crew):
+                # Create task with proper keyword arguments and minimal required fields
+                task = Task(
+                    description=description,
+                    expected_output="A response to the given prompt",
+                    agent=agent,
+                    input=prompt if prompt is not None else description
+                )
+
+                # Update crew's tasks and execute
+                crew.tasks = [task]
+                result = crew.kickoff()
+
+            # Get the result from the CrewOutput object
+            # The result should be in the result attribute
+            response = str(result)
+            usage = getattr(result, "token_usage", None)
+            span.set(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+                completion_chars=len(response)
+            )
+        return response
 
     def process_context(self, case_context, interaction_history):
         """Process the context and interaction history before making decisions."""
-        raise NotImplementedError("Subclasses must implement process_context") 
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement process_context")
\ No newline at end of file
@@ -22,7 +22,7 @@ class Defense(BaseAgent):
             max_length=MAX_RESPONSE_LENGTH
         )
         
-        return self.execute_prompt(prompt, "Process the case context and prepare defense strategy")
+        return self.execute_prompt(prompt, "Process the case context and prepare defense strategy", call_type="defense")
 
     def object_to_prosecution(self, prosecution_statement, context):
         """Generate a legal objection to a prosecution statement."""
@@ -39,7 +39,7 @@ class Defense(BaseAgent):
         
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt(objection_prompt, "Generate a legal objection to the prosecution statement")
+        return self.execute_prompt(objection_prompt, "Generate a legal objection to the prosecution statement", call_type="objection")
 
     def prepare_witness(self, testimony, context):
         """Prepare witness testimony and responses."""
@@ -56,4 +56,20 @@ class Defense(BaseAgent):
         
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt(witness_prompt, "Prepare witness testimony and responses") 
\ No newline at end of file
+        return self.execute_prompt(witness_prompt, "Prepare witness testimony and responses", call_type="witness_prep")
+
+    def question_witness(self, witness_name, testimony, context):
+        """Ask the witness on the stand one cross-examination question."""
+        question_prompt = f"""You are cross-examining {witness_name}, a prosecution witness. Ask ONE short question.
+
+        Witness testimony so far: {testimony}
+        Context: {context}
+
+        Your question should:
+        1. Test the witness's perception, memory or bias
+        2. Expose gaps or inconsistencies that create reasonable doubt
+        3. Be a single, clear question with no preamble
+
+        Maximum length: 300 characters."""
+
+        return self.execute_prompt(question_prompt, "Ask the witness a cross-examination question", call_type="defense_question") 
\ No newline at end of file
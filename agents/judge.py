@@ -1,6 +1,6 @@
 from .base_agent import BaseAgent
-from prompts import JUDGE_PROMPT, VERDICT_PROMPT
-from settings import MAX_RESPONSE_LENGTH
+from prompts import JUDGE_PROMPT, VERDICT_PROMPT, JUDGE_CONTEXT_QUERY, JUDGE_RULING_QUERY
+from settings import MAX_RESPONSE_LENGTH, QUERY_HISTORY_CHARS
 
 class Judge(BaseAgent):
     def __init__(self):
@@ -20,7 +20,8 @@ class Judge(BaseAgent):
         if query_engine:
             try:
                 # Example query: Check for procedural guidelines in documents
-                query_text = f"Are there specific procedural rules in the documents relevant to the current state of the trial? Context: {case_context}. History: {interaction_history[-200:]}"
+                query_text = JUDGE_CONTEXT_QUERY.format(case_context=case_context,
+                                                        history=interaction_history[-QUERY_HISTORY_CHARS:])
                 response = query_engine.query(query_text)
                 document_context = f"Relevant Procedural Info from Docs: {response.response}"
                 print(f"Judge queried documents for context: {query_text} -> Found relevant info.")
@@ -38,7 +39,7 @@ class Judge(BaseAgent):
         
         # Make sure JUDGE_PROMPT in prompts.py includes {document_context}
         
-        return self.execute_prompt("Process the case context and make appropriate rulings using document context", prompt)
+        return self.execute_prompt("Process the case context and make appropriate rulings using document context", prompt, call_type="judge_context")
 
     def rule_on_objection(self, objection, context, query_engine=None):
         """Make a ruling on an objection, querying documents if available."""
@@ -46,7 +47,7 @@ class Judge(BaseAgent):
         if query_engine:
             try:
                 # Example query: Find legal basis for ruling on the objection
-                query_text = f"Based on legal documents, what is the correct ruling (Sustained/Overruled) and reasoning for this objection: '{objection}'? Context: {context[-200:]}"
+                query_text = JUDGE_RULING_QUERY.format(objection=objection, context=context[-QUERY_HISTORY_CHARS:])
                 response = query_engine.query(query_text)
                 document_context = f"Relevant Legal Basis from Documents: {response.response}"
                 print(f"Judge queried documents for ruling: {query_text} -> Found relevant info.")
@@ -67,7 +68,7 @@ class Judge(BaseAgent):
         
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt("Make a ruling on the objection using document context", ruling_prompt)
+        return self.execute_prompt("Make a ruling on the objection using document context", ruling_prompt, call_type="ruling")
 
     def deliver_verdict(self, trial_transcript):
         """Deliver a verdict based on the trial transcript."""
@@ -77,7 +78,7 @@ class Judge(BaseAgent):
             max_length=MAX_RESPONSE_LENGTH
         )
         
-        return self.execute_prompt("Deliver a verdict based on the trial transcript", prompt)
+        return self.execute_prompt("Deliver a verdict based on the trial transcript", prompt, call_type="verdict")
 
     def provide_instructions(self, instruction_type):
         """Provide specific instructions to the court."""
@@ -91,4 +92,4 @@ class Judge(BaseAgent):
         
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt(f"Provide {instruction_type} instructions to the court", instruction_prompt) 
\ No newline at end of file
+        return self.execute_prompt(f"Provide {instruction_type} instructions to the court", instruction_prompt, call_type="instructions") 
\ No newline at end of file
@@ -1,14 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 from .base_agent import BaseAgent
-import random # For basic initial verdict
+from prompts import JUROR_PROMPT
+from settings import (JURY_SIZE, JURY_MAX_WORKERS, JURY_MAX_DELIBERATION_ROUNDS, MAX_RESPONSE_LENGTH,
+                      JURY_FACTS_PER_WITNESS, JURY_NOTES_MAX_CHARS)
+from text_utils import merge_key_facts
+from trial_events import TrialEventStore, witness_speaker, witness_name
+from tracing import propagate
+
+GUILTY = "Guilty"
+NOT_GUILTY = "Not Guilty"
+
+# Gives each juror a slightly different outlook so the panel does not vote as one voice
+JUROR_PERSPECTIVES = [
+    "You pay close attention to physical evidence.",
+    "You weigh the credibility of each witness carefully.",
+    "You take the standard of reasonable doubt very seriously.",
+    "You look for inconsistencies between testimony and evidence.",
+    "You focus on the timeline of events.",
+    "You rely on common sense and everyday experience.",
+]
+
+class Juror(BaseAgent):
+    """
+    A single member of the jury panel. Votes on the case from the jury's notes.
+    """
+    def __init__(self, number: int):
+        goal = ("Weigh the evidence and testimony impartially and cast an honest vote "
+                "according to the judge's instructions.")
+        backstory = ("You are an ordinary citizen serving on a jury. "
+                     + JUROR_PERSPECTIVES[(number - 1) % len(JUROR_PERSPECTIVES)])
+        super().__init__(name=f"Juror {number}", role="Juror", goal=goal, backstory=backstory)
+
+    def vote(self, notes: dict, discussion: str = "") -> tuple[str | None, str]:
+        """
+        Casts a vote on the case.
+
+        Returns:
+            A (vote, reason) tuple. The vote is None if no valid vote could be parsed.
+        """
+        prompt = JUROR_PROMPT.format(
+            juror_name=self.name,
+            discussion=discussion,
+            max_length=MAX_RESPONSE_LENGTH,
+            **notes
+        )
+        response = self.execute_prompt(prompt, "Cast a vote on the verdict", call_type="juror_vote")
+        return parse_vote(response)
+
+def parse_vote(response: str) -> tuple[str | None, str]:
+    """Extracts the vote and reason from a juror's response."""
+    vote = None
+    reason = response.strip()
+    for line in response.splitlines():
+        line_strip = line.strip()
+        line_lower = line_strip.lower()
+        if line_lower.startswith("vote:") and vote is None:
+            # Check "not guilty" first since it contains "guilty"
+            if "not guilty" in line_lower:
+                vote = NOT_GUILTY
+            elif "guilty" in line_lower:
+                vote = GUILTY
+        elif line_lower.startswith("reason:"):
+            reason = line_strip[len("reason:"):].strip()
+    return vote, reason
 
 class JuryAgent(BaseAgent):
     """
     Represents the jury in the courtroom simulation.
     Listens to proceedings and delivers a verdict.
     """
-    def __init__(self, name: str = "The Jury"):
+    def __init__(self, name: str = "The Jury", size: int = JURY_SIZE):
         """
         Initializes the JuryAgent.
+
+        Args:
+            name: The name of the jury.
+            size: Number of jurors on the panel.
         """
         goal = ("Listen attentively to all presented evidence, testimony, and arguments, "
                 "deliberate impartially based on the judge's instructions and the facts, "
@@ -17,11 +85,22 @@ class JuryAgent(BaseAgent):
                      "Your role is to be the impartial finder of fact, setting aside personal biases "
                      "and deciding the case solely on the evidence presented in court and the relevant law.")
         super().__init__(name=name, role="Jury", goal=goal, backstory=backstory)
+        self.jurors = [Juror(number) for number in range(1, size + 1)]
+        self.reset()
+
+    def reset(self, record=None):
+        """
+        Clears the notes and verdict so the same panel can sit on another trial.
+
+        Witness statements are read from record, a TrialEventStore shared with the
+        rest of the trial, instead of being copied into the jury's notes.
+        """
         self.case_info = None
         self.evidence_notes = {}
-        self.testimony_notes = {}
+        self.record = record if record is not None else TrialEventStore()
         self.judge_instructions = None
         self.verdict = None
+        self.votes = []
 
     def receive_case_info(self, context: str):
         """Stores the initial case context."""
@@ -34,31 +113,113 @@ class JuryAgent(BaseAgent):
         # print(f"{self.name} noted evidence: {evidence_id}") # Optional logging
 
     def receive_testimony_summary(self, witness_name: str, summary: str):
-        """Stores a summary of witness testimony."""
-        if witness_name not in self.testimony_notes:
-            self.testimony_notes[witness_name] = []
-        self.testimony_notes[witness_name].append(summary)
-        # print(f"{self.name} noted testimony from {witness_name}") # Optional logging
+        """Records a witness statement, for a jury not attached to a trial's events."""
+        self.record.append(witness_speaker(witness_name), summary)
+
+    @property
+    def testimony_notes(self) -> dict:
+        """
+        Key facts per witness, compressed from the witness statements on the record.
+
+        The notes for all witnesses share a fixed character budget, so the prompt
+        stays the same size however long the trial runs.
+        """
+        notes = {}
+        for event in self.record.events():
+            name = witness_name(event.speaker)
+            if name is None:
+                continue
+            summary = str(event.content)
+            # Drop the speaker prefix added by the witness agent
+            for prefix in (f"{name}'s testimony:", f"{name}:"):
+                if summary.startswith(prefix):
+                    summary = summary[len(prefix):].strip()
+                    break
+            notes.setdefault(name, [])
+            budget = JURY_NOTES_MAX_CHARS // len(notes)
+            for other, facts in notes.items():
+                text = summary if other == name else ""
+                notes[other] = merge_key_facts(facts, text, JURY_FACTS_PER_WITNESS, budget)
+        return notes
 
     def receive_instructions(self, instructions: str):
         """Stores the judge's final instructions."""
         self.judge_instructions = instructions
         # print(f"{self.name} received judge's instructions.") # Optional logging
 
+    def _format_notes(self) -> dict:
+        """Formats the jury's notes for the juror prompt."""
+        evidence = "\n".join(
+            f"- {evidence_id}: {description}" for evidence_id, description in self.evidence_notes.items()
+        )
+        testimony = "\n".join(
+            f"- {name}: " + " ".join(facts)
+            for name, facts in self.testimony_notes.items()
+        )
+        return {
+            "case_info": self.case_info or "Not provided.",
+            "evidence_notes": evidence or "No evidence was presented.",
+            "testimony_notes": testimony or "No witnesses testified.",
+            "instructions": self.judge_instructions or "No instructions were given.",
+        }
+
+    def _collect_votes(self, notes: dict, discussion: str) -> list:
+        """Polls every juror in parallel and returns (juror, vote, reason) tuples."""
+        def cast(juror):
+            try:
+                vote, reason = juror.vote(notes, discussion)
+            except Exception as e:
+                print(f"{juror.name} could not vote: {e}")
+                vote, reason = None, f"Vote failed: {e}"
+            return juror, vote, reason
+
+        with ThreadPoolExecutor(max_workers=JURY_MAX_WORKERS) as executor:
+            # Keep the jurors' calls nested under the deliberation trace
+            return list(executor.map(propagate(cast), self.jurors))
+
+    @staticmethod
+    def _format_discussion(votes: list) -> str:
+        """Summarizes the previous round so jurors can reconsider their votes."""
+        lines = ["The jury is divided. Votes and reasons from the previous round:"]
+        for juror, vote, reason in votes:
+            if vote:
+                lines.append(f"- {juror.name} voted {vote}: {reason}")
+        lines.append("Consider the other jurors' reasoning and vote again.")
+        return "\n".join(lines)
+
     def deliberate_and_decide(self, full_transcript: str) -> str:
         """
         Deliberates based on the information received and returns a verdict.
-        Basic placeholder implementation.
+
+        Every juror votes in parallel on the jury's notes. Further rounds run only while
+        the panel is split, and deliberation stops as soon as the vote is unanimous.
+        The full transcript is not sent to the jurors; they decide from their notes.
         """
         print(f"\n{self.name} is deliberating...")
-        # Basic placeholder: Random verdict for now
-        # Future: Could analyze transcript, evidence, testimony, instructions
-        possible_verdicts = ["Guilty", "Not Guilty"]
-        self.verdict = random.choice(possible_verdicts)
-        
+        notes = self._format_notes()
+        discussion = ""
+        tally = Counter()
+        rounds = 0
+
+        for rounds in range(1, JURY_MAX_DELIBERATION_ROUNDS + 1):
+            self.votes = self._collect_votes(notes, discussion)
+            tally = Counter(vote for _, vote, _ in self.votes if vote)
+            print(f"Round {rounds}: {tally.get(GUILTY, 0)} Guilty, {tally.get(NOT_GUILTY, 0)} Not Guilty")
+            if len(tally) == 1 and sum(tally.values()) == len(self.jurors):
+                break
+            discussion = self._format_discussion(self.votes)
+
+        guilty, not_guilty = tally.get(GUILTY, 0), tally.get(NOT_GUILTY, 0)
+        if guilty == len(self.jurors):
+            self.verdict = GUILTY
+        elif not_guilty == len(self.jurors):
+            self.verdict = NOT_GUILTY
+        else:
+            self.verdict = "Hung Jury"
+
         print(f"{self.name} has reached a verdict.")
-        return f"Verdict: {self.verdict}"
+        return f"Verdict: {self.verdict} ({guilty} Guilty, {not_guilty} Not Guilty after {rounds} round(s))"
 
     def get_verdict(self) -> str | None:
         """Returns the reached verdict, if any."""
-        return self.verdict 
\ No newline at end of file
+        return self.verdict
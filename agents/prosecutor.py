@@ -1,6 +1,8 @@
 from .base_agent import BaseAgent
-from prompts import PROSECUTOR_PROMPT
-from settings import MAX_RESPONSE_LENGTH
+from prompts import PROSECUTOR_PROMPT, PROSECUTOR_CONTEXT_QUERY, PROSECUTOR_OBJECTION_QUERY
+from settings import MAX_RESPONSE_LENGTH, QUERY_HISTORY_CHARS
+
+NO_OBJECTION = "NO OBJECTION"
 
 class Prosecutor(BaseAgent):
     def __init__(self):
@@ -19,7 +21,8 @@ class Prosecutor(BaseAgent):
         if query_engine:
             try:
                 # Example query: Ask about relevance of interaction history to the case
-                query_text = f"Based on the case context '{case_context}', what is the relevance of the following interaction history: {interaction_history[-200:]}?" # Limit history size
+                query_text = PROSECUTOR_CONTEXT_QUERY.format(case_context=case_context,
+                                                             history=interaction_history[-QUERY_HISTORY_CHARS:])
                 response = query_engine.query(query_text)
                 document_context = f"Relevant Document Info: {response.response}"
                 print(f"Prosecutor queried documents: {query_text} -> Found relevant info.")
@@ -37,15 +40,20 @@ class Prosecutor(BaseAgent):
         
         # Make sure the PROSECUTOR_PROMPT in prompts.py includes {document_context}
         
-        return self.execute_prompt(prompt, "Process the case context and prepare arguments using document context")
+        return self.execute_prompt(prompt, "Process the case context and prepare arguments using document context", call_type="prosecution")
 
     def object_to_defense(self, defense_statement, context, query_engine=None):
-        """Generate a legal objection to a defense statement, querying documents if available."""
+        """
+        Generate a legal objection to a defense statement, querying documents if available.
+
+        Returns None when the prosecutor finds no valid grounds to object.
+        """
         document_context = "No relevant documents queried for objection."
         if query_engine:
             try:
                 # Example query: Ask about legal basis for objecting to the statement
-                query_text = f"What are the legal grounds to object to the following defense statement, given the context? Statement: '{defense_statement}'. Context: {context[-200:]}"
+                query_text = PROSECUTOR_OBJECTION_QUERY.format(statement=defense_statement,
+                                                               context=context[-QUERY_HISTORY_CHARS:])
                 response = query_engine.query(query_text)
                 document_context = f"Relevant Legal Basis from Documents: {response.response}"
                 print(f"Prosecutor queried documents for objection: {query_text} -> Found relevant info.")
@@ -64,9 +72,14 @@ class Prosecutor(BaseAgent):
         2. Cite relevant rules if possible (from documents or general knowledge)
         3. Be concise and clear
         
+        If there are no valid grounds to object, reply with exactly: {NO_OBJECTION}
+        
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt(objection_prompt, "Generate a legal objection using document context")
+        objection = self.execute_prompt(objection_prompt, "Generate a legal objection using document context", call_type="objection")
+        if objection.strip().upper().startswith(NO_OBJECTION):
+            return None
+        return objection
 
     def cross_examine(self, testimony, context):
         """Prepare cross-examination questions based on testimony."""
@@ -83,4 +96,4 @@ class Prosecutor(BaseAgent):
         
         Maximum length: {MAX_RESPONSE_LENGTH} characters."""
         
-        return self.execute_prompt(cross_exam_prompt, "Prepare cross-examination questions") 
\ No newline at end of file
+        return self.execute_prompt(cross_exam_prompt, "Prepare cross-examination questions", call_type="cross_questions") 
\ No newline at end of file
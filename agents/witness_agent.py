@@ -1,4 +1,11 @@
+from collections import Counter
 from .base_agent import BaseAgent
+from answer_cache import witness_answer_cache
+from extractive_qa import ExtractiveAnswerer
+from tracing import tracer
+from settings import (ANSWER_CACHE_ENABLED, TESTIMONY_INDEX_MIN_CHARS, TESTIMONY_CHUNK_CHARS,
+                      TESTIMONY_TOP_K, EXTRACTIVE_ANSWERS_ENABLED, EXTRACTIVE_CONFIDENCE_THRESHOLD)
+from text_utils import chunk_text, PassageIndex
 
 class WitnessAgent(BaseAgent):
     """
@@ -20,6 +27,27 @@ class WitnessAgent(BaseAgent):
         super().__init__(name=name, role="Witness", goal=goal, backstory=backstory)
         self.testimony = testimony
 
+        # Clean up the testimony by removing the "Testimony:" prefix if present
+        self.clean_testimony = testimony
+        if self.clean_testimony.startswith('Testimony:"'):
+            self.clean_testimony = self.clean_testimony[10:-1]  # Remove "Testimony:" and quotes
+
+        # Long statements are chunked and indexed once, so each question only sends relevant passages
+        self.testimony_index = None
+        if len(self.clean_testimony) > TESTIMONY_INDEX_MIN_CHARS:
+            self.testimony_index = PassageIndex(chunk_text(self.clean_testimony, TESTIMONY_CHUNK_CHARS))
+
+        self.extractive_answerer = ExtractiveAnswerer(self.clean_testimony) if EXTRACTIVE_ANSWERS_ENABLED else None
+        self.reset()
+
+    def reset(self):
+        """
+        Clears per-trial counters. The testimony and its indexes are kept, so a
+        witness with the same name and testimony can be reused in another trial.
+        """
+        # How each answer was produced: "cache", "extractive" or "llm"
+        self.answer_sources = Counter()
+
     def provide_testimony(self) -> str:
         """
         Provides the witness's prepared testimony.
@@ -28,22 +56,74 @@ class WitnessAgent(BaseAgent):
         # like responding to specific questions based on the testimony.
         return f"{self.name}'s testimony: {self.testimony}"
 
-    def answer_question(self, question: str) -> str:
+    def relevant_testimony(self, question: str) -> str:
+        """
+        Returns the parts of the testimony relevant to a question.
+
+        Short testimony is returned whole. For long testimony, the best matching
+        passages are returned in the order they appear in the statement.
+        """
+        if not self.testimony_index:
+            return self.clean_testimony
+        matches = self.testimony_index.search(question, TESTIMONY_TOP_K)
+        passage_ids = sorted(i for i, score in matches if score > 0)
+        if not passage_ids:
+            # Nothing matched; the opening of a statement usually sets the scene
+            passage_ids = range(min(TESTIMONY_TOP_K, len(self.testimony_index.passages)))
+        return "\n\n".join(
+            f"[Passage {i + 1}] {self.testimony_index.passages[i]}" for i in passage_ids
+        )
+
+    def answer_question(self, question: str, cross_examination: bool | None = None) -> str:
+        """Answers a question, recording how the answer was produced as a trace span."""
+        with tracer.span("witness.answer", witness=self.name):
+            return self._answer_question(question, cross_examination)
+
+    def _record_source(self, source: str):
+        """Counts how an answer was produced and notes it on the current trace span."""
+        self.answer_sources[source] += 1
+        span = tracer.current_span()
+        if span:
+            span.set(source=source, cache_hit=source == "cache")
+
+    def _answer_question(self, question: str, cross_examination: bool | None = None) -> str:
         """
         Answers a question during examination or cross-examination using the LLM.
+
+        Answers are cached per testimony and examination mode, so a repeated or
+        near-duplicate question does not go to the LLM again. Simple factual
+        questions are answered locally with the matching testimony sentence when
+        the extractive answer is confident enough.
+
+        Args:
+            question: The question put to the witness.
+            cross_examination: Whether this is cross-examination. If None, it is
+                inferred from the wording of the question.
         """
-        # Clean up the testimony by removing the "Testimony:" prefix if present
-        clean_testimony = self.testimony
-        if clean_testimony.startswith('Testimony:"'):
-            clean_testimony = clean_testimony[10:-1]  # Remove "Testimony:" and quotes
+        clean_testimony = self.clean_testimony
 
         # Determine if this is cross-examination
-        is_cross = "cross" in question.lower()
+        is_cross = "cross" in question.lower() if cross_examination is None else cross_examination
+        mode = "cross" if is_cross else "direct"
+
+        if ANSWER_CACHE_ENABLED:
+            cached = witness_answer_cache.get(clean_testimony, question, mode)
+            if cached is not None:
+                self._record_source("cache")
+                return f"{self.name}: {cached}"
+
+        if self.extractive_answerer:
+            sentence, confidence = self.extractive_answerer.answer(question)
+            if sentence and confidence >= EXTRACTIVE_CONFIDENCE_THRESHOLD:
+                self._record_source("extractive")
+                return f"{self.name}: {sentence}"
 
         # Create a prompt for the LLM
-        prompt = f"""You are a witness in a courtroom. You have provided the following testimony:
+        testimony_label = ("The following passages from your testimony are relevant to the question"
+                           if self.testimony_index else "You have provided the following testimony")
+        prompt = f"""You are a witness in a courtroom. {testimony_label}:
 
-{clean_testimony}
+{self.relevant_testimony(question)}
 
 You are being {'cross-examined' if is_cross else 'examined'} with the following question:
 {question}
@@ -61,7 +141,10 @@ Rules for your response:
 Provide your answer:"""
 
         # Use the LLM to generate the response
-        response = self.execute_prompt(prompt, "Answer the question based on testimony")
+        response = self.execute_prompt(prompt, "Answer the question based on testimony", call_type="witness_answer")
+        self._record_source("llm")
+        if ANSWER_CACHE_ENABLED:
+            witness_answer_cache.put(clean_testimony, question, mode, response)
         
         # Format the response with the witness's name
         return f"{self.name}: {response}" 
\ No newline at end of file
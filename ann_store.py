@@ -0,0 +1,87 @@
+# Approximate nearest-neighbour vector store: FAISS HNSW graph over int8-quantized vectors
+import json
+import os
+from settings import ANN_QUANTIZATION, ANN_HNSW_M, ANN_EF_CONSTRUCTION, ANN_EF_SEARCH, ANN_INDEX_DIR
+from document_shards import shard_fingerprint
+
+FINGERPRINT_FILE = "fingerprint.json"
+_warned = False
+
+def ann_available() -> bool:
+    """Whether faiss and the LlamaIndex FAISS vector store are installed (warns once if not)."""
+    global _warned
+    try:
+        import faiss  # noqa: F401
+        from llama_index.vector_stores.faiss import FaissVectorStore  # noqa: F401
+        return True
+    except ImportError:
+        if not _warned:
+            _warned = True
+            print("Warning: VECTOR_STORE is 'hnsw' but faiss-cpu or llama-index-vector-stores-faiss is not "
+                  "installed. Using the default in-memory vector store.")
+        return False
+
+def create_hnsw_index(dimension, training_vectors, quantization=ANN_QUANTIZATION, m=ANN_HNSW_M,
+                      ef_construction=ANN_EF_CONSTRUCTION, ef_search=ANN_EF_SEARCH):
+    """
+    An empty FAISS HNSW index scored by inner product (cosine similarity for the
+    normalized embeddings we use). With "sq8" quantization each dimension is
+    stored as one byte, scaled to the range seen in training_vectors.
+    """
+    import faiss
+    import numpy as np
+    if quantization == "sq8":
+        index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, m, faiss.METRIC_INNER_PRODUCT)
+        index.train(np.asarray(training_vectors, dtype=np.float32))
+    else:
+        index = faiss.IndexHNSWFlat(dimension, m, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = ef_construction
+    index.hnsw.efSearch = ef_search
+    return index
+
+def create_vector_store(training_vectors):
+    """A LlamaIndex vector store over a new HNSW index, trained on the first batch of embeddings."""
+    import numpy as np
+    from llama_index.vector_stores.faiss import FaissVectorStore
+    vectors = np.asarray(training_vectors, dtype=np.float32)
+    return FaissVectorStore(faiss_index=create_hnsw_index(vectors.shape[1], vectors))
+
+def shard_index_dir(shard_name):
+    return os.path.join(ANN_INDEX_DIR, shard_name.replace("/", "__"))
+
+def index_fingerprint(shard, embed_model_name) -> str:
+    """Changes whenever the shard's files, tags, embedding model or graph settings change."""
+    return shard_fingerprint(shard, embed_model_name, ANN_QUANTIZATION, ANN_HNSW_M, ANN_EF_CONSTRUCTION)
+
+def save_index(index, directory, fingerprint):
+    """Persists the index (HNSW file, docstore, index store) with the fingerprint it was built for."""
+    index.storage_context.persist(persist_dir=directory)
+    with open(os.path.join(directory, FINGERPRINT_FILE), "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+
+def load_index(directory, fingerprint):
+    """
+    Loads a persisted index if it was built for this fingerprint, else None.
+
+    The HNSW file is memory-mapped read-only, so the quantized vectors are paged
+    in on demand and shared between processes instead of copied into each.
+    """
+    try:
+        with open(os.path.join(directory, FINGERPRINT_FILE)) as f:
+            if json.load(f).get("fingerprint") != fingerprint:
+                return None
+    except (OSError, json.JSONDecodeError):
+        return None
+    import faiss
+    from llama_index.core import StorageContext, load_index_from_storage
+    from llama_index.vector_stores.faiss import FaissVectorStore
+    path = os.path.join(directory, "default__vector_store.json")
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        faiss_index = faiss.read_index(path, flags)
+    except RuntimeError:
+        faiss_index = faiss.read_index(path)
+    faiss_index.hnsw.efSearch = ANN_EF_SEARCH
+    storage_context = StorageContext.from_defaults(vector_store=FaissVectorStore(faiss_index=faiss_index),
+                                                   persist_dir=directory)
+    return load_index_from_storage(storage_context)
@@ -0,0 +1,146 @@
+# Cache of witness answers, shared by every witness and reused across trials
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from settings import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_PATH
+from text_utils import tokenize, content_tokens, jaccard
+
+# Words that flip the meaning of a question; near-duplicates must agree on them.
+# Pronouns are stopwords, so the content-word check below does not see them
+_NEGATIONS = frozenset(["no", "not", "never", "nobody", "nothing", "none", "didn't", "don't",
+                        "doesn't", "wasn't", "weren't", "isn't", "aren't", "couldn't", "won't"])
+_PRONOUNS = frozenset(["he", "she", "him", "her", "his", "hers", "they", "them", "their", "we", "us", "our",
+                       "i", "me", "my", "you", "your"])
+
+def testimony_hash(testimony: str) -> str:
+    """Stable hash of a witness's testimony."""
+    return hashlib.sha256(testimony.encode("utf-8")).hexdigest()[:16]
+
+def normalize_question(question: str) -> str:
+    """Lowercases the question and strips punctuation and extra whitespace."""
+    return " ".join(tokenize(question))
+
+def _signature(tokens) -> tuple:
+    """Negations, pronouns and numbers in a question; near-duplicates must share them."""
+    return tuple(sorted(t for t in set(tokens) if t in _NEGATIONS or t in _PRONOUNS or t.isdigit()))
+
+class AnswerCache:
+    """
+    Bounded LRU cache of witness answers.
+
+    Entries are keyed on the testimony hash, the examination mode ("direct" or
+    "cross") and the normalized question. A lookup that misses exactly can reuse
+    the answer to a stored question of the same witness and mode that has the
+    same content words (stemmed, without stopwords), negations, pronouns and
+    numbers, and whose token similarity is at or above the threshold. Questions
+    that differ in a name, place or verb never share an answer.
+    """
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, similarity_threshold=ANSWER_CACHE_SIMILARITY,
+                 path=ANSWER_CACHE_PATH):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.path = path
+        self._entries = OrderedDict()  # (testimony hash, mode, question) -> answer
+        self._buckets = {}  # (testimony hash, mode) -> {normalized question: its content words}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def get(self, testimony: str, question: str, mode: str) -> str | None:
+        """Returns a cached answer for the question, or None on a miss."""
+        bucket = (testimony_hash(testimony), mode)
+        normalized = normalize_question(question)
+        with self._lock:
+            key = bucket + (normalized,)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            best_key, best_score = None, 0.0
+            if self.similarity_threshold < 1.0:
+                tokens = normalized.split()
+                signature = _signature(tokens)
+                words = frozenset(content_tokens(normalized))
+                for stored, stored_words in self._buckets.get(bucket, {}).items():
+                    stored_tokens = stored.split()
+                    if stored_words != words or _signature(stored_tokens) != signature:
+                        continue
+                    score = jaccard(tokens, stored_tokens)
+                    if score > best_score:
+                        best_key, best_score = bucket + (stored,), score
+            if best_key and best_score >= self.similarity_threshold:
+                self._entries.move_to_end(best_key)
+                self.near_hits += 1
+                return self._entries[best_key]
+
+            self.misses += 1
+            return None
+
+    def put(self, testimony: str, question: str, mode: str, answer: str):
+        """Stores an answer, evicting the least recently used entry when full."""
+        bucket = (testimony_hash(testimony), mode)
+        with self._lock:
+            self._store(bucket, normalize_question(question), answer)
+
+    def _store(self, bucket, normalized, answer):
+        key = bucket + (normalized,)
+        self._entries[key] = answer
+        self._entries.move_to_end(key)
+        self._buckets.setdefault(bucket, {})[normalized] = frozenset(content_tokens(normalized))
+        while len(self._entries) > self.max_entries:
+            (old_hash, old_mode, old_question), _ = self._entries.popitem(last=False)
+            questions = self._buckets[(old_hash, old_mode)]
+            questions.pop(old_question, None)
+            if not questions:
+                del self._buckets[(old_hash, old_mode)]
+
+    def stats(self) -> dict:
+        """Hit/miss counters for the cache."""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def load(self):
+        """Loads persisted entries from the cache file, if it exists."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                records = json.load(f)
+            with self._lock:
+                for record in records:
+                    self._store((record["testimony_hash"], record["mode"]), record["question"], record["answer"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not load answer cache from {self.path}: {e}")
+
+    def save(self):
+        """Persists the cache to its file. Does nothing for a memory-only cache."""
+        if not self.path:
+            return
+        with self._lock:
+            records = [
+                {"testimony_hash": h, "mode": mode, "question": question, "answer": answer}
+                for (h, mode, question), answer in self._entries.items()
+            ]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(records, f)
+        except OSError as e:
+            print(f"Warning: Could not save answer cache to {self.path}: {e}")
+
+# Shared by all witnesses; entries are partitioned by testimony hash
+witness_answer_cache = AnswerCache()
+atexit.register(witness_answer_cache.save)
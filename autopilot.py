@@ -0,0 +1,283 @@
+"""
+Autopilot: full trials with the Defense agent in place of the human, many at once.
+
+Each trial runs the same turns as the REPL (main.py): opening instructions, then
+for every round the prosecution's turn, a defense statement written by the
+Defense agent, a witness called and cross-examined by the Defense agent, and a
+piece of evidence presented, then the closing instructions and the verdict.
+Trials run concurrently to generate sustained load; each finished trial is
+appended to a JSONL dataset with its transcript, verdict, per-turn latencies
+and QoS decisions, and a latency summary is printed at the end.
+
+Cases come from a JSONL file ({"case_context": ..., "witnesses": {name: testimony},
+"evidence": {id: description}, "scope": {...}}, all but case_context optional)
+or from the built-in samples, and are used round-robin.
+
+Usage:
+    python autopilot.py [--trials 20 | --duration 600] [--concurrency 4] [--rounds 5]
+                        [--cases cases.jsonl] [--think-time 0] [--output autopilot_runs/run.jsonl]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from settings import (MAX_ROUNDS, AUTOPILOT_CONCURRENCY, AUTOPILOT_QUESTIONS_PER_WITNESS, AUTOPILOT_THINK_TIME_S,
+                      AUTOPILOT_OUTPUT_DIR)
+from tracing import percentile
+
+SAMPLE_CASES = [
+    {
+        "case_context": "The State v. Daniel Reyes. The defendant is charged with burglary of Hale's Hardware on the "
+                        "night of March 3. He says he was at his sister's birthday dinner until midnight.",
+        "witnesses": {
+            "Tom Hale": "I own the store. The alarm company called me at 11:40 pm. When I arrived the back window "
+                        "was broken and six cordless drills were missing.",
+            "Officer Lin": "I found a man matching the description two blocks away at 11:55 pm. He was out of breath "
+                           "and had a cut on his hand. I did not find any drills on him.",
+        },
+        "evidence": {
+            "Exhibit A": "Security camera still showing a person in a dark hoodie at the back window at 11:32 pm. "
+                         "The face is not visible.",
+            "Exhibit B": "Receipt from Rosa's Trattoria dated March 3, 10:05 pm, paid with the defendant's card.",
+        },
+    },
+    {
+        "case_context": "The State v. Maria Okafor. The defendant is charged with assault after a fight outside "
+                        "the Blue Door bar on June 12. She claims she acted in self-defense.",
+        "witnesses": {
+            "James Porter": "I was smoking outside. The other woman shoved Ms. Okafor first, then Ms. Okafor hit her "
+                            "once. It was dark and I had had a few drinks.",
+            "Dana Wells": "I am the bartender. Earlier that night the defendant said she would 'settle things' "
+                          "with the victim.",
+        },
+        "evidence": {
+            "Exhibit A": "Medical report: the victim had a broken nose and bruising on both arms.",
+        },
+    },
+    {
+        "case_context": "The State v. Alan Brooks. The defendant is charged with theft of $12,000 from his employer, "
+                        "Northside Logistics, between January and April. He says the transfers were approved "
+                        "reimbursements.",
+        "witnesses": {
+            "Karen Yu": "I audit the accounts. Fourteen transfers went to an account in the defendant's name, each "
+                        "just under the $1,000 limit that needs a second approval.",
+        },
+        "evidence": {
+            "Exhibit A": "Bank statements showing fourteen transfers of $850 to $990.",
+            "Exhibit B": "Email from the defendant's manager approving 'travel costs' in February.",
+        },
+    },
+]
+
+def load_cases(path):
+    """Cases from a JSONL file, or the built-in samples."""
+    if not path:
+        return SAMPLE_CASES
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class AutopilotTrial:
+    """One trial run end to end by the agents, recording the latency and outcome of every turn."""
+    def __init__(self, number, case, rounds=MAX_ROUNDS, questions_per_witness=AUTOPILOT_QUESTIONS_PER_WITNESS,
+                 think_time=AUTOPILOT_THINK_TIME_S, seed=None):
+        from agents import Defense
+        from dialogue_manager import DialogueManager
+        self.number = number
+        self.case = case
+        self.rounds = rounds
+        self.questions_per_witness = questions_per_witness
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.manager = DialogueManager()
+        self.defense = Defense()
+        self.turns = []
+
+    def _turn(self, name, fn, *args):
+        """Runs one turn. A failed turn is recorded and the trial goes on; returns None for it."""
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+            error = None
+        except Exception as e:
+            result = None
+            error = f"{type(e).__name__}: {e}"
+        self.turns.append({"turn": name, "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                           "ok": error is None, "error": error})
+        return result
+
+    def _think(self):
+        """Pauses like a human deciding what to say (uniform between 0 and twice the average)."""
+        if self.think_time > 0:
+            time.sleep(self.random.uniform(0, 2 * self.think_time))
+
+    def run(self) -> dict:
+        manager = self.manager
+        case_context = self.case["case_context"]
+        witnesses = dict(self.case.get("witnesses") or {})
+        evidence = dict(self.case.get("evidence") or {})
+        started = datetime.now().isoformat()
+        start = time.perf_counter()
+        manager.precompute_trial_setup()
+        self._turn("start_trial", manager.start_trial, case_context, witnesses, evidence, self.case.get("scope"))
+        pending_witnesses = list(witnesses)
+        pending_evidence = list(evidence)
+        for _ in range(self.rounds):
+            if not manager.trial_active:
+                break
+            self._turn("prosecution", manager.process_prosecution)
+            self._think()
+            statement = self._turn("defense_statement", self.defense.process_context, case_context,
+                                   manager._format_interaction_history())
+            if statement:
+                self._turn("process_defense", manager.process_defense, statement)
+            if pending_witnesses:
+                name = pending_witnesses.pop(0)
+                testimony = self._turn("call_witness", manager.call_witness, name) or witnesses[name]
+                for _ in range(self.questions_per_witness):
+                    self._think()
+                    question = self._turn("defense_question", self.defense.question_witness, name, testimony,
+                                          manager._format_interaction_history())
+                    if question:
+                        answer = self._turn("cross_examine_witness", manager.cross_examine_witness, "Defense",
+                                            question)
+                        testimony = f"{testimony}\nQ: {question}\nA: {answer}"
+            if pending_evidence:
+                self._turn("present_evidence", manager.present_evidence, "Prosecution", pending_evidence.pop(0))
+        result = self._turn("end_trial", manager.end_trial) or {}
+        status = manager.get_trial_status()
+        return {
+            "trial": self.number,
+            "trace_id": manager.trace_id,
+            "started": started,
+            "duration_s": round(time.perf_counter() - start, 2),
+            "case_context": case_context,
+            "scope": manager.scope,
+            "rounds": manager.current_round,
+            "turns": self.turns,
+            "failed_turns": sum(1 for turn in self.turns if not turn["ok"]),
+            "verdict": result.get("verdict"),
+            "evaluation": result.get("user_performance"),
+            "answer_sources": result.get("answer_sources"),
+            "qos": status["qos"],
+            "transcript": list(manager.transcript),
+        }
+
+def run_trial(number, case, rounds, questions_per_witness, think_time, seed):
+    try:
+        return AutopilotTrial(number, case, rounds, questions_per_witness, think_time, seed).run()
+    except Exception as e:
+        # A trial that could not even be set up still counts against capacity
+        return {"trial": number, "case_context": case["case_context"], "turns": [], "failed_turns": 0,
+                "error": f"{type(e).__name__}: {e}"}
+
+def summarize(records, elapsed_s) -> dict:
+    """Throughput, failures and latency percentiles per turn type."""
+    latencies = {}
+    for record in records:
+        for turn in record["turns"]:
+            latencies.setdefault(turn["turn"], []).append(turn)
+    return {
+        "trials": len(records),
+        "failed_trials": sum(1 for record in records if record.get("error")),
+        "failed_turns": sum(record["failed_turns"] for record in records),
+        "elapsed_s": round(elapsed_s, 1),
+        "trials_per_minute": round(len(records) / elapsed_s * 60, 2) if elapsed_s else None,
+        "turns": {
+            name: {
+                "count": len(turns),
+                "errors": sum(1 for turn in turns if not turn["ok"]),
+                "p50_ms": percentile([turn["latency_ms"] for turn in turns], 50),
+                "p95_ms": percentile([turn["latency_ms"] for turn in turns], 95),
+                "p99_ms": percentile([turn["latency_ms"] for turn in turns], 99),
+                "mean_ms": round(statistics.mean(turn["latency_ms"] for turn in turns), 1),
+            }
+            for name, turns in latencies.items()
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run trials with the Defense agent in place of the human.")
+    parser.add_argument("--trials", type=int, default=None, help="Number of trials to run (default: one per case)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Keep starting trials for this many seconds instead (sustained load)")
+    parser.add_argument("--concurrency", type=int, default=AUTOPILOT_CONCURRENCY, help="Trials running at once")
+    parser.add_argument("--rounds", type=int, default=MAX_ROUNDS, help="Rounds per trial")
+    parser.add_argument("--questions", type=int, default=AUTOPILOT_QUESTIONS_PER_WITNESS,
+                        help="Cross-examination questions per witness")
+    parser.add_argument("--think-time", type=float, default=AUTOPILOT_THINK_TIME_S,
+                        help="Average pause in seconds before each defense turn")
+    parser.add_argument("--cases", default=None, help="JSONL file of cases (default: built-in samples)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help=f"JSONL dataset to append trials to (default: {AUTOPILOT_OUTPUT_DIR}/<timestamp>.jsonl)")
+    args = parser.parse_args()
+
+    cases = load_cases(args.cases)
+    if not cases:
+        raise SystemExit("No cases to run.")
+    total = args.trials if args.trials is not None else (None if args.duration else len(cases))
+    output = args.output or os.path.join(AUTOPILOT_OUTPUT_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    from dialogue_manager import warm_up, load_document_indexes
+    from resilience import resilient_caller
+    from objection_filter import objection_filter
+    from judge_interjection import interjection_stats
+    print("Warming up...")
+    warm_up()
+    load_document_indexes()
+    limit = f"{total} trials" if total is not None else f"{args.duration:.0f}s"
+    print(f"Running {limit} with {args.concurrency} at a time; writing {output}\n")
+
+    records = []
+    started = 0
+    start = time.perf_counter()
+
+    def more():
+        if total is not None and started >= total:
+            return False
+        return args.duration is None or time.perf_counter() - start < args.duration
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="autopilot") as pool, \
+            open(output, "a") as dataset:
+        running = set()
+        while True:
+            while len(running) < args.concurrency and more():
+                started += 1
+                running.add(pool.submit(run_trial, started, cases[(started - 1) % len(cases)], args.rounds,
+                                        args.questions, args.think_time, args.seed + started))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                records.append(record)
+                dataset.write(json.dumps(record, default=str) + "\n")
+                dataset.flush()
+                outcome = record.get("error") or f"{record['duration_s']}s, {len(record['turns'])} turns, " \
+                                                  f"{record['failed_turns']} failed"
+                print(f"Trial {record['trial']} finished: {outcome}")
+
+    summary = summarize(records, time.perf_counter() - start)
+    print(f"\n{summary['trials']} trials in {summary['elapsed_s']}s ({summary['trials_per_minute']} per minute), "
+          f"{summary['failed_trials']} failed trials, {summary['failed_turns']} failed turns")
+    print(f"{'Turn':<22} {'Count':>6} {'Errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, turn in summary["turns"].items():
+        print(f"{name:<22} {turn['count']:>6} {turn['errors']:>6} {turn['p50_ms']:>9.0f} {turn['p95_ms']:>9.0f} "
+              f"{turn['p99_ms']:>9.0f}")
+    calls = resilient_caller.stats()
+    print(f"Model calls: {calls['calls']}, retries {calls['retries']}, timeouts {calls['timeouts']}, "
+          f"failures {calls['failures']}")
+    interjections = interjection_stats.stats()
+    print(f"Judge interjections ({interjections['mode']}): {interjections['judge_calls']}/{interjections['rounds']} "
+          f"rounds, average history sent to the prosecutor {interjections['avg_history_chars']} chars")
+    with open(os.path.splitext(output)[0] + ".summary.json", "w") as f:
+        json.dump({**summary, "model_calls": calls, "concurrency": args.concurrency, "rounds": args.rounds,
+                   "objection_filter": objection_filter.stats(), "judge_interjections": interjections}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
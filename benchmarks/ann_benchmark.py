@@ -0,0 +1,132 @@
+"""
+ANN benchmark: recall and latency of the HNSW vector store against exact search.
+
+Embeds the chunks of LEGAL_DOCS_DIR with the configured embedding backend (or
+generates clustered random vectors with --synthetic), then compares HNSW indexes
+(float32 and int8-quantized, at several efSearch values) with the exact
+brute-force scan the default vector store does. Queries are corpus vectors with
+a little noise added. The result is appended to a JSONL history.
+
+Usage:
+    python benchmarks/ann_benchmark.py [--synthetic 1000000] [--dim 384] [--queries 200] [--k 10]
+                                       [--ef 16,32,64,128] [--history benchmarks/results/ann.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from settings import LEGAL_DOCS_DIR, DOCS_MANIFEST_FILE, ANN_HNSW_M, ANN_EF_CONSTRUCTION  # noqa: E402
+
+def corpus_vectors() -> np.ndarray:
+    """Embeddings of every chunk in LEGAL_DOCS_DIR, from the embedding cache where possible."""
+    import dialogue_manager
+    from ingestion import iter_document_files, iter_documents, iter_nodes, embed_missing
+    llama_index = dialogue_manager.get_llama_index()
+    if llama_index is None:
+        raise SystemExit("LlamaIndex is not available; use --synthetic.")
+    paths = list(iter_document_files(LEGAL_DOCS_DIR, recursive=True, exclude={DOCS_MANIFEST_FILE}))
+    nodes = list(iter_nodes(iter_documents(paths), llama_index.Settings.node_parser))
+    if not nodes:
+        raise SystemExit(f"No documents in {LEGAL_DOCS_DIR}; use --synthetic.")
+    print(f"Embedding {len(nodes)} chunks from {len(paths)} files...")
+    embed_missing(nodes, llama_index.Settings.embed_model)
+    return np.asarray([node.embedding for node in nodes], dtype=np.float32)
+
+def synthetic_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    """Vectors around 1000 random topics, a rough stand-in for document chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((1000, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def timed_search(search, queries, k):
+    """Runs one query at a time, as the REPL does. Returns (result ids, latencies in ms)."""
+    ids, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids.append(search(query[np.newaxis, :], k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return ids, latencies
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HNSW recall and latency with exact search.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use this many random vectors instead of the corpus")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query (recall@k)")
+    parser.add_argument("--ef", default="16,32,64,128", help="Comma-separated efSearch values")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=os.path.join(REPO_ROOT, "benchmarks", "results", "ann.jsonl"),
+                        help="JSONL file the result is appended to (empty to skip)")
+    args = parser.parse_args()
+
+    import faiss
+    from ann_store import create_hnsw_index
+
+    vectors = normalize(synthetic_vectors(args.synthetic, args.dim, args.seed) if args.synthetic else corpus_vectors())
+    rng = np.random.default_rng(args.seed + 1)
+    sample = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = normalize(sample + 0.05 * rng.standard_normal(sample.shape).astype(np.float32))
+    k = min(args.k, len(vectors))
+    print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {len(queries)} queries, recall@{k}\n")
+
+    # Exact search: a full scan over float32 vectors, like the default in-memory store
+    exact_ids, exact_latencies = timed_search(lambda q, k: np.argsort(-(vectors @ q[0]))[:k], queries, k)
+    exact = {"store": "exact", "memory_mb": round(vectors.nbytes / 1e6, 1), "recall": 1.0,
+             **latency_summary(exact_latencies)}
+    results = [exact]
+
+    for quantization in ("none", "sq8"):
+        start = time.perf_counter()
+        index = create_hnsw_index(vectors.shape[1], vectors, quantization=quantization)
+        index.add(vectors)
+        build_s = time.perf_counter() - start
+        memory_mb = round(faiss.serialize_index(index).nbytes / 1e6, 1)
+        for ef in [int(value) for value in args.ef.split(",")]:
+            index.hnsw.efSearch = max(ef, k)
+            ids, latencies = timed_search(lambda q, k: index.search(q, k)[1][0], queries, k)
+            recall = statistics.mean(len(set(found) & set(expected)) / k for found, expected in zip(ids, exact_ids))
+            results.append({"store": f"hnsw-{quantization}", "ef_search": ef, "memory_mb": memory_mb,
+                            "build_s": round(build_s, 2), "recall": round(recall, 4), **latency_summary(latencies)})
+
+    print(f"{'Store':<12} {'efSearch':>8} {'Recall':>8} {'p50 ms':>9} {'p95 ms':>9} {'Memory MB':>10}")
+    for result in results:
+        print(f"{result['store']:<12} {result.get('ef_search', '-'):>8} {result['recall']:>8.3f} "
+              f"{result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['memory_mb']:>10.1f}")
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "vectors": len(vectors),
+                "dimension": int(vectors.shape[1]),
+                "source": "synthetic" if args.synthetic else LEGAL_DOCS_DIR,
+                "k": k,
+                "hnsw_m": ANN_HNSW_M,
+                "ef_construction": ANN_EF_CONSTRUCTION,
+                "results": results,
+            }) + "\n")
+        print(f"\nAppended to {args.history}")
+
+if __name__ == "__main__":
+    main()
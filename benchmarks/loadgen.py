@@ -0,0 +1,324 @@
+"""
+Load generator: how many simultaneous trials one process can run before turn latency degrades.
+
+Runs N DialogueManager sessions on threads, each replaying a random mix of REPL
+commands (call, examine, cross, present, defense, continue; a trial that
+reaches MAX_ROUNDS is ended and a new one started) against a local stub model
+(stub_model.py) with configurable latency per call type. Document queries are
+off unless --documents is given; then LlamaIndex answers with a MockLLM and
+needs EMBED_BACKEND=local, so no request leaves the machine. Transcripts,
+witness answers and trace spans go to a temporary directory that is removed
+at the end. N is ramped up level
+by level; at each level the tool reports throughput, per-command latency
+percentiles, CPU and RSS, and the level where the system saturates: the first
+where scaling efficiency (throughput per session relative to the first level)
+drops below --min-efficiency or the p95 command latency exceeds --slo-ms.
+
+Usage:
+    python benchmarks/loadgen.py [--levels 1,2,4,8,16,32,64] [--level-seconds 30] [--warmup-seconds 5]
+                                 [--latency default=800:2500,juror_vote=300:900]
+                                 [--mix call=1,examine=3,cross=2,present=1,defense=3,continue=2]
+                                 [--think-time 0] [--stub-concurrency 0] [--history benchmarks/results/loadgen.jsonl]
+                                 [--documents]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from settings import MAX_ROUNDS, TURN_LATENCY_SLO_MS, EMBED_BACKEND  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+DEFAULT_MIX = "call=1,examine=3,cross=2,present=1,defense=3,continue=2"
+QUESTIONS = [
+    "Where were you at eleven thirty that night?",
+    "What exactly did you see at the back of the store?",
+    "How far away were you standing?",
+    "Was it dark at the time?",
+    "Had you met the defendant before?",
+    "What did you do next?",
+    "Are you certain of the time?",
+    "Who else was present?",
+]
+DEFENSE_STATEMENTS = [
+    "The prosecution has no witness who saw my client's face.",
+    "The receipt places my client at a restaurant across town at the time of the break-in.",
+    "The officer found no stolen property on my client.",
+    "The security footage shows a person in a hoodie, nothing more.",
+    "My client has an explanation for every transfer and the approvals to prove it.",
+    "The witness admitted she had been drinking and that it was dark.",
+]
+
+def parse_mix(text) -> dict:
+    mix = {}
+    for part in text.split(","):
+        command, _, weight = part.partition("=")
+        mix[command.strip()] = float(weight or 1)
+    return mix
+
+def rss_mb():
+    """Current resident set size (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+class Recorder:
+    """Completed commands as (end time, command, latency ms, ok), shared by all sessions."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def add(self, command, start, ok):
+        end = time.perf_counter()
+        with self._lock:
+            self.records.append((end, command, (end - start) * 1000, ok))
+
+    def between(self, start, end):
+        with self._lock:
+            return [record for record in self.records if start <= record[0] < end]
+
+class Session(threading.Thread):
+    """One simulated user: a DialogueManager driven by a random command mix until stopped."""
+    def __init__(self, number, cases, mix, think_time, recorder, stop):
+        super().__init__(name=f"session-{number}", daemon=True)
+        from dialogue_manager import DialogueManager
+        self.manager = DialogueManager()
+        self.cases = cases
+        self.commands = list(mix)
+        self.weights = [mix[command] for command in self.commands]
+        self.think_time = think_time
+        self.recorder = recorder
+        self.stop = stop
+        self.random = random.Random(number)
+        self.case = None
+
+    def _timed(self, command, fn, *args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+            self.recorder.add(command, start, True)
+        except Exception:
+            self.recorder.add(command, start, False)
+
+    def _start(self):
+        self.case = self.random.choice(self.cases)
+        self._timed("start", self.manager.start_trial, self.case["case_context"], self.case.get("witnesses"),
+                    self.case.get("evidence"))
+
+    def _step(self):
+        manager = self.manager
+        command = self.random.choices(self.commands, self.weights)[0]
+        witnesses = list(self.case.get("witnesses") or {})
+        if command in ("examine", "cross") and not manager.current_witness and witnesses:
+            command = "call"
+        if command == "call" and witnesses:
+            self._timed("call", manager.call_witness, self.random.choice(witnesses))
+        elif command == "examine" and manager.current_witness:
+            self._timed("examine", manager.examine_witness, "Prosecution", self.random.choice(QUESTIONS))
+        elif command == "cross" and manager.current_witness:
+            self._timed("cross", manager.cross_examine_witness, "Defense", self.random.choice(QUESTIONS))
+        elif command == "present" and self.case.get("evidence"):
+            self._timed("present", manager.present_evidence, "Prosecution",
+                        self.random.choice(list(self.case["evidence"])))
+        elif command == "defense":
+            self._timed("defense", manager.process_defense, self.random.choice(DEFENSE_STATEMENTS))
+        elif command == "continue":
+            if manager.current_round >= MAX_ROUNDS:
+                self._timed("end", manager.end_trial)
+                self._start()
+            else:
+                self._timed("continue", manager.process_prosecution)
+
+    def run(self):
+        self._start()
+        while not self.stop.is_set():
+            if self.think_time > 0:
+                self.stop.wait(self.random.expovariate(1 / self.think_time))
+            if not self.stop.is_set():
+                self._step()
+
+def level_report(sessions, records, elapsed_s, cpu_s, managers):
+    commands = {}
+    for _, command, latency_ms, ok in records:
+        entry = commands.setdefault(command, {"latencies": [], "errors": 0})
+        entry["latencies"].append(latency_ms)
+        entry["errors"] += 0 if ok else 1
+    latencies = [latency_ms for _, _, latency_ms, _ in records]
+    event_kb = [manager.events.memory_bytes() / 1024 for manager in managers]
+    return {
+        "sessions": sessions,
+        "commands": len(records),
+        "throughput_per_s": round(len(records) / elapsed_s, 3),
+        "errors": sum(1 for record in records if not record[3]),
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+        "cpu_percent": round(cpu_s / elapsed_s * 100, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "threads": threading.active_count(),
+        "event_store_kb": {"mean": round(sum(event_kb) / len(event_kb), 1) if event_kb else None,
+                           "max": round(max(event_kb), 1) if event_kb else None},
+        "qos_degraded": sum(1 for manager in managers if manager.qos.level_name != "normal"),
+        "by_command": {
+            command: {"count": len(entry["latencies"]), "errors": entry["errors"],
+                      "p50_ms": round(percentile(entry["latencies"], 50), 1),
+                      "p95_ms": round(percentile(entry["latencies"], 95), 1),
+                      "p99_ms": round(percentile(entry["latencies"], 99), 1)}
+            for command, entry in sorted(commands.items())
+        },
+    }
+
+def find_saturation(levels, min_efficiency, slo_ms):
+    """Returns (last level within limits, first saturated level, reason)."""
+    base = levels[0]
+    per_session = base["throughput_per_s"] / base["sessions"] if base["throughput_per_s"] else None
+    capacity = None
+    for level in levels:
+        efficiency = (level["throughput_per_s"] / level["sessions"] / per_session) if per_session else 0.0
+        level["efficiency"] = round(efficiency, 3)
+        if level["p95_ms"] is not None and level["p95_ms"] > slo_ms:
+            return capacity, level, f"p95 {level['p95_ms']:.0f} ms exceeds the {slo_ms} ms SLO"
+        if efficiency < min_efficiency:
+            return capacity, level, f"scaling efficiency {efficiency:.0%} is below {min_efficiency:.0%}"
+        capacity = level
+    return capacity, None, None
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp up concurrent trial sessions against a stub model.")
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64", help="Comma-separated session counts")
+    parser.add_argument("--level-seconds", type=float, default=30, help="Measurement time per level")
+    parser.add_argument("--warmup-seconds", type=float, default=5, help="Unmeasured time after adding sessions")
+    parser.add_argument("--latency", default="default=800:2500,juror_vote=300:900,evaluation=600:1500",
+                        help="Stub model latency per call type as median:p95 in ms")
+    parser.add_argument("--stub-concurrency", type=int, default=0,
+                        help="Maximum stub model calls in flight (0 = unlimited), like a provider limit")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of stub model calls that fail")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Relative weights of the commands")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Average pause between commands (s)")
+    parser.add_argument("--cases", default=None, help="JSONL file of cases (default: autopilot's samples)")
+    parser.add_argument("--slo-ms", type=float, default=TURN_LATENCY_SLO_MS, help="p95 command latency limit")
+    parser.add_argument("--min-efficiency", type=float, default=0.8,
+                        help="Throughput per session, relative to the first level, below which it saturates")
+    parser.add_argument("--history", default=os.path.join(REPO_ROOT, "benchmarks", "results", "loadgen.jsonl"),
+                        help="JSONL file the result is appended to (empty to skip)")
+    parser.add_argument("--documents", action="store_true",
+                        help="Also query legal_docs (needs EMBED_BACKEND=local; answers come from a MockLLM)")
+    args = parser.parse_args()
+    if args.documents and (EMBED_BACKEND != "local" or importlib.util.find_spec("llama_index.embeddings.huggingface") is None):
+        parser.error("--documents needs EMBED_BACKEND=local and llama-index-embeddings-huggingface, "
+                     "so that no embedding request goes to a provider")
+
+    import dialogue_manager
+    import stub_model
+    from autopilot import load_cases
+    from objection_filter import objection_filter
+    from judge_interjection import interjection_stats
+    from answer_cache import witness_answer_cache
+    from tracing import tracer
+
+    latencies = stub_model.parse_latencies(args.latency)
+    stub = stub_model.StubModel(latencies, latencies.pop("default", None), args.stub_concurrency or None,
+                                args.failure_rate, seed=0)
+    stub_model.install(stub)
+    # Stub transcripts, answers and spans must not end up where real trials read or keep them
+    work_dir = tempfile.mkdtemp(prefix="loadgen_")
+    dialogue_manager.TRANSCRIPTS_DIR = os.path.join(work_dir, "transcripts")
+    witness_answer_cache.path = os.path.join(work_dir, "answer_cache.json")
+    tracer.set_path(os.path.join(work_dir, "spans.jsonl"))
+    cases = load_cases(args.cases)
+    mix = parse_mix(args.mix)
+    dialogue_manager.warm_up()
+    if args.documents:
+        llama_index = dialogue_manager.get_llama_index()
+        if llama_index:
+            from llama_index.core.llms import MockLLM
+            # Query engines synthesize their answers with the mock instead of the default OpenAI LLM
+            llama_index.Settings.llm = MockLLM(max_tokens=64)
+        dialogue_manager.load_document_indexes()
+    else:
+        dialogue_manager.disable_document_indexes()
+
+    recorder = Recorder()
+    stop = threading.Event()
+    sessions = []
+    levels = []
+    print(f"Stub model: {args.latency}; mix {args.mix}; {args.level_seconds:.0f}s per level\n")
+    print(f"{'Sessions':>8} {'Cmd/s':>8} {'Eff':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>6} "
+          f"{'CPU %':>6} {'RSS MB':>7} {'QoS-':>5}")
+    try:
+        for count in [int(value) for value in args.levels.split(",")]:
+            while len(sessions) < count:
+                session = Session(len(sessions) + 1, cases, mix, args.think_time, recorder, stop)
+                sessions.append(session)
+                session.start()
+            time.sleep(args.warmup_seconds)
+            start, cpu_start = time.perf_counter(), time.process_time()
+            time.sleep(args.level_seconds)
+            end, cpu_end = time.perf_counter(), time.process_time()
+            level = level_report(count, recorder.between(start, end), end - start, cpu_end - cpu_start,
+                                 [session.manager for session in sessions])
+            levels.append(level)
+            find_saturation(levels, args.min_efficiency, args.slo_ms)
+            print(f"{count:>8} {level['throughput_per_s']:>8.2f} {level['efficiency']:>6.2f} "
+                  f"{level['p50_ms'] or 0:>8.0f} {level['p95_ms'] or 0:>8.0f} {level['p99_ms'] or 0:>8.0f} "
+                  f"{level['errors']:>6} {level['cpu_percent']:>6.0f} {level['rss_mb']:>7.0f} {level['qos_degraded']:>5}")
+    finally:
+        stop.set()
+        for session in sessions:
+            session.join(timeout=10)
+        stub_model.install(None)
+        witness_answer_cache.path = None
+        tracer.set_path(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    capacity, saturated, reason = find_saturation(levels, args.min_efficiency, args.slo_ms)
+    if saturated:
+        print(f"\nSaturates at {saturated['sessions']} sessions: {reason}.")
+    else:
+        print("\nDid not saturate; try higher --levels.")
+    if capacity:
+        print(f"Capacity: {capacity['sessions']} sessions ({capacity['throughput_per_s']:.2f} commands/s, "
+              f"p95 {capacity['p95_ms']:.0f} ms).")
+    last = levels[-1] if levels else None
+    if last:
+        print(f"\nPer command at {last['sessions']} sessions:")
+        print(f"{'Command':<10} {'Count':>6} {'Errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for command, entry in last["by_command"].items():
+            print(f"{command:<10} {entry['count']:>6} {entry['errors']:>6} {entry['p50_ms']:>8.0f} "
+                  f"{entry['p95_ms']:>8.0f} {entry['p99_ms']:>8.0f}")
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "latency": args.latency,
+                "stub_concurrency": args.stub_concurrency,
+                "mix": args.mix,
+                "think_time": args.think_time,
+                "stub_calls": stub.calls,
+                "objection_filter": objection_filter.stats(),
+                "judge_interjections": interjection_stats.stats(),
+                "capacity_sessions": capacity["sessions"] if capacity else None,
+                "saturated_sessions": saturated["sessions"] if saturated else None,
+                "saturation_reason": reason,
+                "levels": levels,
+            }) + "\n")
+        print(f"\nAppended to {args.history}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Retrieval benchmark: quality and latency of document retrieval over a labeled fixture.
+
+Sweeps chunk size, top-k, vector store backend and query phrasing offline (no
+LLM calls) and reports, for each combination, recall@k and MRR against the
+labeled relevant passages, plus index build time, index size on disk and
+p50/p99 search latency. The result is appended to a JSONL history.
+
+The fixture is a directory of documents and a JSONL file of queries:
+
+    {"id": "hearsay-1", "case_context": "...", "statement": "...",
+     "relevant": [{"file": "hearsay.txt", "contains": "to prove the truth of the matter asserted"}]}
+
+A chunk is relevant to a label if it comes from the file and contains the
+phrase, so labels stay valid whatever the chunk size. recall@k is the share of
+labels with a relevant chunk in the top k, MRR the mean reciprocal rank of the
+first relevant chunk. Each query is phrased as the statement alone and through
+each of the query templates the agents send (prompts.py).
+
+Backends: "bm25" (text_utils.PassageIndex, no embeddings), "simple" (exact scan,
+the default store), "hnsw" (needs faiss-cpu) and "mmap". Query embeddings are
+computed once up front, so latency is the search alone.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py [--fixture benchmarks/fixtures/retrieval] [--embed local]
+                                             [--chunk-sizes 128,256,512] [--top-k 1,2,5]
+                                             [--backends bm25,simple,hnsw,mmap] [--phrasings statement,...]
+                                             [--repeat 5] [--history benchmarks/results/retrieval.jsonl]
+"""
+import argparse
+import json
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from settings import EMBED_MODEL_NAME, QUERY_HISTORY_CHARS  # noqa: E402
+from prompts import (JUDGE_CONTEXT_QUERY, JUDGE_RULING_QUERY, PROSECUTOR_CONTEXT_QUERY,  # noqa: E402
+                     PROSECUTOR_OBJECTION_QUERY)
+from tracing import percentile  # noqa: E402
+
+PHRASINGS = {
+    "statement": lambda q: q["statement"],
+    "judge_context": lambda q: JUDGE_CONTEXT_QUERY.format(case_context=q["case_context"],
+                                                          history=q["statement"][-QUERY_HISTORY_CHARS:]),
+    "judge_ruling": lambda q: JUDGE_RULING_QUERY.format(objection=q["statement"],
+                                                        context=q["case_context"][-QUERY_HISTORY_CHARS:]),
+    "prosecutor_context": lambda q: PROSECUTOR_CONTEXT_QUERY.format(case_context=q["case_context"],
+                                                                    history=q["statement"][-QUERY_HISTORY_CHARS:]),
+    "prosecutor_objection": lambda q: PROSECUTOR_OBJECTION_QUERY.format(statement=q["statement"],
+                                                                        context=q["case_context"][-QUERY_HISTORY_CHARS:]),
+}
+BACKENDS = ("bm25", "simple", "hnsw", "mmap")
+
+def normalize_space(text):
+    return " ".join(text.split())
+
+def load_queries(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_documents(directory):
+    from ingestion import iter_document_files, iter_documents
+    return list(iter_documents(list(iter_document_files(directory)), workers=1))
+
+def create_embed_model(backend):
+    """The embedding model for --embed, or None (only bm25 can run)."""
+    if backend == "none":
+        return None
+    if backend == "local":
+        from embeddings import create_embed_model as create_local
+        return create_local()
+    from llama_index.core import Settings
+    return Settings.embed_model
+
+def chunk(documents, chunk_size, chunk_overlap):
+    """Splits the documents into chunks, numbering each in its metadata (not embedded)."""
+    from llama_index.core.node_parser import SentenceSplitter
+    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=min(chunk_overlap, chunk_size // 5))
+    nodes = splitter.get_nodes_from_documents(documents)
+    for i, node in enumerate(nodes):
+        node.metadata["chunk"] = i
+        node.excluded_embed_metadata_keys.append("chunk")
+        node.excluded_llm_metadata_keys.append("chunk")
+    return nodes
+
+def label_chunks(nodes, queries):
+    """For each query, one set of relevant chunk numbers per label."""
+    from llama_index.core.schema import MetadataMode
+    texts = [(node.metadata.get("file_name"), normalize_space(node.get_content(metadata_mode=MetadataMode.NONE)))
+             for node in nodes]
+    labels = []
+    for query in queries:
+        labels.append([{i for i, (name, text) in enumerate(texts)
+                        if name == label["file"] and normalize_space(label["contains"]) in text}
+                       for label in query["relevant"]])
+    return labels
+
+def embed(nodes, embed_model):
+    from ingestion import embed_missing
+    if getattr(embed_model, "model_name", None) == EMBED_MODEL_NAME:
+        from embeddings import EmbeddingCache, embed_nodes
+        embed_nodes(nodes, embed_model, EmbeddingCache(model_name=EMBED_MODEL_NAME), workers=1, verbose=False)
+    embed_missing(nodes, embed_model)
+
+def directory_mb(directory):
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(directory) for name in files)
+    return total / 1e6
+
+def build(backend, nodes, embed_model, work_dir):
+    """Builds the index. Returns (search(query_text, embedding, k) -> chunk numbers, size in MB)."""
+    from llama_index.core.schema import MetadataMode, QueryBundle
+    if backend == "bm25":
+        from text_utils import PassageIndex
+        index = PassageIndex([node.get_content(metadata_mode=MetadataMode.NONE) for node in nodes])
+        return (lambda text, embedding, k: [i for i, _ in index.search(text, k)]), len(pickle.dumps(index)) / 1e6
+    directory = os.path.join(work_dir, backend)
+    if backend == "mmap":
+        from mmap_index import MmapIndexWriter, MmapIndex, MmapShardIndex
+        writer = MmapIndexWriter(directory, "benchmark")
+        writer.add(nodes)
+        writer.close()
+        index = MmapShardIndex("benchmark", MmapIndex(directory), embed_model)
+    else:
+        from llama_index.core import StorageContext, VectorStoreIndex
+        storage_context = None
+        if backend == "hnsw":
+            from ann_store import create_vector_store
+            storage_context = StorageContext.from_defaults(
+                vector_store=create_vector_store([node.embedding for node in nodes]))
+        index = VectorStoreIndex(nodes, storage_context=storage_context, embed_model=embed_model)
+        index.storage_context.persist(persist_dir=directory)
+
+    def search(text, embedding, k):
+        retriever = index.as_retriever(similarity_top_k=k)
+        return [result.node.metadata["chunk"] for result in retriever.retrieve(QueryBundle(text, embedding=embedding))]
+    return search, directory_mb(directory)
+
+def score(rankings, labels, top_k):
+    """recall@k for each k and MRR, averaged over queries with at least one labeled chunk."""
+    recall = {k: [] for k in top_k}
+    reciprocal_ranks = []
+    for ranking, query_labels in zip(rankings, labels):
+        query_labels = [chunks for chunks in query_labels if chunks]
+        if not query_labels:
+            continue
+        for k in top_k:
+            found = set(ranking[:k])
+            recall[k].append(sum(1 for chunks in query_labels if chunks & found) / len(query_labels))
+        relevant = set().union(*query_labels)
+        rank = next((position for position, i in enumerate(ranking, 1) if i in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return ({f"recall@{k}": round(statistics.mean(values), 4) if values else None for k, values in recall.items()},
+            round(statistics.mean(reciprocal_ranks), 4) if reciprocal_ranks else None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure retrieval recall, MRR, build time, size and latency.")
+    parser.add_argument("--fixture", default=os.path.join(REPO_ROOT, "benchmarks", "fixtures", "retrieval"),
+                        help="Directory with docs/ and queries.jsonl")
+    parser.add_argument("--embed", default="local", choices=("local", "openai", "none"),
+                        help="Embedding model (openai needs OPENAI_API_KEY and is not offline)")
+    parser.add_argument("--chunk-sizes", default="128,256,512", help="Comma-separated chunk sizes in tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=20, help="Overlap in tokens (at most a fifth of the chunk)")
+    parser.add_argument("--top-k", default="1,2,5", help="Comma-separated k values for recall@k")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--phrasings", default=",".join(PHRASINGS))
+    parser.add_argument("--repeat", type=int, default=5, help="Times each query is searched, for latency")
+    parser.add_argument("--history", default=os.path.join(REPO_ROOT, "benchmarks", "results", "retrieval.jsonl"),
+                        help="JSONL file the result is appended to (empty to skip)")
+    args = parser.parse_args()
+
+    chunk_sizes = [int(value) for value in args.chunk_sizes.split(",")]
+    top_k = sorted(int(value) for value in args.top_k.split(","))
+    phrasings = [name for name in args.phrasings.split(",") if name]
+    unknown = set(phrasings) - set(PHRASINGS)
+    if unknown:
+        raise SystemExit(f"Unknown phrasing(s): {', '.join(sorted(unknown))}. Choose from {', '.join(PHRASINGS)}.")
+    backends = [name for name in args.backends.split(",") if name]
+    embed_model = create_embed_model(args.embed)
+    if embed_model is None:
+        print("No embedding model; only the bm25 backend runs.")
+        backends = [name for name in backends if name == "bm25"]
+    if "hnsw" in backends:
+        from ann_store import ann_available
+        if not ann_available():
+            backends.remove("hnsw")
+
+    queries = load_queries(os.path.join(args.fixture, "queries.jsonl"))
+    documents = load_documents(os.path.join(args.fixture, "docs"))
+    texts = {name: [PHRASINGS[name](query) for query in queries] for name in phrasings}
+    query_embeddings, embed_ms = {}, []
+    if embed_model is not None:
+        for name in phrasings:
+            for text in texts[name]:
+                start = time.perf_counter()
+                query_embeddings[text] = embed_model.get_query_embedding(text)
+                embed_ms.append((time.perf_counter() - start) * 1000)
+    print(f"{len(queries)} queries, {len(documents)} documents, backends {', '.join(backends)}\n")
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="retrieval_benchmark_")
+    try:
+        for chunk_size in chunk_sizes:
+            nodes = chunk(documents, chunk_size, args.chunk_overlap)
+            labels = label_chunks(nodes, queries)
+            unlabeled = sum(1 for query_labels in labels if not any(query_labels))
+            if unlabeled:
+                print(f"Warning: {unlabeled} queries have no relevant chunk at chunk size {chunk_size} "
+                      f"(label phrase split across chunks); they are left out of the scores.")
+            if embed_model is not None and backends != ["bm25"]:
+                embed(nodes, embed_model)
+            for backend in backends:
+                start = time.perf_counter()
+                search, size_mb = build(backend, nodes, embed_model, work_dir)
+                build_s = time.perf_counter() - start
+                for name in phrasings:
+                    rankings, latencies = [], []
+                    for text in texts[name]:
+                        for _ in range(args.repeat):
+                            start = time.perf_counter()
+                            ranking = search(text, query_embeddings.get(text), top_k[-1])
+                            latencies.append((time.perf_counter() - start) * 1000)
+                        rankings.append(ranking)
+                    recall, mrr = score(rankings, labels, top_k)
+                    results.append({"chunk_size": chunk_size, "chunks": len(nodes), "backend": backend,
+                                    "phrasing": name, **recall, "mrr": mrr, "build_s": round(build_s, 3),
+                                    "index_mb": round(size_mb, 3), "p50_ms": round(percentile(latencies, 50), 3),
+                                    "p99_ms": round(percentile(latencies, 99), 3)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    recall_columns = [f"recall@{k}" for k in top_k]
+    print(f"{'Chunk':>5} {'Backend':<7} {'Phrasing':<21} " + " ".join(f"{column:>9}" for column in recall_columns)
+          + f" {'MRR':>6} {'Build s':>8} {'MB':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(f"{result['chunk_size']:>5} {result['backend']:<7} {result['phrasing']:<21} "
+              + " ".join(f"{result[column] if result[column] is not None else '-':>9}" for column in recall_columns)
+              + f" {result['mrr'] if result['mrr'] is not None else '-':>6} {result['build_s']:>8.3f} "
+                f"{result['index_mb']:>7.3f} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f}")
+    if embed_ms:
+        print(f"\nQuery embedding (not included above): p50 {percentile(embed_ms, 50):.1f} ms, "
+              f"p99 {percentile(embed_ms, 99):.1f} ms")
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "fixture": os.path.relpath(args.fixture, REPO_ROOT),
+                "queries": len(queries),
+                "embed_model": getattr(embed_model, "model_name", None),
+                "chunk_overlap": args.chunk_overlap,
+                "repeat": args.repeat,
+                "results": results,
+            }) + "\n")
+        print(f"\nAppended to {args.history}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup benchmark: how long it takes before the courtroom> prompt can answer.
+
+Runs `python -X importtime` on the REPL's import path in a fresh interpreter,
+summarizes the slowest modules, and appends the result to a JSONL history so
+regressions show up over time.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--top 15] [--history benchmarks/results/startup.jsonl]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What main.py imports before showing the prompt, plus building the DialogueManager
+STARTUP_CODE = "import settings, dialogue_manager; dialogue_manager.DialogueManager()"
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def run_once(code: str) -> tuple[float, list[dict]]:
+    """Runs the code in a fresh interpreter. Returns (wall seconds, importtime records)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup code failed:\n{completed.stderr[-2000:]}")
+
+    records = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append({
+                "module": module,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return wall, records
+
+def summarize(records: list[dict], top: int) -> dict:
+    """Total import time and the slowest top-level packages."""
+    top_level = {}
+    for record in records:
+        package = record["module"].split(".")[0]
+        top_level[package] = top_level.get(package, 0.0) + record["self_ms"]
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_import_ms": round(sum(record["self_ms"] for record in records), 1),
+        "modules_imported": len(records),
+        "slowest_packages": [{"package": name, "self_ms": round(ms, 1)} for name, ms in slowest],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure REPL startup import time.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest packages to show")
+    parser.add_argument("--history", default=os.path.join(REPO_ROOT, "benchmarks", "results", "startup.jsonl"),
+                        help="JSONL file the result is appended to (empty to skip)")
+    args = parser.parse_args()
+
+    walls, summaries = [], []
+    for _ in range(args.runs):
+        wall, records = run_once(STARTUP_CODE)
+        walls.append(wall * 1000)
+        summaries.append(summarize(records, args.top))
+
+    summary = min(summaries, key=lambda s: s["total_import_ms"])
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "wall_ms_median": round(statistics.median(walls), 1),
+        "wall_ms_min": round(min(walls), 1),
+        **summary,
+    }
+
+    print(f"Startup wall time: median {result['wall_ms_median']} ms, min {result['wall_ms_min']} ms "
+          f"over {args.runs} runs")
+    print(f"Import time: {result['total_import_ms']} ms across {result['modules_imported']} modules")
+    print("\nSlowest packages (self time):")
+    for entry in result["slowest_packages"]:
+        print(f"  {entry['package']:<30} {entry['self_ms']:>8.1f} ms")
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\nResult appended to {args.history}")
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,202 @@
 from agents import Prosecutor, Judge, WitnessAgent, JuryAgent
-from settings import MAX_ROUNDS, TRANSCRIPTS_DIR, LEGAL_DOCS_DIR, USE_LLAMA_INDEX, DEFAULT_MODEL
+from agents.base_agent import BaseAgent
+from agents.agent_pool import crew_pool
+from settings import (MAX_ROUNDS, TRANSCRIPTS_DIR, LEGAL_DOCS_DIR, USE_LLAMA_INDEX, OPENAI_API_KEY,
+                      WITNESS_POOL_MAX, TURN_DEADLINE_S,
+                      EMBED_BACKEND, WORKING_SET_ENABLED, DOCS_MANIFEST_FILE, VECTOR_STORE,
+                      JUDGE_INTERJECTION_MODE)
+from answer_cache import witness_answer_cache
+from precompute import PrecomputeEngine
+from tracing import tracer, traced, TracedQueryEngine
+from qos import QoSGovernor
+from resilience import resilient_caller, with_deadline, remaining
+from generation import generate
+from objection_filter import objection_filter, ruling_sustained
+from judge_interjection import interjection_triggers, interjection_stats
+from trial_events import TrialEventStore, SYSTEM, witness_speaker, witness_name
+from embeddings import create_embed_model
+from ingestion import ingest_directory
+from document_shards import discover_shards, select_shards, scope_key
+from ann_store import (ann_available, create_vector_store, shard_index_dir, index_fingerprint,
+                       load_index as load_ann_index, save_index as save_ann_index)
 import os
 import json
+import threading
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
 import re
 
-# --- Evaluation Setup ---
-from openai import OpenAI
+# Heavy dependencies (openai, llama_index, crewai) are imported on first use so the
+# REPL prompt appears immediately. warm_up() loads them ahead of time in the background.
+_init_lock = threading.Lock()
 
+# --- Evaluation Setup ---
 openai_client = None
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        print("OpenAI client initialized for evaluation.")
-    except Exception as e:
-        print(f"Warning: Failed to initialize OpenAI client - {e}. Evaluation will be skipped.")
-else:
-    print("Warning: OPENAI_API_KEY not found in environment. Evaluation will be skipped.")
+_openai_client_checked = False
+
+def get_openai_client():
+    """Returns the OpenAI client used for evaluation, creating it on first use (None if unavailable)."""
+    global openai_client, _openai_client_checked
+    with _init_lock:
+        if not _openai_client_checked:
+            _openai_client_checked = True
+            if OPENAI_API_KEY:
+                try:
+                    from openai import OpenAI
+                    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+                except Exception as e:
+                    print(f"Warning: Failed to initialize OpenAI client - {e}. Evaluation will be skipped.")
+            else:
+                print("Warning: OPENAI_API_KEY not found in environment. Evaluation will be skipped.")
+        return openai_client
+
+def set_openai_client(client):
+    """Replaces the evaluation client (e.g. with stub_model's local stand-in); None goes back to the real one."""
+    global openai_client, _openai_client_checked
+    with _init_lock:
+        openai_client = client
+        _openai_client_checked = client is not None
 # --- End Evaluation Setup ---
 
 # LlamaIndex imports (conditional)
-if USE_LLAMA_INDEX:
+_llama_index = None
+_llama_index_checked = False
+_local_embed_model_checked = False
+
+def get_llama_index(embed_model=True):
+    """
+    Imports llama_index.core on first use. Returns the module, or None if disabled or not installed.
+
+    With EMBED_BACKEND=local it also loads the local embedding model (torch),
+    unless embed_model is False; a later call with embed_model=True loads it then.
+    """
+    global _llama_index, _llama_index_checked, _local_embed_model_checked
+    with _init_lock:
+        if not _llama_index_checked and USE_LLAMA_INDEX:
+            _llama_index_checked = True
+            try:
+                import llama_index.core
+                _llama_index = llama_index.core
+            except ImportError:
+                print("Warning: LlamaIndex not installed or settings specify its use, but it failed to import. Document querying will be disabled.")
+        if _llama_index and embed_model and EMBED_BACKEND == "local" and not _local_embed_model_checked:
+            _local_embed_model_checked = True
+            local_model = create_embed_model()
+            if local_model:
+                _llama_index.Settings.embed_model = local_model
+        return _llama_index
+
+def disable_document_indexes():
+    """Turns document querying off for this process, as if USE_LLAMA_INDEX were False."""
+    global _llama_index, _llama_index_checked
+    with _init_lock:
+        _llama_index, _llama_index_checked = None, True
+
+# Each directory of legal documents is a separate index shard. A shard is built
+# the first time a trial's scope needs it and is then shared by every trial
+# (and, through fork, by every zygote worker).
+_document_shards = None  # name -> Shard
+_shard_indexes = {}  # name -> index (None if the shard has no readable documents)
+_shard_locks = defaultdict(threading.Lock)
+_document_index_lock = threading.Lock()
+
+def get_document_shards(reload=False):
+    """The shards found in LEGAL_DOCS_DIR, by name. Listing only; nothing is indexed."""
+    global _document_shards
+    with _document_index_lock:
+        if _document_shards is None or reload:
+            _document_shards = discover_shards(LEGAL_DOCS_DIR)
+            if reload:
+                _shard_indexes.clear()
+        return _document_shards
+
+def _load_mmap_shard_index(llama_index, shard):
+    """Opens the shard's memory-mapped index, building it first if its files changed."""
+    import mmap_index
+    directory = mmap_index.shard_index_dir(shard.name)
+    fingerprint = mmap_index.index_fingerprint(shard, getattr(llama_index.Settings.embed_model, "model_name", None))
+    index = mmap_index.load_index(llama_index, shard, directory, fingerprint)
+    if index is None:
+        print(f"Building memory-mapped index for shard '{shard.name}' from {shard.path}...")
+        if mmap_index.build_index(llama_index, shard, directory, fingerprint):
+            index = mmap_index.load_index(llama_index, shard, directory, fingerprint)
+        else:
+            print(f"No documents found for shard '{shard.name}'.")
+    else:
+        print(f"Opened memory-mapped index for shard '{shard.name}' from {directory}.")
+    _shard_indexes[shard.name] = index
+    return index
+
+def _load_shard_index(llama_index, shard):
+    """Indexes one shard once. Returns the index, or None if unavailable."""
+    with _shard_locks[shard.name]:
+        if shard.name in _shard_indexes:
+            return _shard_indexes[shard.name]
+        try:
+            if VECTOR_STORE == "mmap":
+                return _load_mmap_shard_index(llama_index, shard)
+            use_ann = VECTOR_STORE == "hnsw" and ann_available()
+            if use_ann:
+                # HNSW shards are persisted and reused until their files change
+                directory = shard_index_dir(shard.name)
+                fingerprint = index_fingerprint(shard, getattr(llama_index.Settings.embed_model, "model_name", None))
+                index = load_ann_index(directory, fingerprint)
+                if index is not None:
+                    print(f"Loaded HNSW index for shard '{shard.name}' from {directory}.")
+                    _shard_indexes[shard.name] = index
+                    return index
+            print(f"Loading documents for shard '{shard.name}' from {shard.path}...")
+            # Files are parsed, chunked, embedded and inserted in bounded batches
+            index = ingest_directory(llama_index, shard.path, metadata=shard.metadata, exclude={DOCS_MANIFEST_FILE},
+                                     vector_store_factory=create_vector_store if use_ann else None)
+            if index is None:
+                print(f"No documents found for shard '{shard.name}'.")
+            elif use_ann:
+                save_ann_index(index, directory, fingerprint)
+            _shard_indexes[shard.name] = index
+            return index
+        except Exception as e:
+            # Not cached, so a later trial can retry
+            print(f"Error indexing document shard '{shard.name}': {e}")
+            return None
+
+def load_document_indexes(scope=None, reload=False):
+    """
+    Loads the index shards in scope (see document_shards.parse_scope), building any
+    that are not built yet. Returns a list of (shard name, index), empty if unavailable.
+    """
+    llama_index = get_llama_index()
+    if not llama_index:
+        return []
+    shards = get_document_shards(reload)
+    if not shards:
+        print(f"LlamaIndex is enabled, but directory '{LEGAL_DOCS_DIR}' is empty or doesn't exist.")
+        return []
+    selected = select_shards(shards.values(), scope)
+    if not selected:
+        print(f"No document shards match the scope {scope}. Available: {', '.join(sorted(shards))}")
+        return []
+    loaded = [(shard.name, _load_shard_index(llama_index, shard)) for shard in selected]
+    loaded = [(name, index) for name, index in loaded if index is not None]
+    if loaded:
+        print(f"Document indexing complete ({', '.join(name for name, _ in loaded)}). Query engine is ready.")
+    else:
+        print("Document querying will be disabled for this trial.")
+    return loaded
+
+def warm_up(embed_model=True):
+    """Imports heavy dependencies and builds clients ahead of first use (see get_llama_index for embed_model)."""
     try:
-        from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-        # Optional: Configure embedding model (example)
-        # from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-        # Settings.embed_model = HuggingFaceEmbedding(model_name="BAAI/bge-small-en-v1.5")
-        print("LlamaIndex components loaded.")
+        import crewai  # noqa: F401
     except ImportError:
-        print("Warning: LlamaIndex not installed or settings specify its use, but it failed to import. Document querying will be disabled.")
-        USE_LLAMA_INDEX = False # Disable if import fails
+        pass
+    get_openai_client()
+    get_llama_index(embed_model)
+
+def _record_turn_latency(manager, span):
+    """Feeds an interactive turn's latency to the trial's QoS governor."""
+    manager.qos.record(span.duration_ms, span.name)
+    manager._apply_qos()
 
 class DialogueManager:
     def __init__(self):
@@ -41,29 +207,67 @@ class DialogueManager:
         self.current_witness = None
         self.evidence = {}
         self.query_engine = None
-        self.interaction_history = []
+        self.working_set = None  # Retrieval working set of the current trial
+        self.scope = None
+        self.document_shards = []  # Index shards the current trial queries
         self.current_round = 0
         self.trial_active = False
         self.case_context = None
-        self.transcript = []
+        # Everything said in the trial; the transcript and the agents' history are views of it
+        self.events = TrialEventStore()
+        self.presented_evidence = set()
+        # Position in the events and witnesses/evidence introduced since the judge last weighed in
+        self._judge_mark = 0
+        self._since_judge = Counter()
+        # Witness agents by (name, testimony), reused when a later trial declares the same witness
+        self._witness_pool = OrderedDict()
+        self._witness_pool_lock = threading.Lock()
+        # Background work started while the user is typing
+        self.precompute = PrecomputeEngine()
+        # Every span recorded during a trial is nested under its trace id
+        self.trace_id = None
+        self._pending_trace_id = None
+        # Degrades turn quality step by step when latency exceeds the SLO
+        self.qos = QoSGovernor()
+        self._deferred_evaluations = []
         # Added for user performance evaluation
         self.user_performance = {
             "case_description": {"persuasiveness": None, "factual_grounding": None, "coherence": None, "feedback": None},
             "defense_statements": [] 
         }
 
-    def start_trial(self, case_context, witnesses_data=None, evidence_data=None):
-        """Initialize a new trial with context, witnesses, and evidence."""
+    def start_trial(self, case_context, witnesses_data=None, evidence_data=None, scope=None):
+        """
+        Initialize a new trial with context, witnesses, and evidence.
+
+        scope limits document queries to matching index shards, e.g.
+        {"jurisdiction": "CA", "case_type": "criminal"} or {"shard": "criminal"};
+        None searches every shard.
+        """
+        # Continue the trace opened by precompute_trial_setup(), if any
+        self.trace_id = self._pending_trace_id or tracer.new_trace_id()
+        self._pending_trace_id = None
+        with tracer.span("turn.start_trial", trace_id=self.trace_id):
+            return self._start_trial(case_context, witnesses_data, evidence_data, scope)
+
+    def _start_trial(self, case_context, witnesses_data=None, evidence_data=None, scope=None):
         self.case_context = case_context
+        self.scope = scope
         self.current_round = 0
         self.trial_active = True
-        self.interaction_history = []
-        self.transcript = []
+        self.events = TrialEventStore()
         self.witnesses = {}
         self.current_witness = None
         self.evidence = {}
-        self.jury = JuryAgent()
+        self.presented_evidence = set()
+        self._judge_mark = 0
+        self._since_judge = Counter()
+        # The jury takes its testimony notes from the trial's events
+        self.jury.reset(record=self.events)
         self.query_engine = None
+        self.working_set = None
+        self.qos.reset()
+        self._deferred_evaluations = []
         # Reset performance scores
         self.user_performance = {
             "case_description": {"persuasiveness": None, "factual_grounding": None, "coherence": None, "feedback": None},
@@ -71,7 +275,9 @@ class DialogueManager:
         }
 
         # --> Evaluate Case Description <---
-        self.user_performance["case_description"] = self._evaluate_user_input(
+        self.user_performance["case_description"] = self.precompute.take(
+            ("evaluation", case_context),
+            self._evaluate_user_input,
             "case description", 
             case_context, 
             "" # No interaction history at the start
@@ -79,30 +285,14 @@ class DialogueManager:
         # --- End Evaluation Call ---
 
         # Initialize LlamaIndex if enabled and documents exist
-        if USE_LLAMA_INDEX:
-            if os.path.exists(LEGAL_DOCS_DIR) and os.listdir(LEGAL_DOCS_DIR):
-                try:
-                    print(f"Loading documents from {LEGAL_DOCS_DIR}...")
-                    reader = SimpleDirectoryReader(LEGAL_DOCS_DIR)
-                    documents = reader.load_data()
-                    if documents:
-                        print(f"Found {len(documents)} documents. Indexing...")
-                        index = VectorStoreIndex.from_documents(documents)
-                        self.query_engine = index.as_query_engine()
-                        print("Document indexing complete. Query engine is ready.")
-                        # Inform jury about documents being available (optional)
-                        # self.jury.receive_context("Legal documents are available for reference.")
-                    else:
-                        print("No documents found in the directory.")
-                except Exception as e:
-                    print(f"Error initializing LlamaIndex: {e}")
-                    print("Document querying will be disabled for this trial.")
-            else:
-                print(f"LlamaIndex is enabled, but directory '{LEGAL_DOCS_DIR}' is empty or doesn't exist.")
+        document_indexes = self.precompute.take(("document_indexes", scope_key(scope)), load_document_indexes, scope)
+        self.document_shards = [name for name, _ in document_indexes]
 
         if witnesses_data:
             for name, testimony in witnesses_data.items():
-                self.witnesses[name] = WitnessAgent(name=name, testimony=testimony)
+                self.witnesses[name] = self.precompute.take(
+                    ("witness", name, testimony), self._get_witness, name, testimony
+                )
                 # print(f"Witness {name} added.") # Quieter startup
 
         if evidence_data:
@@ -110,22 +300,24 @@ class DialogueManager:
                 self.evidence[evidence_id] = description
                 # print(f"Evidence '{evidence_id}' added.")
 
+        self.query_engine = self._load_query_engine([index for _, index in document_indexes])
+
+        self._apply_qos()
+
         # Inform jury about the case
         self.jury.receive_case_info(self.case_context)
 
         # Add initial case context to transcript
-        self.transcript.append({
-            "speaker": "System",
-            "content": f"Trial started for case: {case_context}",
-            "timestamp": datetime.now().isoformat()
-        })
+        self.events.append(SYSTEM, f"Trial started for case: {case_context}")
         
         # Get initial instructions from judge
-        instructions = self.judge.provide_instructions("opening")
+        instructions = self.precompute.take(("instructions", "opening"), self.judge.provide_instructions, "opening")
         self._add_to_transcript("Judge", instructions)
         
         return instructions
 
+    @traced("turn.process_prosecution")
+    @with_deadline(TURN_DEADLINE_S)
     def process_prosecution(self, user_response=None):
         """Process the prosecution's turn in the trial."""
         if not self.trial_active:
@@ -134,27 +326,42 @@ class DialogueManager:
         self.current_round += 1
         
         # Get prosecution's response
+        history = self._format_interaction_history()
         prosecution_response = self.prosecutor.process_context(
             self.case_context,
-            self._format_interaction_history(),
-            query_engine=self.query_engine
+            history,
+            query_engine=self._document_query_engine()
         )
         self._add_to_transcript("Prosecutor", prosecution_response)
         
-        # Check if judge has any questions or rulings
-        judge_response = self.judge.process_context(
-            self.case_context,
-            self._format_interaction_history(),
-            query_engine=self.query_engine
-        )
-        if judge_response:
-            self._add_to_transcript("Judge", judge_response)
+        # The judge only weighs in when something since their last remark calls for the court.
+        # Only the defense and witnesses are scanned: the prosecutor's own objections are
+        # already ruled on, and its response would otherwise trigger the judge every round
+        statements = [event.content for event in self.events.events(self._judge_mark)
+                      if event.speaker == "Defense" or witness_name(event.speaker)]
+        triggers = interjection_triggers(statements, self._since_judge["witness"], self._since_judge["evidence"],
+                                         self.current_round)
+        judge_response = None
+        judge_called = bool(triggers) or JUDGE_INTERJECTION_MODE == "always"
+        if judge_called:
+            judge_response = self.judge.process_context(
+                self.case_context,
+                self._format_interaction_history(),
+                query_engine=self._document_query_engine()
+            )
+            if judge_response:
+                self._add_to_transcript("Judge", judge_response)
+            self._judge_mark = len(self.events)
+            self._since_judge.clear()
+        interjection_stats.record(triggers, judge_called, len(history))
         
         return {
             "prosecution": prosecution_response,
             "judge": judge_response
         }
 
+    @traced("turn.process_defense", on_finish=_record_turn_latency)
+    @with_deadline(TURN_DEADLINE_S)
     def process_defense(self, defense_statement):
         """Process the defense's statement and any resulting objections."""
         if not self.trial_active:
@@ -163,19 +370,36 @@ class DialogueManager:
         self._add_to_transcript("Defense", defense_statement)
         
         # --> Evaluate Defense Statement <---
-        evaluation = self._evaluate_user_input(
-            "defense statement", 
-            defense_statement, 
-            self._format_interaction_history() # Pass current history
-        )
+        if self.qos.defer_evaluation:
+            # Under load the evaluation runs at the end of the trial instead of during the turn
+            evaluation = {"persuasiveness": None, "factual_grounding": None, "coherence": None,
+                          "feedback": "Evaluation deferred until the end of the trial."}
+            self._deferred_evaluations.append((evaluation, defense_statement, len(self.events)))
+        else:
+            evaluation = self._evaluate_user_input(
+                "defense statement", 
+                defense_statement, 
+                self._format_interaction_history() # Pass current history
+            )
         self.user_performance["defense_statements"].append(evaluation)
         # --- End Evaluation Call ---
         
+        # Skip the objection and ruling calls when nothing in the statement is objectionable
+        screened = None
+        if objection_filter.enabled:
+            screened = objection_filter.screen(
+                defense_statement, self._record_text(), self.evidence.keys(), self.presented_evidence
+            )
+            if objection_filter.should_skip(screened):
+                context = self._format_interaction_history()
+                objection_filter.audit(screened, lambda: self._audit_objection(defense_statement, context))
+                return None
+        
         # Check for prosecutor's objection
         objection = self.prosecutor.object_to_defense(
             defense_statement,
             self._format_interaction_history(),
-            query_engine=self.query_engine
+            query_engine=self._document_query_engine()
         )
         if objection:
             self._add_to_transcript("Prosecutor", f"Objection: {objection}")
@@ -184,17 +408,37 @@ class DialogueManager:
             ruling = self.judge.rule_on_objection(
                 objection, 
                 self._format_interaction_history(),
-                query_engine=self.query_engine
+                query_engine=self._document_query_engine()
             )
             self._add_to_transcript("Judge", ruling)
+            self._judge_mark = len(self.events)  # The ruling addressed everything said up to now
+            if screened:
+                objection_filter.record(screened, True, ruling_sustained(ruling))
             
             return {
                 "objection": objection,
                 "ruling": ruling
             }
         
+        if screened:
+            objection_filter.record(screened, False)
         return None
 
+    def _record_text(self):
+        """
+        Everything already on the record, for spotting facts a defense statement introduces.
+        Witnesses count once called: their testimony and answers are in the history.
+        """
+        return "\n".join([self.case_context or "", self.events.history(), *self.evidence.values()])
+
+    def _audit_objection(self, defense_statement, context):
+        """Runs a skipped statement through the objection and ruling calls, off the record."""
+        objection = self.prosecutor.object_to_defense(defense_statement, context)
+        if not objection:
+            return False, False
+        return True, ruling_sustained(self.judge.rule_on_objection(objection, context))
+
+    @traced("turn.call_witness")
     def call_witness(self, witness_name):
         """Calls a witness to the stand and gets their initial testimony."""
         if not self.trial_active:
@@ -205,19 +449,19 @@ class DialogueManager:
             return f"Witness '{witness_name}' not found."
         
         self.current_witness = witness
+        self._since_judge["witness"] += 1
         testimony = self.current_witness.provide_testimony()
-        self._add_to_transcript(f"Witness ({witness_name})", testimony)
+        self._add_to_transcript(witness_speaker(witness_name), testimony)
         
         # Optionally, inform the judge
         judge_remark = f"The witness, {witness_name}, will now testify."
         self._add_to_transcript("Judge", judge_remark)
 
-        # Inform jury about testimony
-        self.jury.receive_testimony_summary(witness_name, testimony)
-
         return f"{judge_remark}\n{testimony}"
 
-    def examine_witness(self, questioner_role: str, question: str):
+    @traced("turn.examine_witness", on_finish=_record_turn_latency)
+    @with_deadline(TURN_DEADLINE_S)
+    def examine_witness(self, questioner_role: str, question: str, cross_examination: bool = False):
         """Handles examination of the current witness."""
         if not self.trial_active:
             return "No active trial."
@@ -225,18 +469,18 @@ class DialogueManager:
             return "No witness currently on the stand."
         
         self._add_to_transcript(questioner_role, f"Question: {question}")
-        answer = self.current_witness.answer_question(question)
-        self._add_to_transcript(f"Witness ({self.current_witness.name})", answer)
-        # Inform jury about testimony
-        self.jury.receive_testimony_summary(self.current_witness.name, answer)
+        answer = self.current_witness.answer_question(question, cross_examination=cross_examination)
+        self._add_to_transcript(witness_speaker(self.current_witness.name), answer)
         return answer
 
+    @traced("turn.cross_examine_witness")
+    @with_deadline(TURN_DEADLINE_S)
     def cross_examine_witness(self, questioner_role: str, question: str):
         """Handles cross-examination of the current witness."""
-        # For now, cross-examination uses the same answering logic
-        # Future enhancements could involve different response strategies
-        return self.examine_witness(questioner_role, question)
+        return self.examine_witness(questioner_role, question, cross_examination=True)
 
+    @traced("turn.present_evidence")
+    @with_deadline(TURN_DEADLINE_S)
     def present_evidence(self, presenter_role: str, evidence_id: str):
         """Handles the presentation of a piece of evidence."""
         if not self.trial_active:
@@ -254,12 +498,15 @@ class DialogueManager:
 
         # Inform judge (basic implementation)
         judge_remark = f"The court acknowledges the presentation of {evidence_id}."
+        self.presented_evidence.add(evidence_id)
+        self._since_judge["evidence"] += 1
         self._add_to_transcript("Judge", judge_remark)
         
         # Future: Add logic for objections here
         
         return f"{presenter_role} {presentation_text}\nJudge: {judge_remark}"
 
+    @traced("turn.end_trial")
     def end_trial(self):
         """End the current trial, deliver verdict, and include performance."""
         if not self.trial_active:
@@ -269,7 +516,7 @@ class DialogueManager:
         self.trial_active = False
         
         # Get final instructions from judge
-        final_instructions = self.judge.provide_instructions("closing")
+        final_instructions = self.precompute.take(("instructions", "closing"), self.judge.provide_instructions, "closing")
         self._add_to_transcript("Judge", final_instructions)
         # Give instructions to jury
         self.jury.receive_instructions(final_instructions)
@@ -278,28 +525,135 @@ class DialogueManager:
         verdict = self.jury.deliberate_and_decide(self._format_transcript())
         self._add_to_transcript("Jury", verdict)
         
+        # Evaluations deferred by the QoS governor are filled in before the results are reported
+        for evaluation, statement, history_end in self._deferred_evaluations:
+            evaluation.update(self._evaluate_user_input("defense statement", statement,
+                                                        self.events.history(end=history_end)))
+        self._deferred_evaluations = []
+
         # Save transcript
         self._save_transcript()
+        witness_answer_cache.save()
+        # Anything precomputed but not used by now is wasted
+        self.precompute.reset()
         
         # Include user_performance in the result
         return {
             "final_instructions": final_instructions,
             "verdict": verdict,
-            "user_performance": self.user_performance # Added performance data
+            "user_performance": self.user_performance, # Added performance data
+            "answer_sources": self.get_answer_sources(),
+            "precompute": self.precompute.stats()
         }
 
+    # --- Speculative Precomputation ---
+    # main.py calls these before blocking on input() so the work overlaps with typing.
+    # Keys include the inputs they depend on, so stale results are never used.
+    def precompute_trial_setup(self):
+        """Starts work for a new trial that does not depend on the case description."""
+        self.precompute.reset()
+        self._pending_trace_id = tracer.new_trace_id()
+        with tracer.span("precompute.trial_setup", trace_id=self._pending_trace_id):
+            self.precompute.submit(("instructions", "opening"), self.judge.provide_instructions, "opening")
+
+    def precompute_scope(self, scope):
+        """Starts loading the document shards in the trial's scope while the rest of the trial is entered."""
+        with tracer.span("precompute.scope", trace_id=self._pending_trace_id):
+            self.precompute.submit(("document_indexes", scope_key(scope)), load_document_indexes, scope)
+
+    def precompute_case(self, case_context):
+        """Starts evaluating the case description while witnesses and evidence are entered."""
+        with tracer.span("precompute.case", trace_id=self._pending_trace_id):
+            self.precompute.submit(
+                ("evaluation", case_context), self._evaluate_user_input,
+                "case description", case_context, "", verbose=False
+            )
+
+    def precompute_witness(self, name, testimony):
+        """Starts building a declared witness (testimony indexes) before the trial starts."""
+        with tracer.span("precompute.witness", trace_id=self._pending_trace_id):
+            self.precompute.submit(("witness", name, testimony), self._get_witness, name, testimony)
+
+    @traced("precompute.idle_work")
+    def precompute_idle_work(self):
+        """Starts trial work that does not depend on the next command."""
+        if not self.trial_active:
+            return
+        self.precompute.submit(("instructions", "closing"), self.judge.provide_instructions, "closing")
+    # --- End Speculative Precomputation ---
+
+    def _get_witness(self, name, testimony):
+        """Returns a reset witness agent from the pool, creating it if this witness is new."""
+        key = (name, testimony)
+        with self._witness_pool_lock:
+            witness = self._witness_pool.get(key)
+            if witness is not None:
+                self._witness_pool.move_to_end(key)
+        if witness is None:
+            # Built outside the lock; indexing long testimony can take a while
+            witness = WitnessAgent(name=name, testimony=testimony)
+            with self._witness_pool_lock:
+                self._witness_pool[key] = witness
+                while len(self._witness_pool) > WITNESS_POOL_MAX:
+                    self._witness_pool.popitem(last=False)
+        witness.reset()
+        return witness
+
+    def get_allocation_stats(self):
+        """Agent objects and pooled CrewAI objects created so far in this process."""
+        return {
+            "agent_instances": BaseAgent.instances_created,
+            "witnesses_pooled": len(self._witness_pool),
+            **crew_pool.stats()
+        }
+
+    def _load_query_engine(self, indexes):
+        """Returns a query engine for this trial over the shared index shards, or None if there are none."""
+        if not indexes:
+            return None
+        if len(indexes) == 1:
+            query_engine = indexes[0].as_query_engine()
+        else:
+            from working_set import build_shard_query_engine  # Imports LlamaIndex
+            query_engine = build_shard_query_engine(indexes)
+        if WORKING_SET_ENABLED:
+            try:
+                from working_set import build_working_set_query_engine  # Imports LlamaIndex
+                seed_queries = [self.case_context, *self.evidence.values(),
+                                *(witness.testimony for witness in self.witnesses.values())]
+                query_engine, self.working_set = build_working_set_query_engine(indexes, seed_queries)
+                print(f"Retrieval working set: {self.working_set.stats()['chunks']} chunks relevant to this case.")
+            except Exception as e:
+                print(f"Could not build the retrieval working set ({e}); querying the full index.")
+        # Every query made by the judge, prosecutor or evidence lookups is traced
+        return TracedQueryEngine(query_engine)
+
+    @property
+    def transcript(self):
+        """The trial transcript: {"speaker", "content", "timestamp"} entries rendered from the events."""
+        return self.events.transcript
+
+    @property
+    def interaction_history(self):
+        """The agents' history as "Speaker: content" lines rendered from the events."""
+        return self.events.lines
+
     def _add_to_transcript(self, speaker, content):
         """Add an entry to the trial transcript."""
-        self.transcript.append({
-            "speaker": speaker,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        self.interaction_history.append(f"{speaker}: {content}")
+        self.events.append(speaker, content)
 
     def _format_interaction_history(self):
-        """Format the interaction history for context."""
-        return "\n".join(self.interaction_history)
+        """Format the interaction history for context (only the recent part when QoS shortens it)."""
+        return self.events.history(last=self.qos.history_window)
+
+    def _document_query_engine(self):
+        """The query engine for agent calls, or None while QoS skips document queries."""
+        return None if self.qos.skip_document_queries else self.query_engine
+
+    def _apply_qos(self):
+        """Points the trial's agents at the QoS governor's model override (None = configured model)."""
+        for agent in [self.prosecutor, self.judge, *self.witnesses.values()]:
+            agent.model_override = self.qos.model_override
 
     def _format_transcript(self):
         """Format the full transcript for verdict generation."""
@@ -312,14 +666,17 @@ class DialogueManager:
         """Save the trial transcript to a file."""
         os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(TRANSCRIPTS_DIR, f"trial_{timestamp}.json")
+        # The trace id keeps concurrent trials (autopilot.py) from writing to the same file
+        suffix = f"_{self.trace_id[:8]}" if self.trace_id else ""
+        filename = os.path.join(TRANSCRIPTS_DIR, f"trial_{timestamp}{suffix}.json")
         
         # Create a complete transcript object that includes both the trial proceedings and performance evaluation
         complete_transcript = {
-            "trial_proceedings": self.transcript,
+            "trial_proceedings": list(self.transcript),
             "performance_evaluation": self.user_performance,
             "metadata": {
                 "timestamp": timestamp,
+                "answer_sources": self.get_answer_sources(),
                 "case_context": self.case_context,
                 "witnesses": list(self.witnesses.keys()),
                 "evidence": list(self.evidence.keys())
@@ -335,12 +692,35 @@ class DialogueManager:
             "active": self.trial_active,
             "current_round": self.current_round,
             "max_rounds": MAX_ROUNDS,
-            "case_context": self.case_context
+            "case_context": self.case_context,
+            "answer_cache": witness_answer_cache.stats(),
+            "answer_sources": self.get_answer_sources(),
+            "precompute": self.precompute.stats(),
+            "allocations": self.get_allocation_stats(),
+            "trace_id": self.trace_id,
+            "qos": {"level": self.qos.level_name, "decisions": list(self.qos.decisions)},
+            "retrieval": self.working_set.stats() if self.working_set else None,
+            "objection_filter": objection_filter.stats(),
+            "judge_interjections": interjection_stats.stats(),
+            "events": self.events.stats(),
+            "scope": self.scope,
+            "document_shards": self.document_shards
         }
 
+    def get_answer_sources(self):
+        """Counts how the witnesses' answers were produced in this trial (cache, extractive or llm)."""
+        sources = Counter({"cache": 0, "extractive": 0, "llm": 0})
+        for witness in self.witnesses.values():
+            sources.update(witness.answer_sources)
+        return dict(sources)
+
     # --- Evaluation Method ---
-    def _evaluate_user_input(self, input_type, user_input, interaction_history):
-        """Evaluates user input based on persuasiveness, factual grounding, and coherence using OpenAI."""
+    def _evaluate_user_input(self, input_type, user_input, interaction_history, verbose=True):
+        """Evaluates user input based on persuasiveness, factual grounding, and coherence using OpenAI.
+
+        Progress messages are skipped when verbose is False (e.g. when run in the background).
+        """
+        openai_client = get_openai_client()
         if not openai_client:
             return {"persuasiveness": None, "factual_grounding": None, "coherence": None, "feedback": "Evaluation skipped: OpenAI client not available."}
             
@@ -370,15 +750,34 @@ class DialogueManager:
             return {"persuasiveness": None, "factual_grounding": None, "coherence": None, "feedback": f"Unknown input type: {input_type}"}
 
         try:
-            print(f"\nSending {input_type} to OpenAI for evaluation...")
-            response = openai_client.chat.completions.create(
-                model=DEFAULT_MODEL, # Ensure DEFAULT_MODEL is set in settings.py
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,  # Adjusted token limit for evaluation
-                temperature=0.3,
+            if verbose:
+                print(f"\nSending {input_type} to OpenAI for evaluation...")
+            def request_evaluation(profile):
+                with tracer.span("evaluation", input_type=input_type, prompt_chars=len(prompt),
+                                 model=profile.model) as span:
+                    response = openai_client.chat.completions.create(
+                        model=profile.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=profile.max_tokens,
+                        temperature=profile.temperature,
+                        timeout=remaining(),  # The attempt's budget, so a hung request frees its thread
+                    )
+                    usage = getattr(response, "usage", None)
+                    span.set(
+                        prompt_tokens=getattr(usage, "prompt_tokens", None),
+                        completion_tokens=getattr(usage, "completion_tokens", None)
+                    )
+                return response.choices[0].message.content.strip()
+
+            # The evaluation profile's model; escalated once if the scores cannot be found in the answer
+            evaluation_text = generate(
+                "evaluation",
+                lambda profile: resilient_caller.call("evaluation", lambda: request_evaluation(profile),
+                                                      span_name="evaluation"),
+                self.qos.model_override
             )
-            evaluation_text = response.choices[0].message.content.strip()
-            print("Evaluation received from OpenAI.")
+            if verbose:
+                print("Evaluation received from OpenAI.")
             
             # --- Improved Parsing Logic ---
             scores = {"persuasiveness": None, "factual_grounding": None, "coherence": None}
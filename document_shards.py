@@ -0,0 +1,123 @@
+# Document index shards by directory, tagged with metadata from an optional manifest
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from settings import DOCS_MANIFEST_FILE
+
+GENERAL_SHARD = "general"  # Files directly in the documents directory
+
+@dataclass
+class Shard:
+    """
+    One directory of documents, indexed separately from the others.
+
+    name is the directory relative to the documents directory ("criminal/ca"),
+    or GENERAL_SHARD for top-level files. metadata is attached to every chunk.
+    """
+    name: str
+    path: str
+    metadata: dict = field(default_factory=dict)
+
+def _load_manifest(directory):
+    """
+    Reads the manifest: {"<shard name>": {"jurisdiction": "CA", "case_type": "criminal"}, ...}.
+
+    A directory's entry also applies to the directories below it unless they
+    override the key.
+    """
+    path = os.path.join(directory, DOCS_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read document manifest {path}: {e}")
+        return {}
+
+def discover_shards(directory) -> dict:
+    """Returns {name: Shard} for every non-hidden directory under directory that contains files."""
+    if not os.path.isdir(directory):
+        return {}
+    manifest = _load_manifest(directory)
+    shards = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        files = [name for name in files if not name.startswith(".") and name != DOCS_MANIFEST_FILE]
+        if not files:
+            continue
+        relative = os.path.relpath(root, directory).replace(os.sep, "/")
+        name = GENERAL_SHARD if relative == "." else relative
+        metadata = {}
+        if name == GENERAL_SHARD:
+            metadata.update(manifest.get(GENERAL_SHARD, {}))
+        else:
+            parts = name.split("/")
+            for depth in range(1, len(parts) + 1):
+                metadata.update(manifest.get("/".join(parts[:depth]), {}))
+        metadata["shard"] = name
+        shards[name] = Shard(name=name, path=root, metadata=metadata)
+    return shards
+
+def shard_fingerprint(shard: Shard, *settings) -> str:
+    """
+    Hash of the shard's files (names, sizes, modification times), its tags and
+    the given settings, used to tell whether a persisted index is still current.
+    """
+    entries = []
+    for name in sorted(os.listdir(shard.path)):
+        path = os.path.join(shard.path, name)
+        if os.path.isfile(path) and not name.startswith(".") and name != DOCS_MANIFEST_FILE:
+            stat = os.stat(path)
+            entries.append([name, stat.st_size, stat.st_mtime_ns])
+    payload = [entries, shard.metadata, list(settings)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def parse_scope(text):
+    """
+    Parses "jurisdiction=CA, case_type=criminal" into a scope dict.
+
+    A bare word selects a shard by name ("criminal" also selects "criminal/ca").
+    Returns None, meaning every shard, for blank text.
+    """
+    scope = {}
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, separator, value = part.partition("=")
+        if separator:
+            scope[key.strip()] = value.strip()
+        else:
+            scope["shard"] = part
+    return scope or None
+
+def scope_key(scope):
+    """Hashable form of a scope, for cache and precompute keys."""
+    return tuple(sorted((scope or {}).items()))
+
+def shard_matches(shard: Shard, scope) -> bool:
+    """
+    Whether the shard is in scope. A shard that does not declare a key applies to
+    every value of it (e.g. rules shared by all jurisdictions).
+    """
+    for key, wanted in (scope or {}).items():
+        wanted = str(wanted).lower()
+        if key == "shard":
+            name = shard.name.lower()
+            if name != wanted and not name.startswith(wanted + "/"):
+                return False
+            continue
+        value = shard.metadata.get(key)
+        if value is None:
+            continue
+        values = value if isinstance(value, list) else [value]
+        if wanted not in (str(v).lower() for v in values):
+            return False
+    return True
+
+def select_shards(shards, scope) -> list:
+    """The shards in scope, in name order."""
+    return [shard for shard in sorted(shards, key=lambda shard: shard.name) if shard_matches(shard, scope)]
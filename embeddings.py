@@ -0,0 +1,184 @@
+# Local CPU embeddings for the legal document corpus
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+from array import array
+import time
+from concurrent.futures import ProcessPoolExecutor
+from settings import EMBED_MODEL_NAME, EMBED_BATCH_SIZE, EMBED_WORKERS, EMBED_CACHE_DIR
+
+def create_embed_model(model_name=EMBED_MODEL_NAME, batch_size=EMBED_BATCH_SIZE):
+    """
+    The local HuggingFace embedding model, or None if
+    llama-index-embeddings-huggingface is not installed.
+    """
+    try:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    except ImportError:
+        print("Warning: EMBED_BACKEND is 'local' but llama-index-embeddings-huggingface is not installed. "
+              "Using the default embedding model.")
+        return None
+    return HuggingFaceEmbedding(model_name=model_name, embed_batch_size=batch_size)
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by a hash of the model name and chunk text.
+
+    Entries live in one SQLite file per model under the cache directory, as
+    float32 blobs, and are read per batch, so memory does not grow with the
+    corpus. Re-indexing an unchanged corpus embeds nothing and a changed corpus
+    embeds only the new chunks. With no cache directory nothing is stored.
+    """
+    def __init__(self, cache_dir=EMBED_CACHE_DIR, model_name=EMBED_MODEL_NAME):
+        self.model_name = model_name
+        base = os.path.join(cache_dir, model_name.replace("/", "__")) if cache_dir else None
+        self.path = base + ".sqlite" if base else None
+        self._lock = threading.Lock()
+        self._db = None
+        if self.path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+                self._import_jsonl(base + ".jsonl")
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Could not open embedding cache {self.path}: {e}")
+                self._db = None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys) -> dict:
+        """The cached embeddings among keys, as {key: list of floats}."""
+        if self._db is None:
+            return {}
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            # SQLite limits the number of parameters per statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((key, array("f", vector).tolist()) for key, vector in rows)
+        return found
+
+    def put_many(self, items):
+        """Stores (key, embedding) pairs."""
+        if self._db is None or not items:
+            return
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                         ((key, array("f", embedding).tobytes()) for key, embedding in items))
+            except sqlite3.Error as e:
+                print(f"Warning: Could not write embedding cache {self.path}: {e}")
+
+    def __len__(self):
+        if self._db is None:
+            return 0
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _import_jsonl(self, path):
+        """Moves entries from the JSONL cache of earlier versions into the database, once."""
+        if not os.path.exists(path):
+            return
+        count = 0
+        with open(path) as f, self._db:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from an interrupted run
+                self._db.execute("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                 (entry["key"], array("f", entry["embedding"]).tobytes()))
+                count += 1
+        os.replace(path, path + ".imported")
+        print(f"Imported {count} cached embeddings from {path} into {self.path}.")
+
+# Per worker process: the model is loaded once by the pool initializer
+_worker_model = None
+
+def _init_worker(model_name, batch_size):
+    global _worker_model
+    _worker_model = create_embed_model(model_name, batch_size)
+
+def _embed_batch(texts):
+    return _worker_model.get_text_embedding_batch(texts)
+
+def create_embedding_pool(model_name=EMBED_MODEL_NAME, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS):
+    """A process pool whose workers each load the embedding model once, for repeated embed_nodes() calls."""
+    # spawn: forking a process that has loaded torch can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(model_name, batch_size))
+
+def embed_nodes(nodes, embed_model, cache=None, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS,
+                pool=None, verbose=True) -> dict:
+    """
+    Sets node.embedding on every node, embedding only chunks missing from the cache.
+
+    Missing chunks are embedded in batches of batch_size, spread over workers
+    processes (each loads its own copy of the model) when there is more than one
+    batch, or over pool if one is given. Returns counts and throughput, which are
+    also printed if verbose.
+    """
+    from llama_index.core.schema import MetadataMode
+
+    cache = cache if cache is not None else EmbeddingCache(model_name=embed_model.model_name)
+    start = time.perf_counter()
+    keys = [cache.key(node.get_content(metadata_mode=MetadataMode.EMBED)) for node in nodes]
+    # Only this call's embeddings are held in memory
+    vectors = cache.get_many(keys)
+    missing = {}
+    cached = 0
+    for key, node in zip(keys, nodes):
+        if key in vectors:
+            cached += 1
+        elif key not in missing:
+            missing[key] = node.get_content(metadata_mode=MetadataMode.EMBED)
+    missing_keys = list(missing)
+    texts = list(missing.values())
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    processes = min(workers, len(batches)) if len(batches) > 1 else 1
+    if pool is not None and batches:
+        results = list(pool.map(_embed_batch, batches))
+    elif processes > 1:
+        with create_embedding_pool(embed_model.model_name, batch_size, processes) as new_pool:
+            results = list(new_pool.map(_embed_batch, batches))
+    else:
+        results = [embed_model.get_text_embedding_batch(batch) for batch in batches]
+    embeddings = [embedding for batch in results for embedding in batch]
+    vectors.update(zip(missing_keys, embeddings))
+    cache.put_many(list(zip(missing_keys, embeddings)))
+
+    for key, node in zip(keys, nodes):
+        node.embedding = vectors[key]
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "chunks": len(nodes),
+        "embedded": len(texts),
+        "cached": cached,
+        "seconds": elapsed,
+        "chunks_per_second": len(texts) / elapsed if texts and elapsed else 0.0,
+    }
+    if verbose:
+        print(f"Embedded {stats['embedded']} distinct chunks of {stats['chunks']} ({stats['cached']} cached) in "
+              f"{elapsed:.1f}s ({stats['chunks_per_second']:.1f} chunks/s, batch size {batch_size}, "
+              f"{processes} process(es))")
+    return stats
@@ -0,0 +1,88 @@
+# CPU-only extractive answering of simple factual questions from a witness's testimony
+import re
+from text_utils import tokenize, content_tokens, stem, split_sentences, PassageIndex
+
+# Questions that ask for reasoning, opinion or explanation always go to the LLM
+_REASONING_WORDS = frozenset(["why", "explain", "describe", "opinion", "think", "believe", "feel",
+                              "guilty", "innocent", "would", "could", "should", "might", "whether",
+                              "sure", "certain", "possible", "lie", "lying", "truth"])
+
+_TIME_PATTERN = re.compile(r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\b\d{1,2}:\d{2}\b|\bo'clock\b|"
+                           r"\b(?:morning|afternoon|evening|night|midnight|noon)\b", re.IGNORECASE)
+_DATE_PATTERN = re.compile(r"\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|january|february|"
+                           r"march|april|may|june|july|august|september|october|november|december|"
+                           r"yesterday|today)\b|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b|\b(?:19|20)\d{2}\b",
+                           re.IGNORECASE)
+_PLACE_PATTERN = re.compile(r"\b(?:at|in|on|near|inside|outside|behind|across|from)\s+(?:the\s+)?\w+|"
+                            r"\b(?:inside|outside|nearby|upstairs|downstairs|home)\b", re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r"\b\d+\b|\b(?:one|two|three|four|five|six|seven|eight|nine|ten|dozen|"
+                             r"several|hundred|thousand)\b", re.IGNORECASE)
+_NAME_PATTERN = re.compile(r"(?<!^)(?<![.!?]\s)\b[A-Z][a-z]+")
+
+# (question prefix, answer pattern, words in the question that the answer type replaces).
+# The replaced words are stemmed, as they are compared with content_tokens()
+_QUESTION_TYPES = [
+    (("what time", "at what time"), _TIME_PATTERN, ["time"]),
+    (("what day", "what date", "which day", "on what day", "what year", "when"),
+     re.compile(_TIME_PATTERN.pattern + "|" + _DATE_PATTERN.pattern, re.IGNORECASE), ["day", "date", "year"]),
+    (("where", "what place", "which place"), _PLACE_PATTERN, ["place"]),
+    (("how many", "how much", "how long", "how far", "how old"), _NUMBER_PATTERN, ["many", "much", "long", "far", "old"]),
+    (("who", "whom", "whose"), _NAME_PATTERN, ["person"]),
+    (("what", "which"), None, []),
+]
+_QUESTION_TYPES = [(prefixes, pattern, frozenset(stem(word) for word in replaced))
+                   for prefixes, pattern, replaced in _QUESTION_TYPES]
+
+def classify_question(question: str):
+    """
+    Returns (answer pattern, replaced words) for a factual question, or None if the
+    question needs reasoning or is not a simple wh-question.
+    """
+    normalized = " ".join(tokenize(question))
+    if any(token in _REASONING_WORDS for token in normalized.split()):
+        return None
+    for prefixes, pattern, replaced in _QUESTION_TYPES:
+        if any(normalized.startswith(prefix + " ") for prefix in prefixes):
+            return pattern, replaced
+    return None
+
+class ExtractiveAnswerer:
+    """
+    Answers factual questions with the best matching sentence from a testimony.
+
+    The confidence of an answer is the idf-weighted share of the question's
+    content words found in the sentence, halved when the sentence lacks the kind
+    of detail the question asks for (a time for "when", a number for "how many").
+    """
+    def __init__(self, testimony: str):
+        self.sentences = split_sentences(testimony)
+        self.index = PassageIndex(self.sentences)
+
+    def answer(self, question: str) -> tuple[str | None, float]:
+        """Returns (sentence, confidence), or (None, 0.0) if the question is not factual."""
+        question_type = classify_question(question)
+        if question_type is None or not self.sentences:
+            return None, 0.0
+        pattern, replaced = question_type
+
+        matches = self.index.search(question, top_k=3)
+        best_sentence, best_confidence = None, 0.0
+        for i, score in matches:
+            if score <= 0:
+                continue
+            sentence = self.sentences[i]
+            type_matches = pattern is None or bool(pattern.search(sentence))
+            question_tokens = set(content_tokens(question))
+            if type_matches:
+                question_tokens -= replaced
+            if not question_tokens:
+                continue
+            sentence_tokens = set(content_tokens(sentence))
+            weights = {token: self.index.idf(token) for token in question_tokens}
+            covered = sum(weight for token, weight in weights.items() if token in sentence_tokens)
+            confidence = covered / sum(weights.values())
+            if not type_matches:
+                confidence /= 2
+            if confidence > best_confidence:
+                best_sentence, best_confidence = sentence, confidence
+        return best_sentence, best_confidence
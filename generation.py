@@ -0,0 +1,87 @@
+# Generation profiles per call type (model, max output tokens, temperature) and the validation cascade
+import re
+import threading
+from dataclasses import dataclass
+from settings import GENERATION_PROFILES, GENERATION_CASCADE_ENABLED
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    escalate_to: str | None = None
+
+def _profile(name) -> GenerationProfile:
+    return GenerationProfile(name=name, **GENERATION_PROFILES[name])
+
+_profiles = {name: _profile(name) for name in GENERATION_PROFILES}
+
+def get_profile(call_type) -> GenerationProfile:
+    """The profile for a call type, or the default profile."""
+    return _profiles.get(call_type, _profiles["default"])
+
+def escalation_profile(profile: GenerationProfile):
+    """The profile a failed answer is retried with, or None if the cascade is off or ends here."""
+    if not GENERATION_CASCADE_ENABLED or not profile.escalate_to:
+        return None
+    return _profiles[profile.escalate_to]
+
+_VOTE_PATTERN = re.compile(r"^\s*vote:\s*(not guilty|guilty)\b", re.IGNORECASE | re.MULTILINE)
+_RULING_PATTERN = re.compile(r"\b(sustained|overruled)\b", re.IGNORECASE)
+_SCORE_PATTERNS = [re.compile(rf"{criterion}[^\n]*?\b(?:[1-9]|10)\b", re.IGNORECASE)
+                   for criterion in ("persuasiveness", "factual", "coherence")]
+
+# Checks for answers a cheap model gets wrong in ways the parsers downstream cannot recover from
+VALIDATORS = {
+    "juror_vote": lambda text: bool(_VOTE_PATTERN.search(text)),
+    "ruling": lambda text: bool(_RULING_PATTERN.search(text)),
+    "evaluation": lambda text: all(pattern.search(text) for pattern in _SCORE_PATTERNS),
+}
+
+def validate(call_type, response) -> bool:
+    """Whether the response is usable: non-empty, plus the call type's own check."""
+    if not response or not str(response).strip():
+        return False
+    validator = VALIDATORS.get(call_type)
+    return validator(str(response)) if validator else True
+
+class CascadeStats:
+    """Counts calls per call type that failed validation and were escalated to a larger profile."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}  # call type -> [calls, escalated, still invalid after escalating]
+
+    def record(self, call_type, escalated=False, still_invalid=False):
+        with self._lock:
+            counts = self._counts.setdefault(call_type, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += escalated
+            counts[2] += still_invalid
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {call_type: {"calls": calls, "escalated": escalated, "still_invalid": invalid,
+                                "escalation_rate": escalated / calls if calls else 0.0}
+                    for call_type, (calls, escalated, invalid) in self._counts.items()}
+
+cascade_stats = CascadeStats()
+
+def generate(call_type, run, model_override=None):
+    """
+    Runs run(profile) with the call type's profile and escalates once if the answer
+    fails validation. model_override (the QoS governor's cheap model) replaces the
+    profile's model and disables escalation, since the trial is shedding load.
+    """
+    profile = get_profile(call_type)
+    if model_override:
+        return run(GenerationProfile(profile.name, model_override, profile.max_tokens, profile.temperature))
+    response = run(profile)
+    escalated = escalation_profile(profile)
+    if escalated is None or validate(call_type, response):
+        cascade_stats.record(call_type)
+        return response
+    print(f"Warning: {call_type} answer from {profile.model} failed validation; retrying with {escalated.model}.")
+    response = run(escalated)
+    cascade_stats.record(call_type, escalated=True, still_invalid=not validate(call_type, response))
+    return response
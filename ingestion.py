@@ -0,0 +1,161 @@
+# Streaming ingestion of the legal documents into a vector index
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from settings import (INGEST_WORKERS, INGEST_BATCH_NODES, EMBED_BACKEND, EMBED_MODEL_NAME, EMBED_BATCH_SIZE,
+                      EMBED_WORKERS)
+from embeddings import EmbeddingCache, create_embedding_pool, embed_nodes
+
+def iter_document_files(directory, recursive=False, exclude=()):
+    """Yields the paths of the non-hidden files in directory, in sorted order, skipping names in exclude."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".")) if recursive else []
+        for name in sorted(files):
+            if not name.startswith(".") and name not in exclude:
+                yield os.path.join(root, name)
+
+def _load_file(path, metadata=None):
+    """Parses one file into LlamaIndex documents, adding metadata to each. Runs in a worker process."""
+    try:
+        from llama_index.core import SimpleDirectoryReader
+        documents = SimpleDirectoryReader(input_files=[path]).load_data()
+        for document in documents:
+            document.metadata.update(metadata or {})
+            # Tags filter shards; they are not part of the text that is embedded
+            document.excluded_embed_metadata_keys.extend(metadata or {})
+        return path, documents, None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def _file_documents(result, progress):
+    """The documents of a _load_file() result, counting the file in progress; [] if it was unreadable."""
+    path, documents, error = result
+    progress["files"] += 1
+    if error:
+        progress["skipped"] += 1
+        print(f"Warning: Skipping unreadable document {path}: {error}")
+        return []
+    return documents
+
+def iter_documents(paths, workers=INGEST_WORKERS, progress=None, metadata=None):
+    """
+    Yields the documents parsed from paths, any iterable of file paths, parsing files in parallel.
+
+    paths is read once into a list (paths are small; the documents are what is
+    streamed). At most 2 * workers files are parsed or waiting at a time, so
+    memory does not grow with the number of files. Unreadable files are reported
+    and skipped. progress, if given, is a dict whose "files" and "skipped" counts
+    are updated. metadata is added to every document.
+    """
+    paths = list(paths)
+    progress = progress if progress is not None else {}
+    progress.setdefault("files", 0)
+    progress.setdefault("skipped", 0)
+    if workers <= 1 or len(paths) <= 1:
+        # Not worth starting worker processes (small shards)
+        for path in paths:
+            yield from _file_documents(_load_file(path, metadata), progress)
+        return
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(_load_file, path, metadata))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append(pool.submit(_load_file, next_path, metadata))
+            yield from _file_documents(result, progress)
+
+def iter_nodes(documents, node_parser):
+    """Yields the chunks of each document as it arrives."""
+    for document in documents:
+        yield from node_parser.get_nodes_from_documents([document])
+
+def embed_missing(nodes, embed_model):
+    """Embeds the nodes that have no embedding yet, in one batch."""
+    from llama_index.core.schema import MetadataMode
+    missing = [node for node in nodes if node.embedding is None]
+    if missing:
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in missing]
+        for node, embedding in zip(missing, embed_model.get_text_embedding_batch(texts)):
+            node.embedding = embedding
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_embedded_batches(llama_index, paths, workers=INGEST_WORKERS, batch_nodes=INGEST_BATCH_NODES, metadata=None):
+    """
+    Yields the chunks of the files in paths (any iterable), embedded, batch_nodes at a time.
+
+    Files are parsed in parallel and chunked as they arrive. With the local
+    embedding backend, embeddings come from the chunk-hash cache or a shared pool
+    of embedding processes. Progress is printed after each batch.
+    """
+    paths = list(paths)  # Counted in the progress lines
+    embed_model = llama_index.Settings.embed_model
+    local = EMBED_BACKEND == "local" and getattr(embed_model, "model_name", None) == EMBED_MODEL_NAME
+    cache = EmbeddingCache(model_name=EMBED_MODEL_NAME) if local else None
+    embedding_pool = create_embedding_pool(workers=EMBED_WORKERS) if local and EMBED_WORKERS > 1 else None
+
+    start = time.perf_counter()
+    chunks = cached = 0
+    progress = {}
+    try:
+        nodes = iter_nodes(iter_documents(paths, workers, progress, metadata), llama_index.Settings.node_parser)
+        for batch in _batches(nodes, batch_nodes):
+            if local:
+                cached += embed_nodes(batch, embed_model, cache, EMBED_BATCH_SIZE, EMBED_WORKERS,
+                                      pool=embedding_pool, verbose=False)["cached"]
+            embed_missing(batch, embed_model)
+            yield batch
+            chunks += len(batch)
+            elapsed = time.perf_counter() - start
+            print(f"Indexed {chunks} chunks from {progress['files']}/{len(paths)} files in {elapsed:.1f}s "
+                  f"({chunks / elapsed:.1f} chunks/s" + (f", {cached} cached embeddings)" if local else ")"))
+    finally:
+        if embedding_pool is not None:
+            embedding_pool.shutdown()
+        if cache is not None:
+            cache.close()
+    if progress.get("skipped"):
+        print(f"Skipped {progress['skipped']} unreadable file(s).")
+
+def ingest_directory(llama_index, directory, recursive=False, workers=INGEST_WORKERS,
+                     batch_nodes=INGEST_BATCH_NODES, metadata=None, exclude=(), vector_store_factory=None):
+    """
+    Builds a VectorStoreIndex from the files in directory without loading the corpus into memory.
+
+    Chunks are embedded and inserted INGEST_BATCH_NODES at a time (see
+    iter_embedded_batches). metadata is attached to every chunk; file names in
+    exclude are skipped. vector_store_factory, if given, is called with the first
+    batch's embeddings and returns the vector store to use instead of the default.
+    Returns the index, or None if no chunks were produced.
+    """
+    paths = list(iter_document_files(directory, recursive, exclude))
+    if not paths:
+        return None
+    index = None
+    for batch in iter_embedded_batches(llama_index, paths, workers, batch_nodes, metadata):
+        if index is None and vector_store_factory is not None:
+            # The store is trained on the first batch
+            vector_store = vector_store_factory([node.embedding for node in batch])
+            storage_context = llama_index.StorageContext.from_defaults(vector_store=vector_store)
+            index = llama_index.VectorStoreIndex(batch, storage_context=storage_context)
+        elif index is None:
+            index = llama_index.VectorStoreIndex(batch)
+        else:
+            index.insert_nodes(batch)
+    return index
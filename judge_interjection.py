@@ -0,0 +1,69 @@
+# Decides whether the judge needs to speak after the prosecutor's turn, so the judge's
+# context call is only made when something procedural happened
+import re
+import threading
+from collections import Counter
+from settings import JUDGE_INTERJECTION_MODE, JUDGE_INTERJECTION_EVERY_ROUNDS, MAX_ROUNDS
+
+# Words that ask the court for a ruling or raise a point of procedure
+PROCEDURAL_PATTERN = re.compile(
+    r"\b(?:objection|object|motion|move to|strike|sidebar|approach the bench|recess|mistrial|"
+    r"admissib\w*|inadmissible|hearsay|contempt|sustained|overruled|leading|relevance|irrelevant|"
+    r"instruct\w*|sanction\w*|continuance|privilege\w*|stipulat\w*)\b",
+    re.IGNORECASE,
+)
+
+def interjection_triggers(statements, new_witnesses=0, new_evidence=0, round_number=0,
+                          every_rounds=JUDGE_INTERJECTION_EVERY_ROUNDS, max_rounds=MAX_ROUNDS) -> list[str]:
+    """
+    The reasons the judge should speak, or an empty list if nothing needs the court.
+
+    statements are what the other parties said since the judge last spoke; a witness
+    called or evidence presented in that time, every every_rounds-th round and the
+    last round also trigger the judge.
+    """
+    triggers = []
+    if any(PROCEDURAL_PATTERN.search(statement) for statement in statements):
+        triggers.append("procedural")
+    if new_witnesses:
+        triggers.append("witness")
+    if new_evidence:
+        triggers.append("evidence")
+    if every_rounds and round_number and round_number % every_rounds == 0:
+        triggers.append("milestone")
+    if max_rounds and round_number >= max_rounds:
+        triggers.append("final_round")
+    return triggers
+
+class InterjectionStats:
+    """
+    Counts prosecution rounds, judge calls made and skipped, the triggers that fired,
+    and the size of the history sent with the prosecutor's prompt, which grows with
+    every remark the judge adds to the record.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rounds = 0
+        self._judge_calls = 0
+        self._history_chars = 0
+        self._triggers = Counter()
+
+    def record(self, triggers, judge_called, history_chars):
+        with self._lock:
+            self._rounds += 1
+            self._judge_calls += judge_called
+            self._history_chars += history_chars
+            self._triggers.update(triggers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": JUDGE_INTERJECTION_MODE,
+                "rounds": self._rounds,
+                "judge_calls": self._judge_calls,
+                "calls_saved": self._rounds - self._judge_calls,
+                "triggers": dict(self._triggers),
+                "avg_history_chars": round(self._history_chars / self._rounds) if self._rounds else 0,
+            }
+
+interjection_stats = InterjectionStats()
@@ -2,8 +2,15 @@ import os
 import sys
 from dotenv import load_dotenv
 from settings import *
-from dialogue_manager import DialogueManager
+from dialogue_manager import DialogueManager, warm_up, get_document_shards
+from document_shards import parse_scope
+from tracing import tracer
+from resilience import resilient_caller
+from generation import cascade_stats
+from objection_filter import objection_filter
+from judge_interjection import interjection_stats
 import argparse
+import threading
 
 def clear_screen():
     """Clear the terminal screen."""
@@ -30,6 +37,7 @@ def print_help():
     print("  continue      - Continue to next round")
     print("  end           - End current trial")
     print("  settings      - Show current settings")
+    print("  stats         - Show latency percentiles per call type")
     print("  list witnesses- List available witnesses")
     print("  call <name>   - Call a witness to the stand")
     print("  examine <q>   - Ask the current witness a question (direct)")
@@ -45,6 +53,50 @@ def show_settings():
     print(f"  Max Rounds: {MAX_ROUNDS}")
     print(f"  Max Response Length: {MAX_RESPONSE_LENGTH}")
     print(f"  Default Model: {DEFAULT_MODEL}")
+    print(f"  Models by Call Type: " + ", ".join(
+        f"{name}={profile['model']} ({profile['max_tokens']} tokens)" for name, profile in GENERATION_PROFILES.items()))
+    print(f"  Jury Size: {JURY_SIZE} (max {JURY_MAX_DELIBERATION_ROUNDS} deliberation rounds)")
+    print("\n")
+
+def show_stats(dialogue_manager):
+    """Display latency percentiles and token usage per traced call type."""
+    stats = tracer.stats()
+    if not stats:
+        print("\nNo calls traced yet.\n")
+        return
+    print("\nCall Statistics:")
+    print(f"  {'Call type':<32} {'Count':>6} {'p50 ms':>9} {'p95 ms':>9} {'Errors':>7} {'Cache':>6} {'Tokens in/out':>15}")
+    for name in sorted(stats):
+        entry = stats[name]
+        tokens = f"{entry['avg_prompt_tokens']:.0f}/{entry['avg_completion_tokens']:.0f}"
+        print(f"  {name:<32} {entry['count']:>6} {entry['p50_ms']:>9.0f} {entry['p95_ms']:>9.0f} "
+              f"{entry['errors']:>7} {entry['cache_hits']:>6} {tokens:>15}")
+    calls = resilient_caller.stats()
+    print(f"\n  Model calls: {calls['calls']} ({calls['retries']} retries, {calls['timeouts']} timeouts, "
+          f"{calls['failures']} failed)")
+    print(f"  Hedged requests: {calls['hedges']} sent, {calls['hedge_wins']} answered first "
+          f"({calls['hedge_win_rate']:.0%})")
+    if calls['abandoned']:
+        print(f"  Abandoned attempts: {calls['abandoned']} ({calls['abandoned_running']} still running)")
+    escalations = {call_type: entry for call_type, entry in cascade_stats.stats().items() if entry["escalated"]}
+    if escalations:
+        print("  Escalated to a larger model after failing validation: " + ", ".join(
+            f"{call_type} {entry['escalated']}/{entry['calls']}" for call_type, entry in sorted(escalations.items())))
+    screened = objection_filter.stats()
+    if screened["statements"]:
+        print(f"  Objection filter ({screened['mode']}): {screened['skipped']}/{screened['statements']} defense "
+              f"statements skipped, {screened['calls_saved']} calls saved, estimated false-negative rate "
+              f"{screened['false_negative_rate']:.0%} ({screened['fn']} missed, {screened['sustained_fn']} sustained)")
+    interjections = interjection_stats.stats()
+    if interjections["rounds"]:
+        triggers = ", ".join(f"{name} {count}" for name, count in sorted(interjections["triggers"].items()))
+        print(f"  Judge interjections ({interjections['mode']}): {interjections['judge_calls']}/{interjections['rounds']} "
+              f"rounds, {interjections['calls_saved']} calls saved, average history sent {interjections['avg_history_chars']} "
+              f"chars" + (f" (triggers: {triggers})" if triggers else ""))
+    if dialogue_manager.trace_id:
+        print(f"\n  Current trace: {dialogue_manager.trace_id}")
+    if tracer.enabled:
+        print(f"  Spans are written to {tracer.path}")
     print("\n")
 
 def show_witnesses(dialogue_manager):
@@ -87,6 +139,29 @@ def show_status(dialogue_manager):
     if status['active']:
         print(f"  Current Round: {status['current_round']}/{status['max_rounds']}")
         print(f"  Case Context: {status['case_context']}")
+    cache = status['answer_cache']
+    print(f"  Witness Answer Cache: {cache['hits']} hits, {cache['near_hits']} near hits, "
+          f"{cache['misses']} misses ({cache['entries']} entries)")
+    allocations = status['allocations']
+    print(f"  Agent Objects: {allocations['agent_instances']} agents, {allocations['crews_created']} CrewAI crews created "
+          f"({allocations['reuses']}/{allocations['leases']} calls reused a pooled crew)")
+    if status['active']:
+        qos = status['qos']
+        print(f"  Quality of Service: {qos['level']} ({len(qos['decisions'])} changes this trial)")
+        if status['document_shards']:
+            print(f"  Document Shards: {', '.join(status['document_shards'])}"
+                  + (f" (scope: {status['scope']})" if status['scope'] else ""))
+        retrieval = status['retrieval']
+        if retrieval:
+            timing = ""
+            if retrieval['working_set_ms'] is not None and retrieval['full_index_ms'] is not None:
+                timing = f", {retrieval['working_set_ms']:.0f} ms vs {retrieval['full_index_ms']:.0f} ms on the full index"
+            print(f"  Retrieval Working Set: {retrieval['chunks']} chunks, {retrieval['fallbacks']}/{retrieval['queries']} "
+                  f"queries fell back to the full index ({retrieval['fallback_rate']:.0%}){timing}")
+        sources = status['answer_sources']
+        print(f"  Witness Answers: {sources['extractive']} extractive, {sources['cache']} cached, {sources['llm']} LLM")
+        events = status['events']
+        print(f"  Trial Record: {events['events']} events, {events['memory_kb']:.0f} KB")
     print("\n")
 
 def start_trial(dialogue_manager):
@@ -116,6 +191,9 @@ def start_trial(dialogue_manager):
     except AttributeError: # Keep original handler just in case
         print("\nWarning: Could not check LlamaIndex settings (AttributeError).")
     # --- End Reminder --- 
+
+    # Start opening instructions and document indexing while the case is typed
+    dialogue_manager.precompute_trial_setup()
     
     print("\nEnter case description (press Enter twice to finish):")
     case_lines = []
@@ -133,6 +211,16 @@ def start_trial(dialogue_manager):
     if not case_context:
         print("\nCase description cannot be empty.\n")
         return
+    dialogue_manager.precompute_case(case_context)
+
+    # Limit document queries to the shards that apply to this case
+    scope = None
+    shards = get_document_shards() if USE_LLAMA_INDEX else {}
+    if len(shards) > 1:
+        print(f"\nDocument shards: {', '.join(sorted(shards))}")
+        print("Enter document scope (e.g. 'jurisdiction=CA, case_type=criminal' or a shard name; blank for all):")
+        scope = parse_scope(input())
+    dialogue_manager.precompute_scope(scope)
 
     # Collect witnesses
     witnesses_data = {}
@@ -161,6 +249,7 @@ def start_trial(dialogue_manager):
         testimony = "\n".join(testimony_lines).strip()
         if testimony:
             witnesses_data[name] = testimony
+            dialogue_manager.precompute_witness(name, testimony)
             print(f"Witness '{name}' added.")
         else:
             print(f"No testimony provided for {name}. Witness not added.")
@@ -208,7 +297,7 @@ def start_trial(dialogue_manager):
 
     print("\nStarting new trial...")
     # Pass witnesses and evidence to the dialogue manager
-    instructions = dialogue_manager.start_trial(case_context, witnesses_data, evidence_data)
+    instructions = dialogue_manager.start_trial(case_context, witnesses_data, evidence_data, scope)
     print("\nJudge's Opening Instructions:")
     print("-" * 80)
     print(instructions)
@@ -299,6 +388,15 @@ def end_trial(dialogue_manager):
     print("-" * 80)
     print(result["verdict"])
     print("-" * 80)
+
+    sources = result.get("answer_sources")
+    if sources and sum(sources.values()):
+        print(f"\nWitness Answers: {sources['extractive']} extractive (local), {sources['cache']} cached, "
+              f"{sources['llm']} LLM")
+    precompute = result.get("precompute")
+    if precompute and precompute["submitted"]:
+        print(f"Precomputed While Typing: {precompute['hits']} used, {precompute['wasted']} wasted "
+              f"(hit rate {precompute['hit_rate']:.0%}, waste rate {precompute['waste_rate']:.0%})")
     
     # --- Display User Performance Evaluation ---
     print("\nYour Performance Evaluation:")
@@ -355,10 +453,16 @@ def main():
     
     # Print initial header
     print_header()
+
+    # Load crewai, openai and llama_index while the user reads the prompt
+    if STARTUP_WARMUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
     
     # Main command loop
     while True:
         try:
+            # Use the time spent waiting for the next command
+            dialogue_manager.precompute_idle_work()
             raw_command = input("courtroom> ").strip()
             if not raw_command: continue # Skip empty input
 
@@ -370,6 +474,7 @@ def main():
             # Match based on the lowercased command verb
             if command_verb == 'exit':
                 print("\nThank you for using Courtroom Simulator AI. Goodbye!")
+                dialogue_manager.precompute.shutdown()
                 break
             elif command_verb == 'help':
                 print_help()
@@ -380,6 +485,8 @@ def main():
                 show_settings()
             elif command_verb == 'status':
                 show_status(dialogue_manager)
+            elif command_verb == 'stats':
+                show_stats(dialogue_manager)
             elif command_verb == 'start':
                 start_trial(dialogue_manager)
             elif command_verb == 'defense':
@@ -445,6 +552,7 @@ def main():
                 
         except KeyboardInterrupt:
             print("\n\nThank you for using Courtroom Simulator AI. Goodbye!")
+            dialogue_manager.precompute.shutdown()
             break
         except Exception as e:
             print(f"\nError: {str(e)}\n")
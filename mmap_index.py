@@ -0,0 +1,289 @@
+# Read-only, memory-mapped document index: vectors, BM25 postings and chunk text in flat files.
+# Imported on first use: importing it imports LlamaIndex and numpy.
+#
+# Every array is opened with mmap, so the pages live in the OS page cache and
+# worker processes on the same host (including the zygote's forked children)
+# share one physical copy instead of each loading the index into its own heap.
+import bisect
+import json
+import math
+import os
+import shutil
+import numpy as np
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle, TextNode
+from settings import MMAP_INDEX_DIR, MMAP_LEXICAL_WEIGHT, INGEST_WORKERS, DOCS_MANIFEST_FILE, WORKING_SET_TOP_K
+from document_shards import shard_fingerprint
+from ingestion import iter_document_files, iter_embedded_batches
+from text_utils import content_tokens
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def shard_index_dir(shard_name):
+    return os.path.join(MMAP_INDEX_DIR, shard_name.replace("/", "__"))
+
+def index_fingerprint(shard, embed_model_name) -> str:
+    """Changes whenever the shard's files, tags, embedding model or the file format change."""
+    return shard_fingerprint(shard, embed_model_name, FORMAT_VERSION)
+
+def _write_strings(directory, name, strings):
+    """Writes UTF-8 strings back to back to <name>.bin, with their byte offsets in <name>_offsets.npy."""
+    offsets = [0]
+    with open(os.path.join(directory, f"{name}.bin"), "wb") as f:
+        for string in strings:
+            data = string.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(os.path.join(directory, f"{name}_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+class MmapIndexWriter:
+    """
+    Writes an index in the memory-mapped format, one batch of embedded chunks at a time.
+
+    Vectors and chunk text are streamed to disk as batches arrive; only the
+    postings (term -> chunk ids and term frequencies) are held in memory until
+    close(). Files are written to a temporary directory that replaces the target
+    directory on close, so readers never see a half-written index.
+    """
+    def __init__(self, directory, fingerprint, embed_model_name=None):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.embed_model_name = embed_model_name
+        self._tmp = directory + ".tmp"
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._vectors = open(os.path.join(self._tmp, "vectors.f32"), "wb")
+        self._texts = []
+        self._metadata = []
+        self._lengths = []
+        self._postings = {}  # term -> ([chunk ids], [term frequencies])
+        self.count = 0
+        self.dimension = None
+
+    def add(self, nodes):
+        """Appends embedded chunks (LlamaIndex nodes)."""
+        vectors = np.asarray([node.embedding for node in nodes], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        self._vectors.write(vectors.tobytes())
+        for node in nodes:
+            text = node.get_content(metadata_mode=MetadataMode.NONE)
+            self._texts.append(text)
+            self._metadata.append(json.dumps({
+                "metadata": node.metadata,
+                "excluded_embed_metadata_keys": node.excluded_embed_metadata_keys,
+                "excluded_llm_metadata_keys": node.excluded_llm_metadata_keys,
+            }, default=str))
+            counts = {}
+            for token in content_tokens(text):
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                docs, tfs = self._postings.setdefault(token, ([], []))
+                docs.append(self.count)
+                tfs.append(tf)
+            self._lengths.append(sum(counts.values()))
+            self.count += 1
+
+    def abort(self):
+        """Discards what was written so far."""
+        self._vectors.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def close(self) -> int:
+        """Writes the text, postings and manifest and moves the index into place. Returns the chunk count."""
+        self._vectors.close()
+        if not self.count:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            return 0
+        _write_strings(self._tmp, "text", self._texts)
+        _write_strings(self._tmp, "metadata", self._metadata)
+        np.save(os.path.join(self._tmp, "doc_lengths.npy"), np.asarray(self._lengths, dtype=np.int32))
+        terms = sorted(self._postings)
+        _write_strings(self._tmp, "terms", terms)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[term][0]) for term in terms])
+        np.save(os.path.join(self._tmp, "postings_offsets.npy"), offsets)
+        docs = [np.asarray(self._postings[term][0], dtype=np.int32) for term in terms]
+        tfs = [np.minimum(self._postings[term][1], 65535).astype(np.uint16) for term in terms]
+        np.save(os.path.join(self._tmp, "postings_docs.npy"), np.concatenate(docs or [np.zeros(0, np.int32)]))
+        np.save(os.path.join(self._tmp, "postings_tf.npy"), np.concatenate(tfs or [np.zeros(0, np.uint16)]))
+        # The manifest is written last: an index without one is incomplete
+        with open(os.path.join(self._tmp, MANIFEST_FILE), "w") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "embed_model": self.embed_model_name,
+                "count": self.count,
+                "dimension": self.dimension,
+                "average_length": sum(self._lengths) / self.count,
+            }, f)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self._tmp, self.directory)
+        return self.count
+
+class _Strings:
+    """Read-only sequence view of a strings file written by _write_strings (decodes on access)."""
+    def __init__(self, directory, name):
+        self._offsets = np.load(os.path.join(directory, f"{name}_offsets.npy"), mmap_mode="r")
+        path = os.path.join(directory, f"{name}.bin")
+        # mmap cannot map an empty file
+        self._data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._data[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+class MmapIndex:
+    """
+    A shard index opened from the memory-mapped files written by MmapIndexWriter.
+
+    Nothing is copied into the process at open time: searches scan the mapped
+    vectors and postings, and only the text of the chunks returned is decoded.
+    """
+    def __init__(self, directory):
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.directory = directory
+        self.count = self.manifest["count"]
+        self.vectors = np.memmap(os.path.join(directory, "vectors.f32"), dtype=np.float32, mode="r",
+                                 shape=(self.count, self.manifest["dimension"]))
+        self._texts = _Strings(directory, "text")
+        self._metadata = _Strings(directory, "metadata")
+        self._terms = _Strings(directory, "terms")
+        self._lengths = np.load(os.path.join(directory, "doc_lengths.npy"), mmap_mode="r")
+        self._postings_offsets = np.load(os.path.join(directory, "postings_offsets.npy"), mmap_mode="r")
+        self._postings_docs = np.load(os.path.join(directory, "postings_docs.npy"), mmap_mode="r")
+        self._postings_tf = np.load(os.path.join(directory, "postings_tf.npy"), mmap_mode="r")
+
+    def text(self, i) -> str:
+        return self._texts[i]
+
+    def metadata(self, i) -> dict:
+        return json.loads(self._metadata[i])
+
+    def _postings(self, term):
+        """(chunk ids, term frequencies) of the term, or None if no chunk contains it."""
+        i = bisect.bisect_left(self._terms, term)
+        if i == len(self._terms) or self._terms[i] != term:
+            return None
+        start, end = self._postings_offsets[i], self._postings_offsets[i + 1]
+        return self._postings_docs[start:end], self._postings_tf[start:end]
+
+    def bm25_scores(self, query_text) -> np.ndarray:
+        """BM25 score of every chunk for the query (same weighting as text_utils.PassageIndex)."""
+        scores = np.zeros(self.count, dtype=np.float32)
+        average_length = self.manifest["average_length"] or 1
+        for term in set(content_tokens(query_text)):
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            docs, tf = postings
+            idf = math.log(1 + (self.count - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = tf.astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[docs] / average_length)
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query_text, query_vector, top_k, lexical_weight=MMAP_LEXICAL_WEIGHT):
+        """
+        Returns [(chunk id, score)] for the top_k chunks, best first.
+
+        The score is (1 - lexical_weight) * cosine similarity + lexical_weight *
+        BM25 scaled so the best chunk scores 1.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.vectors @ (query / (np.linalg.norm(query) or 1))
+        if lexical_weight and query_text:
+            lexical = self.bm25_scores(query_text)
+            best = lexical.max()
+            scores = (1 - lexical_weight) * scores + (lexical_weight * lexical / best if best > 0 else 0)
+        top_k = min(top_k, self.count)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+class _VectorStoreView:
+    """Answers vector_store.get(node_id) from the mapped vectors, as the working set expects."""
+    def __init__(self, shard_index):
+        self._shard_index = shard_index
+
+    def get(self, node_id):
+        return self._shard_index.index.vectors[self._shard_index.chunk_id(node_id)].tolist()
+
+class MmapRetriever(BaseRetriever):
+    """Retrieves from one memory-mapped shard, building nodes only for the chunks returned."""
+    def __init__(self, shard_index, similarity_top_k=WORKING_SET_TOP_K):
+        super().__init__()
+        self._shard_index = shard_index
+        self._embed_model = shard_index.embed_model
+        self.similarity_top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle: QueryBundle):
+        embedding = query_bundle.embedding
+        if embedding is None:
+            embedding = self._embed_model.get_query_embedding(query_bundle.query_str)
+        return [NodeWithScore(node=self._shard_index.node(i), score=score)
+                for i, score in self._shard_index.index.search(query_bundle.query_str, embedding,
+                                                               self.similarity_top_k)]
+
+class MmapShardIndex:
+    """
+    Wraps an MmapIndex in the parts of the VectorStoreIndex interface the trial
+    uses: as_retriever(), as_query_engine() and vector_store.get().
+    """
+    def __init__(self, name, index, embed_model):
+        self.name = name
+        self.index = index
+        self.embed_model = embed_model
+        self.vector_store = _VectorStoreView(self)
+
+    def node_id(self, i) -> str:
+        return f"{self.name}:{i}"
+
+    def chunk_id(self, node_id) -> int:
+        return int(node_id.rsplit(":", 1)[1])
+
+    def node(self, i) -> TextNode:
+        record = self.index.metadata(i)
+        return TextNode(id_=self.node_id(i), text=self.index.text(i), metadata=record["metadata"],
+                        excluded_embed_metadata_keys=record["excluded_embed_metadata_keys"],
+                        excluded_llm_metadata_keys=record["excluded_llm_metadata_keys"])
+
+    def as_retriever(self, similarity_top_k=WORKING_SET_TOP_K, **kwargs):
+        return MmapRetriever(self, similarity_top_k)
+
+    def as_query_engine(self, similarity_top_k=WORKING_SET_TOP_K, **kwargs):
+        return RetrieverQueryEngine.from_args(self.as_retriever(similarity_top_k), **kwargs)
+
+def load_index(llama_index, shard, directory, fingerprint):
+    """Opens the shard's index if it was built for this fingerprint, else None."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if manifest.get("fingerprint") != fingerprint or manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return MmapShardIndex(shard.name, MmapIndex(directory), llama_index.Settings.embed_model)
+
+def build_index(llama_index, shard, directory, fingerprint, workers=INGEST_WORKERS):
+    """Parses, chunks and embeds the shard's files into the memory-mapped format. Returns the chunk count."""
+    paths = list(iter_document_files(shard.path, exclude={DOCS_MANIFEST_FILE}))
+    if not paths:
+        return 0
+    writer = MmapIndexWriter(directory, fingerprint, getattr(llama_index.Settings.embed_model, "model_name", None))
+    try:
+        for batch in iter_embedded_batches(llama_index, paths, workers, metadata=shard.metadata):
+            writer.add(batch)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
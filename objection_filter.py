@@ -0,0 +1,175 @@
+# Pre-filter that decides whether a defense statement could plausibly draw an objection,
+# so the objection and ruling calls are skipped for statements the prosecutor would let pass
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from settings import OBJECTION_FILTER_MODE, OBJECTION_FILTER_THRESHOLD, OBJECTION_FILTER_AUDIT_RATE
+from text_utils import content_tokens, split_sentences
+from tracing import propagate
+
+# (grounds, pattern, weight): phrasing that commonly draws an objection
+_CUES = [
+    ("hearsay", re.compile(r"\b(?:said|told|heard|says|according to|mentioned|claimed|rumou?r)\b|[\"“]", re.IGNORECASE), 1.0),
+    ("speculation", re.compile(r"\b(?:probably|must have|might have|could have|would have|maybe|perhaps|"
+                               r"likely|guess|presumably|surely)\b", re.IGNORECASE), 1.0),
+    ("argumentative", re.compile(r"\b(?:obviously|clearly|liar|lying|lied|ridiculous|absurd|admit it|"
+                                 r"isn't it true|wasn't it|didn't you)\b", re.IGNORECASE), 1.0),
+    ("character", re.compile(r"\b(?:always|never|reputation|record|history of|kind of person|"
+                             r"known for|criminal|violent|honest person)\b", re.IGNORECASE), 0.75),
+    ("opinion", re.compile(r"\b(?:i believe|i think|i feel|in my opinion|i'm sure|i am sure|trust me)\b",
+                           re.IGNORECASE), 0.75),
+    ("leading", re.compile(r"\b(?:isn't that right|correct\?|right\?|wouldn't you agree)", re.IGNORECASE), 0.75),
+]
+_EXHIBIT_PATTERN = re.compile(r"\b(?:exhibit|evidence)\s+([A-Za-z0-9_-]+)", re.IGNORECASE)
+_DETAIL_PATTERN = re.compile(r"\b(?:\d[\d:.,/]*|[A-Z][a-z]+)\b")
+_NARRATIVE_SENTENCES = 6  # Statements this long tend to be narrative, which draws objections on its own
+
+@dataclass
+class ScreenResult:
+    """The pre-filter's decision on one defense statement."""
+    plausible: bool
+    score: float
+    reasons: list = field(default_factory=list)
+
+def _details(text) -> set:
+    """Numbers and capitalized words (names, places, dates) that are not the first word of a sentence."""
+    details = set()
+    for sentence in split_sentences(text):
+        details.update(match.lower() for match in _DETAIL_PATTERN.findall(sentence)[1:]
+                       if match[:1].isdigit() or len(match) > 2)
+        first = _DETAIL_PATTERN.match(sentence)
+        if first and first.group()[:1].isdigit():
+            details.add(first.group())
+    return details
+
+def screen(statement, known_text="", exhibits=(), presented=(), threshold=OBJECTION_FILTER_THRESHOLD) -> ScreenResult:
+    """
+    Scores a defense statement for objectionable phrasing with local heuristics.
+
+    known_text is everything already on the record (case description, history,
+    evidence descriptions): names, numbers and dates absent from it are new facts
+    not in evidence. Exhibits that exist but were not presented count as well.
+    """
+    score, reasons = 0.0, []
+    for grounds, pattern, weight in _CUES:
+        hits = len(pattern.findall(statement))
+        if hits:
+            score += weight * min(hits, 2)
+            reasons.append(grounds)
+
+    known_lower = known_text.lower()
+    known_tokens = set(content_tokens(known_text))
+    new_details = [detail for detail in _details(statement)
+                   if detail not in known_lower and (content_tokens(detail) or [""])[0] not in known_tokens]
+    if new_details:
+        score += min(len(new_details), 3) * 0.5
+        reasons.append("facts not in evidence")
+
+    exhibits_lower = {exhibit.lower(): exhibit for exhibit in exhibits}
+    unpresented = {exhibits_lower[name.lower()] for name in _EXHIBIT_PATTERN.findall(statement)
+                   if name.lower() in exhibits_lower} - set(presented)
+    if unpresented:
+        score += 1.0
+        reasons.append("unpresented evidence")
+
+    if statement.count("?") >= 2:
+        score += 0.5
+        reasons.append("compound question")
+    if len(split_sentences(statement)) >= _NARRATIVE_SENTENCES:
+        score += 0.5
+        reasons.append("narrative")
+    return ScreenResult(plausible=score >= threshold, score=score, reasons=reasons)
+
+def ruling_sustained(ruling) -> bool:
+    """Whether the judge's ruling text sustains the objection."""
+    return bool(ruling) and "sustain" in str(ruling).lower() and "overrule" not in str(ruling).lower()
+
+class ObjectionFilter:
+    """
+    Gates the prosecutor's objection call on screen().
+
+    In "on" mode, statements screened as implausible skip the objection and the
+    ruling. A sample of them (audit_rate) still runs through the full path in the
+    background, which estimates the false-negative rate: the share of objections
+    the full path would have raised that the filter skipped. "shadow" always takes
+    the full path and compares each outcome with the filter's decision; "off"
+    disables the filter.
+    """
+    def __init__(self, mode=OBJECTION_FILTER_MODE, threshold=OBJECTION_FILTER_THRESHOLD,
+                 audit_rate=OBJECTION_FILTER_AUDIT_RATE, seed=None):
+        self.mode = mode
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = dict(statements=0, skipped=0, audited=0, tp=0, fp=0, fn=0, tn=0, sustained_fn=0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("on", "shadow")
+
+    def screen(self, statement, known_text="", exhibits=(), presented=()) -> ScreenResult:
+        result = screen(statement, known_text, exhibits, presented, self.threshold)
+        with self._lock:
+            self._counts["statements"] += 1
+        return result
+
+    def should_skip(self, result: ScreenResult) -> bool:
+        """Whether to skip the objection and ruling calls for a screened statement."""
+        skip = self.mode == "on" and not result.plausible
+        if skip:
+            with self._lock:
+                self._counts["skipped"] += 1
+        return skip
+
+    def record(self, result: ScreenResult, objected, sustained=False):
+        """Records what the full path did with a statement the filter screened."""
+        with self._lock:
+            if result.plausible:
+                self._counts["tp" if objected else "fp"] += 1
+            else:
+                self._counts["fn" if objected else "tn"] += 1
+                self._counts["sustained_fn"] += bool(objected and sustained)
+
+    def audit(self, result: ScreenResult, full_path):
+        """
+        Runs full_path() -> (objected, sustained) for a sample of skipped statements in
+        a background thread. Its outcome only feeds the statistics, never the trial.
+        """
+        if self._random.random() >= self.audit_rate:
+            return None
+        with self._lock:
+            self._counts["audited"] += 1
+
+        def run():
+            try:
+                objected, sustained = full_path()
+            except Exception as e:
+                print(f"Warning: Objection filter audit failed: {e}")
+                return
+            self.record(result, objected, sustained)
+
+        # The audit's agent calls are traced under the trial that skipped the statement
+        thread = threading.Thread(target=propagate(run), name="objection-audit", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        # In "on" mode only the audited sample of skipped statements has an outcome,
+        # so misses are scaled up to every skipped statement
+        checked = counts["fn"] + counts["tn"]
+        scale = counts["skipped"] / checked if self.mode == "on" and checked else 1.0
+        estimated_fn = counts["fn"] * scale
+        objections = estimated_fn + counts["tp"]
+        return {
+            "mode": self.mode,
+            **counts,
+            "calls_saved": 2 * (counts["skipped"] - counts["audited"]),
+            "skip_rate": counts["skipped"] / counts["statements"] if counts["statements"] else 0.0,
+            "false_negative_rate": estimated_fn / objections if objections else 0.0,
+        }
+
+objection_filter = ObjectionFilter()
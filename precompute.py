@@ -0,0 +1,101 @@
+# Speculative background work that runs while the REPL waits for user input
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from settings import PRECOMPUTE_ENABLED, PRECOMPUTE_MAX_WORKERS
+from tracing import propagate
+
+class PrecomputeEngine:
+    """
+    Runs work that does not depend on pending user input in background threads.
+
+    Work is submitted under a key while the user is typing. When the command that
+    needs it arrives, take() returns the precomputed result, waiting for it if it
+    is still running, or computes it inline if it was never submitted. Results
+    that are never taken count as wasted when the engine is reset.
+    """
+    def __init__(self, enabled=PRECOMPUTE_ENABLED, max_workers=PRECOMPUTE_MAX_WORKERS):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.cancelled = 0
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Starts fn(*args, **kwargs) in the background unless the key is already scheduled."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._futures:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="precompute")
+            # Background work is traced under the trial that scheduled it
+            self._futures[key] = self._executor.submit(propagate(fn), *args, **kwargs)
+            self.submitted += 1
+
+    def take(self, key, fn, *args, **kwargs):
+        """
+        Returns the result for the key, computing it inline if it was not precomputed.
+
+        A precomputed call that failed is retried inline so errors surface as usual.
+        """
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is not None and not future.cancelled():
+            try:
+                result = future.result()
+                self.hits += 1
+                return result
+            except Exception as e:
+                print(f"Precomputed '{key}' failed ({e}); computing it now.")
+        self.misses += 1
+        return fn(*args, **kwargs)
+
+    def has(self, key) -> bool:
+        """Whether the key is scheduled and not yet taken."""
+        with self._lock:
+            return key in self._futures
+
+    def cancel(self, key):
+        """Cancels one scheduled key. Work that already started runs to completion and is wasted."""
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is not None:
+            self._discard(future)
+
+    def reset(self):
+        """Cancels everything still scheduled, counting it as wasted or cancelled."""
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            self._discard(future)
+
+    def _discard(self, future):
+        if future.cancel():
+            self.cancelled += 1
+        else:
+            self.wasted += 1
+
+    def shutdown(self):
+        """Cancels pending work and stops the worker threads."""
+        self.reset()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Hit and waste rates of the precomputed work."""
+        return {
+            "submitted": self.submitted,
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted": self.wasted,
+            "cancelled": self.cancelled,
+            "hit_rate": self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+            "waste_rate": self.wasted / self.submitted if self.submitted else 0.0,
+        }
@@ -0,0 +1,92 @@
+# Per-trial quality-of-service governor for interactive turn latency
+import time
+from collections import deque
+from settings import (QOS_ENABLED, TURN_LATENCY_SLO_MS, QOS_WINDOW, QOS_MIN_SAMPLES, QOS_RECOVERY_RATIO,
+                      QOS_SHORT_HISTORY_ENTRIES, QOS_CHEAP_MODEL)
+from tracing import tracer, percentile
+
+# Each level keeps the degradations of the levels before it
+DEGRADATION_LEVELS = [
+    "normal",
+    "skip_document_queries",
+    "short_history",
+    "cheap_model",
+    "defer_evaluation",
+]
+
+class QoSGovernor:
+    """
+    Tracks recent turn latency against the SLO and degrades one step at a time.
+
+    After every QOS_MIN_SAMPLES turns at the current level, the p95 of the recent
+    turns is compared with the SLO: above it the governor moves one level down the
+    DEGRADATION_LEVELS list, below QOS_RECOVERY_RATIO of it one level back up.
+    Every decision is printed, kept in decisions and recorded as a trace span.
+    """
+    def __init__(self, slo_ms=TURN_LATENCY_SLO_MS, enabled=QOS_ENABLED, window=QOS_WINDOW,
+                 min_samples=QOS_MIN_SAMPLES, recovery_ratio=QOS_RECOVERY_RATIO):
+        self.slo_ms = slo_ms
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.recovery_ratio = recovery_ratio
+        self.level = 0
+        self.latencies = deque(maxlen=window)
+        self.decisions = []
+
+    def reset(self):
+        """Back to full quality for a new trial."""
+        self.level = 0
+        self.latencies.clear()
+        self.decisions = []
+
+    @property
+    def level_name(self) -> str:
+        return DEGRADATION_LEVELS[self.level]
+
+    @property
+    def skip_document_queries(self) -> bool:
+        return self.level >= 1
+
+    @property
+    def history_window(self) -> int | None:
+        """Number of recent history entries to send, or None for the full history."""
+        return QOS_SHORT_HISTORY_ENTRIES if self.level >= 2 else None
+
+    @property
+    def model_override(self) -> str | None:
+        return QOS_CHEAP_MODEL if self.level >= 3 else None
+
+    @property
+    def defer_evaluation(self) -> bool:
+        return self.level >= 4
+
+    def record(self, latency_ms: float, turn: str = "turn"):
+        """Records a turn's latency and changes level if the SLO calls for it."""
+        if not self.enabled:
+            return
+        self.latencies.append(latency_ms)
+        if len(self.latencies) < self.min_samples:
+            return
+        p95 = percentile(self.latencies, 95)
+        if p95 > self.slo_ms and self.level < len(DEGRADATION_LEVELS) - 1:
+            self._change(self.level + 1, f"p95 {p95:.0f} ms over the {self.slo_ms} ms SLO after {turn}")
+        elif p95 < self.slo_ms * self.recovery_ratio and self.level > 0:
+            self._change(self.level - 1, f"p95 {p95:.0f} ms back under {self.slo_ms * self.recovery_ratio:.0f} ms")
+
+    def _change(self, level: int, reason: str):
+        previous = self.level_name
+        self.level = level
+        # Judge the new level on its own latencies
+        self.latencies.clear()
+        action = "degrade" if DEGRADATION_LEVELS.index(previous) < level else "recover"
+        decision = {
+            "time": time.time(),
+            "action": action,
+            "from": previous,
+            "to": self.level_name,
+            "reason": reason,
+        }
+        self.decisions.append(decision)
+        with tracer.span(f"qos.{action}", **{key: decision[key] for key in ("from", "to", "reason")}):
+            pass
+        print(f"[QoS] {action.title()}: {previous} -> {self.level_name} ({reason})")
@@ -0,0 +1,229 @@
+# Deadlines, retries and hedged requests for model calls
+import contextvars
+import functools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from settings import (CALL_DEADLINES_S, RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_S, HEDGE_ENABLED, HEDGE_MIN_SAMPLES,
+                      RESILIENCE_MAX_WORKERS, RESILIENCE_MAX_IN_FLIGHT)
+from tracing import tracer, propagate
+
+# Absolute time.monotonic() by which the current turn must finish, or None
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call, or the turn it belongs to, runs out of time."""
+
+@contextmanager
+def deadline(seconds):
+    """Limits everything in the block to seconds from now, or to the enclosing deadline if it is sooner."""
+    current = _deadline.get()
+    new = time.monotonic() + seconds
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining():
+    """Seconds left before the current deadline, or None if there is none."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+# Exception class names (OpenAI and LiteLLM, which CrewAI calls through) for transient failures
+_TRANSIENT_ERRORS = frozenset(["APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+                               "ServiceUnavailableError", "Timeout", "ConnectError", "ReadTimeout"])
+
+def is_retryable(error) -> bool:
+    """
+    Whether a failed attempt may succeed if repeated: timeouts, connection errors,
+    rate limits (429) and server errors (5xx). Authentication, bad requests and
+    programming errors fail the same way every time and are raised at once.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+def call_deadline(call_type) -> float:
+    """The configured deadline of one attempt of a call type, in seconds."""
+    return CALL_DEADLINES_S.get(call_type, CALL_DEADLINES_S["default"])
+
+def _run_within(seconds, fn):
+    # Inside the attempt, remaining() is the attempt's budget, for clients that take a timeout
+    with deadline(seconds):
+        return fn()
+
+def with_deadline(seconds):
+    """Method decorator that runs the call under deadline(seconds)."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with deadline(seconds):
+                return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class ResilientCaller:
+    """
+    Runs model calls with a deadline, bounded retries and an optional hedge.
+
+    Each attempt gets the call type's deadline from CALL_DEADLINES_S, cut short by
+    the enclosing turn deadline. Attempts that time out or fail with a transient
+    error (is_retryable) are retried with full-jitter exponential backoff while
+    time remains; other errors are raised at once. Once a call type has
+    HEDGE_MIN_SAMPLES traced calls, an attempt still running after the observed
+    p95 gets a duplicate request and whichever answers first is used.
+
+    Attempts run in worker threads, which cannot be stopped. A timed-out attempt
+    keeps running and may still answer the retry; a call never has more than
+    max_in_flight attempts running, so a hung provider cannot fill the shared
+    pool with dead calls. Attempts still running when the call gives up are
+    abandoned and counted in stats().
+    """
+    def __init__(self, deadlines=CALL_DEADLINES_S, max_attempts=RETRY_MAX_ATTEMPTS, backoff_s=RETRY_BACKOFF_S,
+                 hedge=HEDGE_ENABLED, hedge_min_samples=HEDGE_MIN_SAMPLES, max_workers=RESILIENCE_MAX_WORKERS,
+                 max_in_flight=RESILIENCE_MAX_IN_FLIGHT):
+        self.deadlines = deadlines
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._executor = None
+        self._lock = threading.Lock()
+        self._abandoned_running = set()
+        self.abandoned = 0
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def call(self, call_type, fn, span_name=None):
+        """
+        Returns fn() for a call of the given type.
+
+        span_name is the traced span whose p95 sets the hedge delay (default
+        "llm.<call_type>"). Raises DeadlineExceeded, or the last error, once the
+        attempts or the time run out.
+        """
+        with self._lock:
+            self.calls += 1
+        in_flight = set()  # This call's attempts still running, timed-out ones included
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                budget = self._budget(call_type)
+                try:
+                    if budget <= 0:
+                        raise DeadlineExceeded(f"No time left for the {call_type} call")
+                    return self._attempt(call_type, fn, budget, span_name or f"llm.{call_type}", in_flight)
+                except Exception as e:
+                    delay = random.uniform(0, self.backoff_s * 2 ** (attempt - 1))
+                    left = remaining()
+                    if (not is_retryable(e) or attempt >= self.max_attempts
+                            or (left is not None and left <= delay)):
+                        with self._lock:
+                            self.failures += 1
+                        raise
+                    with self._lock:
+                        self.retries += 1
+                    print(f"Retrying {call_type} call in {delay:.1f}s after {type(e).__name__}: {e}")
+                    time.sleep(delay)
+        finally:
+            self._abandon(in_flight)
+
+    def _budget(self, call_type):
+        budget = self.deadlines.get(call_type, self.deadlines["default"])
+        left = remaining()
+        return budget if left is None else min(budget, left)
+
+    def _hedge_after(self, span_name):
+        """Seconds after which to send a hedge, or None while too few calls have been observed."""
+        if not self.hedge:
+            return None
+        p95_ms = tracer.latency_percentile(span_name, 95, min_samples=self.hedge_min_samples)
+        return None if p95_ms is None else p95_ms / 1000
+
+    def _submit(self, fn, budget, in_flight):
+        """Starts an attempt unless the call already has max_in_flight running; returns its future or None."""
+        if len(in_flight) >= self.max_in_flight:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-call")
+            executor = self._executor
+        # Worker threads run in the caller's tracing and deadline context
+        future = executor.submit(propagate(functools.partial(_run_within, budget, fn)))
+        in_flight.add(future)
+        return future
+
+    def _attempt(self, call_type, fn, budget, span_name, in_flight):
+        end = time.monotonic() + budget
+        # With no free slot, the attempts that timed out earlier are waited on instead
+        self._submit(fn, budget, in_flight)
+        hedge = None
+        hedge_after = self._hedge_after(span_name)
+        if hedge_after is not None and hedge_after < budget:
+            done, _ = wait(in_flight, timeout=hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                hedge = self._submit(fn, budget, in_flight)
+                if hedge is not None:
+                    with self._lock:
+                        self.hedges += 1
+        error = None
+        while in_flight:
+            done, _ = wait(in_flight, timeout=max(0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                with self._lock:
+                    self.timeouts += 1
+                raise DeadlineExceeded(f"The {call_type} call did not finish within {budget:.1f}s")
+            for future in done:
+                in_flight.discard(future)
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _abandon(self, in_flight):
+        """Gives up on a finished call's remaining attempts: queued ones are cancelled, running ones counted."""
+        for future in in_flight:
+            if future.done() or future.cancel():
+                continue
+            with self._lock:
+                self.abandoned += 1
+                self._abandoned_running.add(future)
+            future.add_done_callback(self._abandoned_done)
+
+    def _abandoned_done(self, future):
+        with self._lock:
+            self._abandoned_running.discard(future)
+
+    def stats(self) -> dict:
+        """Retry, timeout and hedging counters."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+                "abandoned": self.abandoned,
+                "abandoned_running": len(self._abandoned_running),
+            }
+
+# Shared by all model calls in the process
+resilient_caller = ResilientCaller()
@@ -7,8 +7,6 @@ load_dotenv()
 # Configuration toggles
 USE_LLAMA_INDEX = os.getenv("USE_LLAMA_INDEX", "True").lower() == "true"
 
-print(f"DEBUG: USE_LLAMA_INDEX in settings.py is: {USE_LLAMA_INDEX}")
-
 # OpenAI configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -16,10 +14,155 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DEFAULT_MODEL = "gpt-4o-mini"
 MAX_TOKENS = 2000
 TEMPERATURE = 0.7
+FAST_MODEL = os.getenv("FAST_MODEL", "gpt-4.1-nano")  # Short, structured calls (see GENERATION_PROFILES)
+VERDICT_MODEL = os.getenv("VERDICT_MODEL", "gpt-4o")
 
 # Trial configuration
 MAX_ROUNDS = 5
 MAX_RESPONSE_LENGTH = 500
+QUERY_HISTORY_CHARS = 200  # Trailing characters of the history or context sent with a document query
+
+# Generation profiles: model, max output tokens and temperature per call type (others use "default").
+# A call whose answer fails validation (generation.py) is retried once with its "escalate_to" profile.
+RESPONSE_TOKENS = MAX_RESPONSE_LENGTH // 3  # Output budget for MAX_RESPONSE_LENGTH characters, with headroom
+GENERATION_PROFILES = {
+    "default": {"model": DEFAULT_MODEL, "max_tokens": MAX_TOKENS, "temperature": TEMPERATURE},
+    "objection": {"model": FAST_MODEL, "max_tokens": RESPONSE_TOKENS, "temperature": 0.3, "escalate_to": "default"},
+    "ruling": {"model": FAST_MODEL, "max_tokens": RESPONSE_TOKENS, "temperature": 0.2, "escalate_to": "default"},
+    "witness_answer": {"model": FAST_MODEL, "max_tokens": RESPONSE_TOKENS, "temperature": 0.5, "escalate_to": "default"},
+    "instructions": {"model": FAST_MODEL, "max_tokens": RESPONSE_TOKENS, "temperature": 0.3, "escalate_to": "default"},
+    "juror_vote": {"model": FAST_MODEL, "max_tokens": 150, "temperature": 0.7, "escalate_to": "default"},
+    "evaluation": {"model": FAST_MODEL, "max_tokens": 300, "temperature": 0.3, "escalate_to": "default"},
+    "verdict": {"model": VERDICT_MODEL, "max_tokens": 1500, "temperature": 0.3},
+}
+GENERATION_CASCADE_ENABLED = True
+
+# Jury deliberation
+JURY_SIZE = 12
+JURY_MAX_WORKERS = 4  # Jurors voting concurrently
+JURY_MAX_DELIBERATION_ROUNDS = 3
+JURY_FACTS_PER_WITNESS = 10  # Key facts kept per witness in the jury's notes
+JURY_NOTES_MAX_CHARS = 4000  # Budget for all testimony notes, shared between witnesses
+
+# Witness answer cache
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_ENTRIES = 1000
+ANSWER_CACHE_SIMILARITY = 0.8  # Reuse an answer for a question with the same content words at or above this token similarity (1.0 = exact only)
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH")  # Optional JSON file to persist answers across sessions
+
+# Testimony retrieval for long witness statements
+TESTIMONY_INDEX_MIN_CHARS = 4000  # Shorter testimony is sent whole
+TESTIMONY_CHUNK_CHARS = 800
+TESTIMONY_TOP_K = 4  # Passages sent with each question
+
+# Local extractive answers for simple factual witness questions
+EXTRACTIVE_ANSWERS_ENABLED = True
+EXTRACTIVE_CONFIDENCE_THRESHOLD = 0.75  # Share of the question's key words the testimony sentence must contain
+
+# Speculative precomputation while the user is typing
+PRECOMPUTE_ENABLED = True
+PRECOMPUTE_MAX_WORKERS = 2
+
+# Startup
+STARTUP_WARMUP = True  # Import heavy dependencies in the background once the prompt is shown
+
+# Fork server (zygote.py) for trial worker processes
+ZYGOTE_SOCKET = os.getenv("ZYGOTE_SOCKET", "/tmp/courtroom-simulator.sock")
+ZYGOTE_MAX_WORKERS = 32
+
+# Reuse of agent objects across trials
+CREW_POOL_MAX_CONFIGS = 256  # Agent configurations with idle CrewAI objects kept in the pool
+CREW_POOL_MAX_IDLE = 4  # Idle CrewAI agent/crew pairs kept per configuration
+WITNESS_POOL_MAX = 64  # Witness agents kept for reuse in later trials
+
+# Tracing
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "True").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces/spans.jsonl")  # OTLP-style JSON, one span per line
+# The trace file is rotated to TRACE_FILE.1 (replacing the previous one) when it reaches this size; 0 = never
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_STATS_WINDOW = 1000  # Recent spans per call type used for the stats percentiles
+
+# Quality of service: latency SLO for interactive turns (objections, witness questions)
+QOS_ENABLED = True
+TURN_LATENCY_SLO_MS = 5000
+QOS_WINDOW = 10  # Recent turns considered
+QOS_MIN_SAMPLES = 3  # Turns at a level before it is judged
+QOS_RECOVERY_RATIO = 0.6  # Recover one level when p95 falls below this share of the SLO
+QOS_SHORT_HISTORY_ENTRIES = 10  # History entries sent once the history is shortened
+QOS_CHEAP_MODEL = os.getenv("QOS_CHEAP_MODEL", "gpt-4.1-nano")
+
+# Deadlines, retries and hedged requests for model calls (seconds)
+CALL_DEADLINES_S = {
+    "default": 60,
+    "ruling": 20,
+    "objection": 20,
+    "witness_answer": 20,
+    "juror_vote": 30,
+    "evaluation": 30,
+    "verdict": 90,
+}
+TURN_DEADLINE_S = 90  # Shared by all model calls of one interactive turn
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_S = 0.5  # Backoff base; the delay is drawn uniformly below base * 2^(attempt - 1)
+HEDGE_ENABLED = True
+HEDGE_MIN_SAMPLES = 20  # Calls of a type traced before a duplicate request is sent at its p95
+RESILIENCE_MAX_WORKERS = 32
+RESILIENCE_MAX_IN_FLIGHT = 2  # Attempts of one call running at once (timed-out attempts and hedges count)
+
+# Document embeddings: "openai" (LlamaIndex default, remote) or "local" (HuggingFace model on the CPU)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "openai").lower()
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "BAAI/bge-small-en-v1.5")
+EMBED_BATCH_SIZE = 64  # Chunks per embedding batch
+EMBED_WORKERS = min(4, os.cpu_count() or 1)  # Processes embedding the corpus
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", ".embedding_cache")  # SQLite store of embeddings by chunk hash; empty to disable
+
+# Document shards: each directory under LEGAL_DOCS_DIR is indexed separately and tagged
+# with metadata (e.g. jurisdiction, case_type) from this JSON file in LEGAL_DOCS_DIR
+DOCS_MANIFEST_FILE = "manifest.json"
+
+# Streaming ingestion of legal_docs
+INGEST_WORKERS = min(4, os.cpu_count() or 1)  # Processes parsing documents
+INGEST_BATCH_NODES = 256  # Chunks embedded and inserted into the index at a time
+
+# Vector store for document shards: "simple" (exact scan over float vectors in memory), "hnsw"
+# (FAISS HNSW graph, persisted per shard and memory-mapped; needs faiss-cpu and
+# llama-index-vector-stores-faiss) or "mmap" (vectors, BM25 postings and chunk text in
+# read-only memory-mapped files shared by every process on the host)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "simple").lower()
+ANN_QUANTIZATION = "sq8"  # "sq8" (one byte per dimension) or "none" (float32)
+ANN_HNSW_M = 32  # Graph neighbours per vector
+ANN_EF_CONSTRUCTION = 80
+ANN_EF_SEARCH = 64  # Candidates per query: higher = better recall, slower (see benchmarks/ann_benchmark.py)
+ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", ".ann_index")
+MMAP_INDEX_DIR = os.getenv("MMAP_INDEX_DIR", ".mmap_index")
+MMAP_LEXICAL_WEIGHT = 0.2  # Share of the "mmap" score from BM25 (the rest is cosine similarity)
+
+# Per-trial retrieval working set
+WORKING_SET_ENABLED = True
+WORKING_SET_MAX_CHUNKS = 300  # Chunks kept in memory for a trial
+WORKING_SET_SEED_TOP_K = 50  # Chunks retrieved per seed query (case, each witness, each piece of evidence)
+WORKING_SET_SEED_MAX_CHARS = 1000  # Seed query text is truncated to this length
+WORKING_SET_MIN_SCORE = 0.35  # Cosine similarity below which a query falls back to the full index; depends on the embedding model
+WORKING_SET_TOP_K = 2  # Chunks per query, as in LlamaIndex's default query engine
+
+# Autopilot: the Defense agent plays the defense, for load generation and trial datasets (autopilot.py)
+AUTOPILOT_CONCURRENCY = 4  # Trials running at once
+AUTOPILOT_QUESTIONS_PER_WITNESS = 2  # Cross-examination questions the Defense agent asks each witness
+AUTOPILOT_THINK_TIME_S = 0.0  # Average pause before each defense turn (randomized), to mimic a human's pace
+AUTOPILOT_OUTPUT_DIR = "autopilot_runs"
+
+# Objection pre-filter: local heuristics decide whether the prosecutor could plausibly object to a
+# defense statement ("on": skip the objection and ruling calls when not, "shadow": always make the
+# calls and only measure the filter, "off")
+OBJECTION_FILTER_MODE = os.getenv("OBJECTION_FILTER_MODE", "on").lower()
+OBJECTION_FILTER_THRESHOLD = 1.0  # Cue score at or above which an objection is plausible
+OBJECTION_FILTER_AUDIT_RATE = 0.05  # Share of skipped statements still checked in the background, to measure misses
+
+# Judge interjection after the prosecutor's turn: "triggers" calls the judge only on procedural
+# keywords, a new witness or evidence, every JUDGE_INTERJECTION_EVERY_ROUNDS rounds and the last
+# round; "always" calls the judge every round
+JUDGE_INTERJECTION_MODE = os.getenv("JUDGE_INTERJECTION_MODE", "triggers").lower()
+JUDGE_INTERJECTION_EVERY_ROUNDS = 3
 
 # File paths
 LEGAL_DOCS_DIR = "legal_docs"
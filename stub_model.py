@@ -0,0 +1,103 @@
+# Local stand-in for the model backends (CrewAI agents and the OpenAI evaluation client), for load tests
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+class LatencyDistribution:
+    """Log-normal latency with the given median and 95th percentile, in milliseconds."""
+    def __init__(self, p50_ms, p95_ms=None):
+        self.p50_ms = p50_ms
+        self.p95_ms = p95_ms or p50_ms
+        # p95 of a log-normal is median * exp(1.645 sigma)
+        self.sigma = math.log(self.p95_ms / self.p50_ms) / 1.645 if self.p95_ms > self.p50_ms else 0.0
+
+    def sample(self, rng) -> float:
+        """One latency in seconds."""
+        return self.p50_ms * math.exp(self.sigma * rng.gauss(0, 1)) / 1000
+
+def parse_latencies(text) -> dict:
+    """
+    Parses "default=800:2500,juror_vote=300:900" into {call type: LatencyDistribution}
+    (median:p95 in milliseconds; a single number means no spread).
+    """
+    latencies = {}
+    for part in (text or "").split(","):
+        if not part.strip():
+            continue
+        call_type, _, values = part.partition("=")
+        p50, _, p95 = values.partition(":")
+        latencies[call_type.strip()] = LatencyDistribution(float(p50), float(p95) if p95 else None)
+    return latencies
+
+_RESPONSES = {
+    "juror_vote": lambda rng: f"VOTE: {rng.choice(['Guilty', 'Not Guilty'])}\nREASON: The evidence presented "
+                              f"{rng.choice(['was convincing', 'left room for doubt'])}.",
+    "evaluation": lambda rng: "\n".join(f"- {name}: {rng.randint(4, 9)}/10. The statement is reasonably {quality}."
+                                        for name, quality in (("Persuasiveness", "convincing"),
+                                                              ("Factual Grounding", "supported"),
+                                                              ("Coherence", "clear"))),
+    "objection": lambda rng: rng.choice(["Objection, Your Honor. The statement assumes facts not in evidence.",
+                                         "NO OBJECTION"]),
+    "ruling": lambda rng: rng.choice(["Sustained.", "Overruled."]) + " The court has considered the objection.",
+    "witness_answer": lambda rng: "I remember it was late in the evening. I saw the person near the back of the store.",
+}
+
+def _filler(rng, chars=400):
+    words = "the court evidence witness statement defendant record testimony jury argument fact".split()
+    text = []
+    while sum(len(word) + 1 for word in text) < chars:
+        text.append(rng.choice(words))
+    return " ".join(text).capitalize() + "."
+
+class StubModel:
+    """
+    Answers model calls locally after a sampled delay, so load tests measure this
+    process and not the model provider.
+
+    latencies maps call types ("ruling", "juror_vote", "evaluation", ...) to
+    LatencyDistribution; others use default. max_concurrency, if set, queues calls
+    beyond that many in flight, like a provider's concurrency limit. failure_rate
+    is the share of calls that raise a (retryable) connection error, to exercise retries.
+    """
+    def __init__(self, latencies=None, default=None, max_concurrency=None, failure_rate=0.0, seed=None):
+        self.latencies = latencies or {}
+        self.default = default or LatencyDistribution(800, 2500)
+        self.failure_rate = failure_rate
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def complete(self, call_type, prompt) -> str:
+        with self._lock:
+            self.calls[call_type] = self.calls.get(call_type, 0) + 1
+            delay = self.latencies.get(call_type, self.default).sample(self._random)
+            fail = self._random.random() < self.failure_rate
+            response = _RESPONSES.get(call_type, _filler)(self._random)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            time.sleep(delay)
+        finally:
+            if self._slots:
+                self._slots.release()
+        if fail:
+            raise ConnectionError(f"Stub model failure ({call_type})")
+        return response
+
+    def openai_client(self):
+        """An object with the chat.completions.create() interface of the OpenAI client, backed by this stub."""
+        def create(model=None, messages=(), **kwargs):
+            content = self.complete("evaluation", messages[-1]["content"] if messages else "")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                                   usage=SimpleNamespace(prompt_tokens=None, completion_tokens=None))
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def install(stub):
+    """Routes every agent call and evaluation in this process to the stub (None restores the real backends)."""
+    import dialogue_manager
+    from agents import base_agent
+    base_agent.model_stub = stub
+    dialogue_manager.set_openai_client(stub.openai_client() if stub else None)
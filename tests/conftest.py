@@ -0,0 +1,40 @@
+import os
+import sys
+import types
+
+import pytest
+
+# Keep the tests off the network and out of traces/ before settings.py is imported
+os.environ.setdefault("TRACE_ENABLED", "false")
+os.environ.setdefault("USE_LLAMA_INDEX", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class _Recorded:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class FakeCrew(_Recorded):
+    """Crew that answers with `response` and remembers the LLM of the agent that ran each task."""
+    response = "Sustained."
+    llms = []
+
+    def kickoff(self):
+        FakeCrew.llms.append(self.tasks[0].agent.llm)
+        return FakeCrew.response
+
+@pytest.fixture
+def fake_crewai(monkeypatch):
+    """Replaces crewai with recording stand-ins and gives the agents a fresh crew pool."""
+    from agents import base_agent
+    from agents.agent_pool import CrewPool
+    module = types.ModuleType("crewai")
+    module.Agent = type("Agent", (_Recorded,), {})
+    module.Task = type("Task", (_Recorded,), {})
+    module.LLM = type("LLM", (_Recorded,), {})
+    module.Crew = FakeCrew
+    FakeCrew.llms = []
+    FakeCrew.response = "Sustained."
+    monkeypatch.setitem(sys.modules, "crewai", module)
+    monkeypatch.setattr(base_agent, "crew_pool", CrewPool())
+    monkeypatch.setattr(base_agent, "model_stub", None)
+    return FakeCrew
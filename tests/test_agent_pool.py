@@ -0,0 +1,27 @@
+from agents.base_agent import BaseAgent
+from generation import get_profile
+
+def _agent():
+    return BaseAgent("Judge", "Judge", "Preside over the trial")
+
+def test_leased_agent_llm_follows_call_type_profile(fake_crewai):
+    agent = _agent()
+    agent.execute_prompt("Rule on the objection", "Objection: hearsay", call_type="ruling")
+    fake_crewai.response = "Verdict: Not Guilty"
+    agent.execute_prompt("Deliver a verdict", "Transcript", call_type="verdict")
+
+    ruling_llm, verdict_llm = fake_crewai.llms
+    assert ruling_llm.model == get_profile("ruling").model
+    assert ruling_llm.max_tokens == get_profile("ruling").max_tokens
+    assert verdict_llm.model == get_profile("verdict").model
+    assert verdict_llm.max_tokens == get_profile("verdict").max_tokens
+    assert (ruling_llm.model, ruling_llm.max_tokens) != (verdict_llm.model, verdict_llm.max_tokens)
+
+def test_failed_validation_escalates_to_the_larger_model(fake_crewai):
+    fake_crewai.response = "The court will consider it."
+    _agent().execute_prompt("Rule on the objection", "Objection: hearsay", call_type="ruling")
+
+    first, escalated = fake_crewai.llms
+    assert first.model == get_profile("ruling").model
+    assert escalated.model == get_profile("default").model
+    assert escalated.max_tokens == get_profile("default").max_tokens
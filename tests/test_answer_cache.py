@@ -0,0 +1,60 @@
+import pytest
+
+from answer_cache import AnswerCache
+
+TESTIMONY = "I was at the bar on the night of the robbery and saw the defendant."
+QUESTION = "Did you see the defendant at the bar on the night of the robbery?"
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache(max_entries=10, similarity_threshold=0.8, path=None)
+    cache.put(TESTIMONY, QUESTION, "direct", "Yes, I saw him there.")
+    return cache
+
+@pytest.mark.parametrize("question", [
+    "Did you see the victim at the bar on the night of the robbery?",
+    "Did you see the defendant at the bank on the night of the robbery?",
+    "Did you see the defendant leave the bar on the night of the robbery?",
+    "Did you hear the defendant at the bar on the night of the robbery?",
+    "Did you see her at the bar on the night of the robbery?",
+    "Did you not see the defendant at the bar on the night of the robbery?",
+])
+def test_questions_with_other_words_miss(cache, question):
+    assert cache.get(TESTIMONY, question, "direct") is None
+    assert cache.stats()["near_hits"] == 0
+
+def test_exact_hit_ignores_case_and_punctuation(cache):
+    assert cache.get(TESTIMONY, QUESTION.upper().rstrip("?"), "direct") == "Yes, I saw him there."
+    assert cache.stats()["hits"] == 1
+
+def test_near_hit_for_a_change_of_stopword(cache):
+    question = "Did you see the defendant in the bar on the night of the robbery?"
+    assert cache.get(TESTIMONY, question, "direct") == "Yes, I saw him there."
+    assert cache.stats()["near_hits"] == 1
+
+def test_entries_are_partitioned_by_witness_and_mode(cache):
+    assert cache.get(TESTIMONY, QUESTION, "cross") is None
+    assert cache.get("Other testimony.", QUESTION, "direct") is None
+    assert cache.stats()["misses"] == 2
+
+def test_exact_only_threshold_disables_near_hits():
+    cache = AnswerCache(similarity_threshold=1.0, path=None)
+    cache.put(TESTIMONY, QUESTION, "direct", "Yes.")
+    assert cache.get(TESTIMONY, "Did you see the defendant in the bar on the night of the robbery?", "direct") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2, path=None)
+    cache.put(TESTIMONY, "Where were you?", "direct", "At the bar.")
+    cache.put(TESTIMONY, "What time was it?", "direct", "Nine.")
+    assert cache.get(TESTIMONY, "Where were you?", "direct") == "At the bar."  # Now most recently used
+    cache.put(TESTIMONY, "Who was with you?", "direct", "Nobody.")
+    assert cache.get(TESTIMONY, "What time was it?", "direct") is None
+    assert cache.get(TESTIMONY, "Where were you?", "direct") == "At the bar."
+    assert cache.stats()["entries"] == 2
+
+def test_entries_survive_save_and_load(tmp_path):
+    path = str(tmp_path / "answers.json")
+    cache = AnswerCache(path=path)
+    cache.put(TESTIMONY, QUESTION, "direct", "Yes.")
+    cache.save()
+    assert AnswerCache(path=path).get(TESTIMONY, QUESTION, "direct") == "Yes."
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from embeddings import EmbeddingCache, embed_nodes
+
+class _CountingModel:
+    model_name = "test-model"
+
+    def __init__(self):
+        self.embedded = []
+
+    def get_text_embedding_batch(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+
+def test_cache_stores_vectors_on_disk(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    cache.put_many([("a", [1.0, 2.0]), ("b", [0.25, -3.0])])
+    reopened = EmbeddingCache(str(tmp_path), "test-model")
+    assert len(reopened) == 2
+    assert reopened.get_many(["a", "b", "c"]) == {"a": [1.0, 2.0], "b": [0.25, -3.0]}
+
+def test_jsonl_cache_is_imported_once(tmp_path):
+    legacy = tmp_path / "test-model.jsonl"
+    legacy.write_text(json.dumps({"key": "a", "embedding": [1.5, 2.5]}) + "\n" + '{"key": "b", "embed')
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    assert cache.get("a") == [1.5, 2.5]
+    assert not legacy.exists()
+
+def test_embed_nodes_embeds_only_missing_chunks(tmp_path):
+    schema = pytest.importorskip("llama_index.core.schema")
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    model = _CountingModel()
+    nodes = [schema.TextNode(text=text) for text in ("one", "two", "one")]
+    stats = embed_nodes(nodes, model, cache, workers=1, verbose=False)
+    assert stats["embedded"] == 2
+    assert nodes[0].embedding == [3.0, 0.5, -1.0]
+
+    again = [schema.TextNode(text=text) for text in ("one", "three")]
+    stats = embed_nodes(again, model, cache, workers=1, verbose=False)
+    assert stats["cached"] == 1
+    assert model.embedded == ["one", "two", "three"]
+    assert again[1].embedding == [5.0, 0.5, -1.0]
+
+def test_no_cache_dir_stores_nothing():
+    cache = EmbeddingCache("", "test-model")
+    cache.put_many([("a", [1.0])])
+    assert cache.get("a") is None
+
+def test_closed_cache_reads_nothing(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test-model")
+    cache.put_many([("a", [1.0])])
+    cache.close()
+    assert cache.get("a") is None and len(cache) == 0
+    assert EmbeddingCache(str(tmp_path), "test-model").get("a") == [1.0]
@@ -0,0 +1,26 @@
+import pytest
+
+from extractive_qa import ExtractiveAnswerer, classify_question
+
+TESTIMONY = (
+    "I got to the bank around noon. The alarm sounded at 9:15 pm. "
+    "Marcus arrived in town on Friday. The car was parked behind the bank. "
+    "Three shots were fired. The door was opened by Marcus. The bag was a dark blue color."
+)
+
+@pytest.mark.parametrize("question, sentence", [
+    ("What time did the alarm sound?", "The alarm sounded at 9:15 pm."),
+    ("What day did Marcus arrive in town?", "Marcus arrived in town on Friday."),
+    ("What place was the car parked?", "The car was parked behind the bank."),
+    ("Where was the car parked?", "The car was parked behind the bank."),
+    ("How many shots were fired?", "Three shots were fired."),
+    ("Who was the person that opened the door?", "The door was opened by Marcus."),
+    ("What color was the bag?", "The bag was a dark blue color."),
+])
+def test_question_type_words_do_not_count_against_the_answer(question, sentence):
+    answer, confidence = ExtractiveAnswerer(TESTIMONY).answer(question)
+    assert answer == sentence
+    assert confidence == pytest.approx(1.0)
+
+def test_reasoning_questions_are_not_factual():
+    assert classify_question("Why was the car parked behind the bank?") is None
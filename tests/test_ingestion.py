@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from ingestion import iter_document_files, iter_documents
+
+@pytest.fixture
+def corpus(tmp_path):
+    for name, text in [("a.txt", "Rule one."), ("b.txt", "Rule two."), ("c.txt", "Rule three.")]:
+        (tmp_path / name).write_text(text)
+    return tmp_path
+
+def test_iter_documents_accepts_a_generator(corpus):
+    progress = {}
+    documents = list(iter_documents(iter_document_files(str(corpus)), workers=1, progress=progress))
+    assert [document.text for document in documents] == ["Rule one.", "Rule two.", "Rule three."]
+    assert progress == {"files": 3, "skipped": 0}
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unreadable_files_are_skipped_and_counted(corpus, workers):
+    progress = {}
+    paths = [str(corpus / "a.txt"), str(corpus / "missing.txt"), str(corpus / "c.txt")]
+    documents = list(iter_documents(paths, workers=workers, progress=progress, metadata={"shard": "test"}))
+    assert [document.text for document in documents] == ["Rule one.", "Rule three."]
+    assert all(document.metadata["shard"] == "test" for document in documents)
+    assert progress == {"files": 3, "skipped": 1}
@@ -0,0 +1,39 @@
+from dialogue_manager import DialogueManager
+from judge_interjection import interjection_triggers
+
+def _manager(monkeypatch, prosecution="The defendant fled the scene."):
+    manager = DialogueManager()
+    manager.trial_active = True
+    manager.case_context = "State v. Doe"
+    judge_calls = []
+    monkeypatch.setattr(manager.prosecutor, "process_context", lambda *args, **kwargs: prosecution)
+    monkeypatch.setattr(manager.judge, "process_context",
+                        lambda *args, **kwargs: judge_calls.append(args) or "Proceed.")
+    return manager, judge_calls
+
+def test_procedural_words_trigger_the_judge():
+    assert interjection_triggers(["Move to strike that answer."]) == ["procedural"]
+    assert interjection_triggers(["The car was red."]) == []
+
+def test_prosecutor_statements_do_not_trigger_the_judge(monkeypatch):
+    manager, judge_calls = _manager(monkeypatch, prosecution="Objection noted; we move on to the motive.")
+    manager._add_to_transcript("Prosecutor", "Objection: hearsay")
+    manager.process_prosecution()
+    assert judge_calls == []
+
+def test_ruling_resets_what_the_judge_has_heard(monkeypatch):
+    manager, judge_calls = _manager(monkeypatch)
+    manager._add_to_transcript("Defense", "That is hearsay, and I move to strike it.")
+    monkeypatch.setattr(manager.prosecutor, "object_to_defense", lambda *args, **kwargs: "Argumentative")
+    monkeypatch.setattr(manager.judge, "rule_on_objection", lambda *args, **kwargs: "Sustained.")
+    monkeypatch.setattr(manager, "_evaluate_user_input", lambda *args: {})
+    monkeypatch.setattr("dialogue_manager.objection_filter.mode", "off")
+    assert manager.process_defense("Isn't it true you lied?")["ruling"] == "Sustained."
+    manager.process_prosecution()
+    assert judge_calls == []
+
+def test_defense_procedural_statement_triggers_the_judge(monkeypatch):
+    manager, judge_calls = _manager(monkeypatch)
+    manager._add_to_transcript("Defense", "I move to strike the last answer.")
+    assert manager.process_prosecution()["judge"] == "Proceed."
+    assert len(judge_calls) == 1
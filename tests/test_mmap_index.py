@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.schema import TextNode
+
+from mmap_index import MmapIndex, MmapIndexWriter
+from text_utils import PassageIndex
+
+TEXTS = [
+    "The contract was signed in Boston on March 3.",
+    "Hearsay is inadmissible unless an exception applies.",
+    "The witness saw the defendant near the warehouse.",
+    "Evidence must be authenticated before it is admitted; authentication of evidence is required.",
+    "",
+]
+
+def _node(i, text):
+    vector = np.zeros(len(TEXTS), dtype=np.float32)
+    vector[i] = 2.0  # Unnormalized: the writer normalizes
+    return TextNode(text=text, embedding=vector.tolist(), metadata={"shard": "test", "chunk": i})
+
+@pytest.fixture
+def index(tmp_path):
+    directory = str(tmp_path / "shard")
+    writer = MmapIndexWriter(directory, "fingerprint-1", "test-model")
+    nodes = [_node(i, text) for i, text in enumerate(TEXTS)]
+    writer.add(nodes[:2])
+    writer.add(nodes[2:])
+    assert writer.close() == len(TEXTS)
+    assert not os.path.exists(directory + ".tmp")
+    return MmapIndex(directory)
+
+def test_text_metadata_and_manifest_round_trip(index):
+    assert [index.text(i) for i in range(len(TEXTS))] == TEXTS
+    assert index.metadata(2)["metadata"] == {"shard": "test", "chunk": 2}
+    assert index.manifest["fingerprint"] == "fingerprint-1"
+    assert index.manifest["dimension"] == len(TEXTS)
+    assert np.allclose(np.linalg.norm(index.vectors[:], axis=1), 1.0)
+
+def test_vector_search_returns_the_nearest_chunk_first(index):
+    query = np.zeros(len(TEXTS), dtype=np.float32)
+    query[2], query[0] = 1.0, 0.5
+    results = index.search("", query, top_k=2, lexical_weight=0)
+    assert [chunk for chunk, _ in results] == [2, 0]
+    assert results[0][1] == pytest.approx(1 / np.sqrt(1.25))  # Cosine similarity
+
+def test_bm25_scores_match_passage_index(index):
+    query = "authenticated evidence admitted"
+    expected = PassageIndex(TEXTS).score(query)
+    assert np.allclose(index.bm25_scores(query), expected, atol=1e-5)
+    assert index.bm25_scores("zebra").max() == 0
+
+def test_lexical_weight_blends_bm25_into_the_ranking(index):
+    query = np.zeros(len(TEXTS), dtype=np.float32)
+    query[0] = 1.0
+    results = index.search("hearsay exception", query, top_k=1, lexical_weight=0.9)
+    assert results[0][0] == 1
+
+def test_empty_writer_writes_nothing(tmp_path):
+    directory = str(tmp_path / "empty")
+    assert MmapIndexWriter(directory, "fingerprint-1").close() == 0
+    assert not os.path.exists(directory) and not os.path.exists(directory + ".tmp")
@@ -0,0 +1,77 @@
+from dialogue_manager import DialogueManager
+import pytest
+
+from objection_filter import ObjectionFilter, ScreenResult, ruling_sustained, screen
+from tracing import tracer
+
+def test_uncalled_witness_testimony_is_not_on_the_record():
+    manager = DialogueManager()
+    manager.trial_active = True
+    manager.case_context = "State v. Doe"
+    manager.witnesses = {"Ann": manager._get_witness("Ann", "I saw Marcus at the Riverside garage.")}
+    assert "Riverside" not in manager._record_text()
+    manager.call_witness("Ann")
+    assert "Riverside" in manager._record_text()
+
+def test_audit_runs_under_the_trial_trace():
+    objection_filter = ObjectionFilter(mode="on", audit_rate=1.0)
+    seen = []
+
+    def full_path():
+        seen.append(tracer.current_span().trace_id)
+        return False, False
+
+    with tracer.span("turn.process_defense", trace_id="trial-1"):
+        thread = objection_filter.audit(objection_filter.screen("The car was red."), full_path)
+    thread.join()
+    assert seen == ["trial-1"]
+
+KNOWN = "The defendant, Marcus Hale, was stopped at 9:15 pm on Elm Street. Exhibit A is a receipt."
+
+@pytest.mark.parametrize("statement, grounds", [
+    ("His neighbor told me he said he would do it.", "hearsay"),
+    ("He must have been there, he probably planned it.", "speculation"),
+    ("Obviously the witness is lying.", "argumentative"),
+    ("Marcus Hale was stopped at 11:40 pm near the Harbor Bridge.", "facts not in evidence"),
+    ("Exhibit A proves the timeline.", "unpresented evidence"),
+])
+def test_screen_flags_objectionable_statements(statement, grounds):
+    result = screen(statement, KNOWN, exhibits=["A"], presented=(), threshold=1.0)
+    assert grounds in result.reasons
+    assert result.plausible
+
+def test_screen_passes_statements_grounded_in_the_record():
+    result = screen("Marcus Hale was stopped at 9:15 pm on Elm Street.", KNOWN, exhibits=["A"], presented=["A"])
+    assert result.reasons == []
+    assert not result.plausible
+
+def test_ruling_sustained():
+    assert ruling_sustained("Objection sustained.")
+    assert not ruling_sustained("Overruled. The objection is not sustained.")
+    assert not ruling_sustained(None)
+
+def test_on_mode_scales_audited_misses_to_every_skipped_statement():
+    objection_filter = ObjectionFilter(mode="on", audit_rate=1.0)
+    implausible, plausible = ScreenResult(False, 0.0), ScreenResult(True, 2.0)
+    for _ in range(10):
+        assert objection_filter.should_skip(implausible)
+    # Two skipped statements are audited: the full path would have objected to one
+    for outcome in [(True, True), (False, False)]:
+        objection_filter.audit(implausible, lambda outcome=outcome: outcome).join()
+    objection_filter.audit_rate = 0.0
+    assert objection_filter.audit(implausible, lambda: (True, True)) is None
+    for _ in range(5):
+        assert not objection_filter.should_skip(plausible)
+        objection_filter.record(plausible, True)
+    stats = objection_filter.stats()
+    # 1 miss in 2 audited skips -> about 5 of the 10 skipped statements; 5 of about 10 objections missed
+    assert stats["false_negative_rate"] == pytest.approx(0.5)
+    assert stats["calls_saved"] == 2 * (10 - 2)
+    assert stats["sustained_fn"] == 1
+
+def test_shadow_mode_never_skips():
+    objection_filter = ObjectionFilter(mode="shadow")
+    assert not objection_filter.should_skip(ScreenResult(False, 0.0))
+    objection_filter.record(ScreenResult(False, 0.0), True)
+    objection_filter.record(ScreenResult(True, 2.0), True)
+    assert objection_filter.stats()["false_negative_rate"] == pytest.approx(0.5)
@@ -0,0 +1,26 @@
+from dialogue_manager import DialogueManager
+
+class _CountingEngine:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, text):
+        self.queries.append(text)
+
+def test_presenting_evidence_makes_no_document_query():
+    manager = DialogueManager()
+    manager.trial_active = True
+    manager.evidence = {"E1": "A torn receipt"}
+    manager.query_engine = engine = _CountingEngine()
+    assert manager.present_evidence("Defense", "E1").endswith("The court acknowledges the presentation of E1.")
+    assert engine.queries == []
+
+def test_idle_work_only_precomputes_model_calls(monkeypatch):
+    manager = DialogueManager()
+    manager.trial_active = True
+    manager.witnesses = {"Ann": object()}
+    manager.evidence = {"E1": "A torn receipt"}
+    submitted = []
+    monkeypatch.setattr(manager.precompute, "submit", lambda key, fn, *args: submitted.append(key))
+    manager.precompute_idle_work()
+    assert submitted == [("instructions", "closing")]
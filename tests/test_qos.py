@@ -0,0 +1,29 @@
+from agents.base_agent import BaseAgent
+from generation import get_profile
+from qos import QoSGovernor, DEGRADATION_LEVELS
+from settings import QOS_CHEAP_MODEL
+
+def test_cheap_model_level_reaches_the_llm(fake_crewai):
+    agent = BaseAgent("Judge", "Judge", "Preside over the trial")
+    qos = QoSGovernor(enabled=False)
+    fake_crewai.response = "Verdict: Not Guilty"
+
+    qos.level = DEGRADATION_LEVELS.index("cheap_model")
+    agent.model_override = qos.model_override
+    agent.execute_prompt("Deliver a verdict", "Transcript", call_type="verdict")
+    qos.level = 0
+    agent.model_override = qos.model_override
+    agent.execute_prompt("Deliver a verdict", "Transcript", call_type="verdict")
+
+    degraded, normal = fake_crewai.llms
+    assert get_profile("verdict").model != QOS_CHEAP_MODEL
+    assert degraded.model == QOS_CHEAP_MODEL
+    assert degraded.max_tokens == get_profile("verdict").max_tokens
+    assert normal.model == get_profile("verdict").model
+
+def test_cheap_model_skips_escalation(fake_crewai):
+    agent = BaseAgent("Judge", "Judge", "Preside over the trial")
+    agent.model_override = QOS_CHEAP_MODEL
+    fake_crewai.response = "The court will consider it."
+    agent.execute_prompt("Rule on the objection", "Objection: hearsay", call_type="ruling")
+    assert [llm.model for llm in fake_crewai.llms] == [QOS_CHEAP_MODEL]
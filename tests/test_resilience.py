@@ -0,0 +1,82 @@
+import pytest
+
+from resilience import ResilientCaller, DeadlineExceeded, is_retryable
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class RateLimitError(Exception):
+    pass
+
+@pytest.mark.parametrize("error, retryable", [
+    (DeadlineExceeded("late"), True),
+    (TimeoutError("late"), True),
+    (ConnectionError("reset"), True),
+    (_StatusError(429), True),
+    (_StatusError(503), True),
+    (RateLimitError("slow down"), True),
+    (_StatusError(401), False),
+    (_StatusError(400), False),
+    (ValueError("bad prompt"), False),
+    (KeyError("field"), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+def _caller():
+    return ResilientCaller(max_attempts=3, backoff_s=0, hedge=False)
+
+def test_permanent_errors_are_not_retried():
+    caller, calls = _caller(), []
+    def fail():
+        calls.append(1)
+        raise _StatusError(401)
+    with pytest.raises(_StatusError):
+        caller.call("ruling", fail)
+    assert len(calls) == 1
+    assert caller.stats()["retries"] == 0
+
+def test_transient_errors_are_retried():
+    caller, calls = _caller(), []
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "Sustained."
+    assert caller.call("ruling", flaky) == "Sustained."
+    assert caller.stats()["retries"] == 2
+
+def test_hung_attempts_are_bounded_per_call():
+    import threading
+    release = threading.Event()
+    started = []
+    def hang():
+        started.append(1)
+        release.wait(5)
+        return "late"
+    caller = ResilientCaller(deadlines={"default": 0.1}, max_attempts=4, backoff_s=0, hedge=False,
+                             max_in_flight=2)
+    with pytest.raises(DeadlineExceeded):
+        caller.call("ruling", hang)
+    assert len(started) == 2
+    assert caller.stats()["abandoned"] == 2
+    assert caller.stats()["abandoned_running"] == 2
+    release.set()
+
+def test_timed_out_attempt_can_answer_the_retry():
+    import threading
+    release = threading.Event()
+    calls = []
+    def slow_once():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return "first"
+        release.set()
+        threading.Event().wait(1)
+        return "second"
+    caller = ResilientCaller(deadlines={"default": 0.2}, max_attempts=3, backoff_s=0, hedge=False,
+                             max_in_flight=2)
+    assert caller.call("ruling", slow_once) == "first"
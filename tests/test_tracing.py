@@ -0,0 +1,15 @@
+import json
+
+from tracing import Tracer
+
+def test_trace_file_is_rotated_at_max_bytes(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer(enabled=True, path=str(path), max_bytes=2000)
+    for i in range(100):
+        with tracer.span("agent.call", index=i):
+            pass
+    rotated = tmp_path / "traces" / "spans.jsonl.1"
+    assert rotated.exists()
+    assert path.stat().st_size < 2000 and rotated.stat().st_size < 4000
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()][-1] == "agent.call"
+    assert tracer.stats()
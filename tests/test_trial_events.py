@@ -0,0 +1,48 @@
+from trial_events import SYSTEM, TrialEventStore, witness_name, witness_speaker
+
+def _store():
+    store = TrialEventStore()
+    store.append(SYSTEM, "Trial started for case: State v. Doe")
+    store.append("Judge", "Opening instructions.")
+    store.append("Prosecutor", "The defendant fled.")
+    store.append(witness_speaker("Ann"), "I saw him run.")
+    store.append("Defense", "No further questions.")
+    return store
+
+def test_transcript_includes_court_notices():
+    store = _store()
+    transcript = store.transcript
+    assert len(transcript) == 5
+    assert transcript[0]["speaker"] == SYSTEM
+    assert set(transcript[-1]) == {"speaker", "content", "timestamp"}
+    assert [entry["speaker"] for entry in transcript[1:3]] == ["Judge", "Prosecutor"]
+
+def test_lines_and_history_leave_out_court_notices():
+    store = _store()
+    assert list(store.lines) == ["Judge: Opening instructions.", "Prosecutor: The defendant fled.",
+                                 "Witness (Ann): I saw him run.", "Defense: No further questions."]
+    assert store.history() == "\n".join(store.lines)
+
+def test_history_last_and_end():
+    store = _store()
+    assert store.history(last=2) == "Witness (Ann): I saw him run.\nDefense: No further questions."
+    # end is an event index: the history as it was before the witness spoke
+    assert store.history(end=3) == "Judge: Opening instructions.\nProsecutor: The defendant fled."
+    assert store.history(last=1, end=3) == "Prosecutor: The defendant fled."
+
+def test_history_render_is_cached_until_the_next_event():
+    store = _store()
+    first = store.history()
+    assert store.history() is first
+    assert store.history(last=1) is not first
+    store.append("Judge", "Overruled.")
+    assert store.history().endswith("Judge: Overruled.")
+
+def test_speakers_are_interned_and_witness_names_parsed():
+    store = _store()
+    store.append(witness_speaker("Ann"), "Yes.")
+    ann = [event for event in store.events() if witness_name(event.speaker) == "Ann"]
+    assert len(ann) == 2 and ann[0].speaker is ann[1].speaker
+    assert witness_name("Defense") is None
+    assert store.stats()["speakers"] == 5
+    assert store.stats()["memory_kb"] > 0
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core import Document, Settings, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setattr(Settings, "_embed_model", MockEmbedding(embed_dim=8))
+    documents = [Document(text=f"Rule {i}: evidence must be authenticated before admission.") for i in range(20)]
+    return VectorStoreIndex.from_documents(documents)
+
+def test_full_index_baseline_uses_turn_sized_probes(index, monkeypatch):
+    import working_set
+    probes = []
+    monkeypatch.setattr(working_set.ShardRetriever, "_retrieve", lambda self, bundle: probes.append((self, bundle)) or [])
+
+    retriever = working_set.WorkingSetRetriever([index], ["case " * 500] * 5, max_chunks=10, seed_top_k=200)
+
+    assert len(probes) == working_set._BASELINE_PROBES
+    assert all(len(bundle.query_str) <= working_set._PROBE_CHARS for _, bundle in probes)
+    assert all(shard_retriever.top_k == working_set.WORKING_SET_TOP_K for shard_retriever, _ in probes)
+    assert retriever.stats()["full_index_ms"] is not None
+    assert retriever.stats()["chunks"] == 10
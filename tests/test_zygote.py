@@ -0,0 +1,29 @@
+import sys
+import types
+
+import dialogue_manager
+import zygote
+
+def test_preload_leaves_local_embeddings_to_the_workers(monkeypatch):
+    calls = []
+    monkeypatch.setattr(zygote, "EMBED_BACKEND", "local")
+    monkeypatch.setattr(dialogue_manager, "warm_up", lambda embed_model=True: calls.append(("warm_up", embed_model)))
+    monkeypatch.setattr(dialogue_manager, "load_document_indexes", lambda *args: calls.append(("indexes",)))
+    monkeypatch.setattr(zygote.gc, "freeze", lambda: None)
+    monkeypatch.setitem(sys.modules, "main", types.ModuleType("main"))
+    zygote.preload()
+    assert calls == [("warm_up", False)]
+
+def test_local_embed_model_loads_on_a_later_call(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(dialogue_manager, "USE_LLAMA_INDEX", True)
+    monkeypatch.setattr(dialogue_manager, "EMBED_BACKEND", "local")
+    monkeypatch.setattr(dialogue_manager, "create_embed_model", lambda: loaded.append(1))
+    monkeypatch.setattr(dialogue_manager, "_llama_index", None)
+    monkeypatch.setattr(dialogue_manager, "_llama_index_checked", False)
+    monkeypatch.setattr(dialogue_manager, "_local_embed_model_checked", False)
+    assert dialogue_manager.get_llama_index(embed_model=False) is not None
+    assert loaded == []
+    dialogue_manager.get_llama_index()
+    dialogue_manager.get_llama_index()
+    assert loaded == [1]
@@ -0,0 +1,162 @@
+# Lightweight text helpers shared by the agents (no external dependencies)
+import math
+import re
+
+STOPWORDS = frozenset("""
+a an and are as at be been being but by can could did do does for from had has have he her
+his how i if in into is it its me my no not of on or our she so that the their them then there
+these they this to was we were what when where which who whom why will with would you your
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+_DETAIL_PATTERN = re.compile(r"\d|\b(?:am|pm|o'clock|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", re.IGNORECASE)
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases the text and splits it into word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def stem(token: str) -> str:
+    """Crude suffix stripping so that "arrive", "arrived" and "arriving" match."""
+    if len(token) <= 4 or token.isdigit():
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+    return token
+
+def content_tokens(text: str) -> list[str]:
+    """Stemmed tokens with stopwords removed."""
+    return [stem(token) for token in tokenize(text) if token not in STOPWORDS]
+
+def split_sentences(text: str) -> list[str]:
+    """Splits text into sentences on terminal punctuation and line breaks."""
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+def jaccard(tokens_a, tokens_b) -> float:
+    """Jaccard similarity of two token collections."""
+    set_a, set_b = set(tokens_a), set(tokens_b)
+    if not set_a or not set_b:
+        return 0.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+def fact_score(sentence: str) -> float:
+    """Scores how informative a sentence is as a standalone fact."""
+    tokens = content_tokens(sentence)
+    if not tokens:
+        return 0.0
+    score = min(len(set(tokens)), 15)
+    # Times, dates, numbers and names are what juries need to remember
+    score += 3 * len(_DETAIL_PATTERN.findall(sentence))
+    score += sum(1 for word in sentence.split()[1:] if word[:1].isupper())
+    return float(score)
+
+def merge_key_facts(facts: list[str], text: str, max_facts: int, max_chars: int,
+                    duplicate_threshold: float = 0.6) -> list[str]:
+    """
+    Merges the sentences of a new statement into an existing list of key facts.
+
+    Near-duplicate sentences are dropped, the most informative facts are kept, and
+    the result never exceeds max_facts entries or max_chars characters. Facts keep
+    the order in which they were first heard.
+    """
+    merged = list(facts)
+    for sentence in split_sentences(text):
+        tokens = content_tokens(sentence)
+        if not tokens:
+            continue
+        if any(jaccard(tokens, content_tokens(fact)) >= duplicate_threshold for fact in merged):
+            continue
+        merged.append(sentence)
+
+    ranked = sorted(range(len(merged)), key=lambda i: fact_score(merged[i]), reverse=True)
+    kept, total_chars = set(), 0
+    for i in ranked:
+        if len(kept) >= max_facts:
+            break
+        fact = merged[i]
+        if len(fact) > max_chars:
+            fact = merged[i] = fact[:max_chars - 3].rstrip() + "..."
+        if total_chars + len(fact) > max_chars:
+            continue
+        kept.add(i)
+        total_chars += len(fact)
+    return [merged[i] for i in sorted(kept)]
+
+def chunk_text(text: str, chunk_chars: int, overlap_sentences: int = 1) -> list[str]:
+    """
+    Splits text into passages of roughly chunk_chars characters on sentence boundaries.
+
+    Consecutive passages share overlap_sentences sentences so a fact that spans a
+    boundary is still found whole in one passage.
+    """
+    sentences = split_sentences(text)
+    chunks, current, current_chars = [], [], 0
+    for sentence in sentences:
+        if current and current_chars + len(sentence) > chunk_chars:
+            chunks.append(" ".join(current))
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            current_chars = sum(len(s) + 1 for s in current)
+        current.append(sentence)
+        current_chars += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+class PassageIndex:
+    """
+    In-memory BM25 index over a list of passages.
+
+    Built once; search() scores the passages against a query and returns the best ones.
+    """
+    def __init__(self, passages: list[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._term_counts = []
+        self._lengths = []
+        document_frequency = {}
+        for passage in passages:
+            counts = {}
+            for token in content_tokens(passage):
+                counts[token] = counts.get(token, 0) + 1
+            self._term_counts.append(counts)
+            self._lengths.append(sum(counts.values()))
+            for token in counts:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        self._average_length = (sum(self._lengths) / len(passages)) if passages else 0.0
+        n = len(passages)
+        self._idf = {
+            token: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for token, df in document_frequency.items()
+        }
+        self._max_idf = max(self._idf.values(), default=1.0)
+
+    def idf(self, token: str) -> float:
+        """Inverse document frequency of a token; unseen tokens get the highest weight."""
+        return self._idf.get(token, self._max_idf)
+
+    def score(self, query: str) -> list[float]:
+        """BM25 score of every passage for the query."""
+        query_tokens = set(content_tokens(query))
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self._average_length or 1))
+            for token in query_tokens:
+                tf = counts.get(token)
+                if tf:
+                    score += self._idf[token] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query: str, top_k: int) -> list[tuple[int, float]]:
+        """Returns (passage index, score) pairs for the top_k passages, best first."""
+        scores = self.score(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [(i, scores[i]) for i in ranked[:top_k]]
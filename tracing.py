@@ -0,0 +1,230 @@
+# Structured tracing spans for agent, retrieval, evaluation and turn calls
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from settings import TRACE_ENABLED, TRACE_FILE, TRACE_MAX_BYTES, TRACE_STATS_WINDOW
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def percentile(values, q: float):
+    """The q-th percentile (0-100) of the values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class Span:
+    """One timed operation. Attributes are set with set() while the span is open."""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = dict(attributes)
+        self.error = None
+
+    def set(self, **attributes):
+        """Sets span attributes; None values are ignored."""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.time()) - self.start) * 1000
+
+    def to_record(self) -> dict:
+        """OTLP-style JSON record for the span."""
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int(self.end * 1e9),
+            "durationMs": round(self.duration_ms, 2),
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["status"] = {"code": "ERROR", "message": self.error}
+        return record
+
+class Tracer:
+    """
+    Records spans nested under a per-trial trace id.
+
+    Finished spans are appended to a JSONL file and kept in a bounded window per
+    span name for latency percentiles (see stats()). Once the file reaches
+    max_bytes it is moved to <path>.1 and a new one is started, so at most about
+    twice max_bytes of spans are kept on disk.
+    """
+    def __init__(self, enabled=TRACE_ENABLED, path=TRACE_FILE, window=TRACE_STATS_WINDOW, max_bytes=TRACE_MAX_BYTES):
+        self.enabled = enabled
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: defaultdict(int))
+
+    def set_path(self, path):
+        """Writes further spans to path (None: keep them in memory only)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path = path
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def current_span():
+        """The innermost open span in this context, or None."""
+        return _current_span.get()
+
+    def span(self, name, trace_id=None, **attributes):
+        """Context manager that times a block as a span. Nested spans share the trace id."""
+        return _SpanContext(self, name, trace_id, attributes)
+
+    def _finish(self, span: Span):
+        span.end = time.time()
+        with self._lock:
+            self._latencies[span.name].append(span.duration_ms)
+            totals = self._totals[span.name]
+            totals["count"] += 1
+            if span.error:
+                totals["errors"] += 1
+            for key in ("prompt_tokens", "completion_tokens", "prompt_chars"):
+                value = span.attributes.get(key)
+                if isinstance(value, (int, float)):
+                    totals[key] += value
+            if span.attributes.get("cache_hit"):
+                totals["cache_hits"] += 1
+            if self.enabled and self.path:
+                self._write(span.to_record())
+
+    def _write(self, record):
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a")
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._file.close()
+                self._file = None
+                os.replace(self.path, self.path + ".1")
+        except OSError as e:
+            print(f"Warning: Could not write trace to {self.path}: {e}")
+            self.enabled = False
+
+    def latency_percentile(self, name, q: float, min_samples=1):
+        """The q-th percentile latency (ms) of recent spans with this name, or None below min_samples."""
+        with self._lock:
+            latencies = self._latencies.get(name)
+            if not latencies or len(latencies) < min_samples:
+                return None
+            return percentile(latencies, q)
+
+    def stats(self) -> dict:
+        """Per span name: count, errors, cache hits, p50/p95 latency and average tokens."""
+        with self._lock:
+            result = {}
+            for name, latencies in self._latencies.items():
+                totals = self._totals[name]
+                count = totals["count"]
+                result[name] = {
+                    "count": count,
+                    "errors": totals["errors"],
+                    "cache_hits": totals["cache_hits"],
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "avg_prompt_tokens": totals["prompt_tokens"] / count if count else 0,
+                    "avg_completion_tokens": totals["completion_tokens"] / count if count else 0,
+                    "avg_prompt_chars": totals["prompt_chars"] / count if count else 0,
+                }
+            return result
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "trace_id", "attributes", "span", "token")
+
+    def __init__(self, tracer, name, trace_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        trace_id = self.trace_id or (parent.trace_id if parent else None) or Tracer.new_trace_id()
+        self.span = Span(self.name, trace_id, parent.span_id if parent else None, self.attributes)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self.span)
+        return False
+
+def propagate(fn):
+    """
+    Wraps fn so that it runs inside the caller's tracing context when called from
+    another thread (thread pools do not carry context variables over).
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+def traced(name, on_finish=None):
+    """
+    Method decorator that records the call as a span under the object's trace_id.
+
+    on_finish(obj, span), if given, is called with the finished span after a call
+    that did not raise.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with tracer.span(name, trace_id=getattr(self, "trace_id", None)) as span:
+                result = method(self, *args, **kwargs)
+            if on_finish:
+                on_finish(self, span)
+            return result
+        return wrapper
+    return decorator
+
+class TracedQueryEngine:
+    """Wraps a LlamaIndex query engine so every query() is recorded as a span."""
+    def __init__(self, query_engine, name="query.documents"):
+        self._query_engine = query_engine
+        self._name = name
+
+    def query(self, query_text):
+        with tracer.span(self._name, prompt_chars=len(str(query_text))) as span:
+            response = self._query_engine.query(query_text)
+            span.set(
+                completion_chars=len(str(getattr(response, "response", "") or "")),
+                source_nodes=len(getattr(response, "source_nodes", None) or []),
+            )
+            return response
+
+    def __getattr__(self, attribute):
+        return getattr(self._query_engine, attribute)
+
+# Shared by the whole process
+tracer = Tracer()
@@ -0,0 +1,121 @@
+# Compact record of everything said in a trial. The transcript, the history sent to the
+# agents and the jury's testimony notes are all views of the same events
+import sys
+import time
+from collections.abc import Sequence
+from datetime import datetime
+
+SYSTEM = "System"  # Speaker of court notices that are on the transcript but not in the agents' history
+
+def witness_speaker(name) -> str:
+    return sys.intern(f"Witness ({name})")
+
+def witness_name(speaker):
+    """The witness's name if the speaker is a witness, else None."""
+    if speaker.startswith("Witness (") and speaker.endswith(")"):
+        return speaker[len("Witness ("):-1]
+    return None
+
+class TrialEvent:
+    """One utterance: who spoke, what they said and when (seconds since the epoch)."""
+    __slots__ = ("speaker", "content", "time")
+
+    def __init__(self, speaker, content, timestamp):
+        self.speaker = speaker
+        self.content = content
+        self.time = timestamp
+
+    def line(self) -> str:
+        """The event as a history line, "Speaker: content"."""
+        return f"{self.speaker}: {self.content}"
+
+    def record(self) -> dict:
+        """The event as a transcript entry with an ISO timestamp."""
+        return {"speaker": self.speaker, "content": self.content,
+                "timestamp": datetime.fromtimestamp(self.time).isoformat()}
+
+class EventView(Sequence):
+    """Read-only sequence that renders each event on access and keeps no copies."""
+    def __init__(self, events, render):
+        self._events = events
+        self._render = render
+
+    def __len__(self):
+        return len(self._events)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._render(event) for event in self._events[index]]
+        return self._render(self._events[index])
+
+class TrialEventStore:
+    """
+    Append-only list of TrialEvent records for one trial.
+
+    Speaker names are interned, so every event by the same speaker shares one
+    string, and timestamps are floats. Transcript entries and history lines are
+    only rendered when they are read. The last rendered history is kept because
+    a turn usually sends the same history to several agents.
+    """
+    def __init__(self):
+        self._events = []
+        self._rendered = None  # (key, text) of the last history() call
+
+    def append(self, speaker, content) -> TrialEvent:
+        event = TrialEvent(sys.intern(speaker), content, time.time())
+        self._events.append(event)
+        return event
+
+    def __len__(self):
+        return len(self._events)
+
+    def events(self, start=0, end=None) -> list:
+        return self._events[start:end]
+
+    def _history_events(self, end=None) -> list:
+        return [event for event in self._events[:end] if event.speaker != SYSTEM]
+
+    def history(self, last=None, end=None) -> str:
+        """
+        The history sent to the agents: one "Speaker: content" line per event, without
+        court notices. last keeps only the most recent entries; end stops at that
+        event index, to render the history as it was earlier in the trial.
+        """
+        key = (len(self._events), last, end)
+        if self._rendered and self._rendered[0] == key:
+            return self._rendered[1]
+        events = self._history_events(end)
+        if last:
+            events = events[-last:]
+        text = "\n".join(event.line() for event in events)
+        self._rendered = (key, text)
+        return text
+
+    @property
+    def transcript(self) -> EventView:
+        """Every event as a {"speaker", "content", "timestamp"} entry."""
+        return EventView(self._events, TrialEvent.record)
+
+    @property
+    def lines(self) -> EventView:
+        """The history as a sequence of "Speaker: content" lines."""
+        return EventView(self._history_events(), TrialEvent.line)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the store: records, contents, timestamps and each distinct speaker once."""
+        total = sys.getsizeof(self._events)
+        speakers = {}
+        for event in self._events:
+            total += sys.getsizeof(event) + sys.getsizeof(event.content) + sys.getsizeof(event.time)
+            speakers[id(event.speaker)] = event.speaker
+        total += sum(sys.getsizeof(speaker) for speaker in speakers.values())
+        if self._rendered:
+            total += sys.getsizeof(self._rendered[1])
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._events),
+            "speakers": len({event.speaker for event in self._events}),
+            "memory_kb": round(self.memory_bytes() / 1024, 1),
+        }
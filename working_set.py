@@ -0,0 +1,143 @@
+# Retrieval over document index shards: merged shards and the per-trial working set.
+# Imported on first use: importing it imports LlamaIndex.
+import threading
+import time
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+from settings import (WORKING_SET_MAX_CHUNKS, WORKING_SET_SEED_TOP_K, WORKING_SET_SEED_MAX_CHARS,
+                      WORKING_SET_MIN_SCORE, WORKING_SET_TOP_K)
+
+# The full-index latency baseline is timed on a few queries shaped like a turn's document
+# query (a sentence or two, WORKING_SET_TOP_K results), not on the much larger seed queries
+_BASELINE_PROBES = 3
+_PROBE_CHARS = 200
+
+def _with_embedding(query_bundle: QueryBundle, embed_model) -> QueryBundle:
+    """The query with its embedding computed, so several retrievers can share it."""
+    if query_bundle.embedding is not None:
+        return query_bundle
+    return QueryBundle(query_bundle.query_str, embedding=embed_model.get_query_embedding(query_bundle.query_str))
+
+class ShardRetriever(BaseRetriever):
+    """Retrieves from several index shards and keeps the top_k chunks overall."""
+    def __init__(self, indexes, top_k=WORKING_SET_TOP_K):
+        super().__init__()
+        self.top_k = top_k
+        self._embed_model = Settings.embed_model
+        self._retrievers = [index.as_retriever(similarity_top_k=top_k) for index in indexes]
+
+    def _retrieve(self, query_bundle: QueryBundle):
+        query_bundle = _with_embedding(query_bundle, self._embed_model)
+        results = [result for retriever in self._retrievers for result in retriever.retrieve(query_bundle)]
+        return sorted(results, key=lambda result: result.score or 0, reverse=True)[:self.top_k]
+
+class WorkingSetRetriever(BaseRetriever):
+    """
+    Retrieves from a small in-memory set of chunks chosen for one trial.
+
+    The set is the best WORKING_SET_MAX_CHUNKS chunks of the trial's index shards
+    for seed queries built from the case, the witnesses and the evidence. A query
+    whose best working-set score (cosine similarity) is below
+    WORKING_SET_MIN_SCORE falls back to the shards. stats() reports the fallback
+    rate and the average latency of both paths; the full-index average starts
+    from a few turn-sized probe queries timed when the set is built.
+    """
+    def __init__(self, indexes, seed_queries, max_chunks=WORKING_SET_MAX_CHUNKS, seed_top_k=WORKING_SET_SEED_TOP_K,
+                 min_score=WORKING_SET_MIN_SCORE, top_k=WORKING_SET_TOP_K):
+        super().__init__()
+        self.min_score = min_score
+        self.top_k = top_k
+        self._embed_model = Settings.embed_model
+        self._full_retriever = ShardRetriever(indexes, top_k)
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.fallbacks = 0
+        self._latency_ms = {"working_set": [0, 0.0], "full_index": [0, 0.0]}  # path -> [count, total ms]
+        self._build(indexes, seed_queries, seed_top_k, max_chunks)
+
+    def _build(self, indexes, seed_queries, seed_top_k, max_chunks):
+        seed_retrievers = [(index, index.as_retriever(similarity_top_k=seed_top_k)) for index in indexes]
+        best = {}  # node id -> (result, index it came from)
+        for query in seed_queries:
+            query_bundle = _with_embedding(QueryBundle(query[:WORKING_SET_SEED_MAX_CHARS]), self._embed_model)
+            for index, retriever in seed_retrievers:
+                for result in retriever.retrieve(query_bundle):
+                    node_id = result.node.node_id
+                    if node_id not in best or (result.score or 0) > (best[node_id][0].score or 0):
+                        best[node_id] = (result, index)
+        for query in seed_queries[:_BASELINE_PROBES]:
+            start = time.perf_counter()
+            self._full_retriever.retrieve(QueryBundle(query[:_PROBE_CHARS]))
+            self._record("full_index", start)
+        chosen = sorted(best.values(), key=lambda entry: entry[0].score or 0, reverse=True)[:max_chunks]
+        self._nodes = [result.node for result, _ in chosen]
+        embeddings = self._node_embeddings([(result.node, index) for result, index in chosen])
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(self._nodes), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+    def _node_embeddings(self, nodes_and_indexes):
+        """Embeddings from each index's vector store, re-embedding only if a store cannot return them."""
+        embeddings = []
+        missing = []
+        nodes = [node for node, _ in nodes_and_indexes]
+        for i, (node, index) in enumerate(nodes_and_indexes):
+            try:
+                embeddings.append(index.vector_store.get(node.node_id))
+            except Exception:
+                embeddings.append(None)
+                missing.append(i)
+        if missing:
+            texts = [nodes[i].get_content(metadata_mode=MetadataMode.EMBED) for i in missing]
+            for i, embedding in zip(missing, self._embed_model.get_text_embedding_batch(texts)):
+                embeddings[i] = embedding
+        return embeddings
+
+    def _record(self, path, start):
+        with self._lock:
+            entry = self._latency_ms[path]
+            entry[0] += 1
+            entry[1] += (time.perf_counter() - start) * 1000
+
+    def _retrieve(self, query_bundle: QueryBundle):
+        start = time.perf_counter()
+        query_bundle = _with_embedding(query_bundle, self._embed_model)
+        with self._lock:
+            self.queries += 1
+        if len(self._nodes):
+            query = np.asarray(query_bundle.embedding, dtype=np.float32)
+            scores = self._matrix @ (query / (np.linalg.norm(query) or 1))
+            top = np.argsort(-scores)[:self.top_k]
+            if scores[top[0]] >= self.min_score:
+                self._record("working_set", start)
+                return [NodeWithScore(node=self._nodes[i], score=float(scores[i])) for i in top]
+        with self._lock:
+            self.fallbacks += 1
+        results = self._full_retriever.retrieve(query_bundle)
+        self._record("full_index", start)
+        return results
+
+    def stats(self) -> dict:
+        """Working-set size, fallback rate and average retrieval latency per path."""
+        with self._lock:
+            average = {path: total / count if count else None for path, (count, total) in self._latency_ms.items()}
+            return {
+                "chunks": len(self._nodes),
+                "queries": self.queries,
+                "fallbacks": self.fallbacks,
+                "fallback_rate": self.fallbacks / self.queries if self.queries else 0.0,
+                "working_set_ms": average["working_set"],
+                "full_index_ms": average["full_index"],
+            }
+
+def build_shard_query_engine(indexes):
+    """Returns a query engine over several index shards."""
+    return RetrieverQueryEngine.from_args(ShardRetriever(indexes))
+
+def build_working_set_query_engine(indexes, seed_queries):
+    """Returns (query_engine, retriever) answering from a working set built for the seed queries."""
+    retriever = WorkingSetRetriever(indexes, [query for query in seed_queries if query])
+    return RetrieverQueryEngine.from_args(retriever), retriever
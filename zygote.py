@@ -0,0 +1,181 @@
+"""
+Fork server ("zygote") for trial worker processes.
+
+The parent imports crewai, openai and llama_index, builds the shared document
+index and the OpenAI client once, then forks a ready-to-run worker for every
+client that connects. Workers share the parent's memory copy-on-write, so a
+new trial starts in milliseconds instead of paying the imports and the index
+build again. Each worker runs the normal courtroom REPL over its connection.
+
+With EMBED_BACKEND=local the parent neither loads the embedding model nor
+builds the index: forking a process that has loaded torch can deadlock, as
+torch starts threads the child does not inherit. Each worker then loads the
+model and the index shards itself on its first trial; use VECTOR_STORE=mmap
+or hnsw so workers open shards built once on disk instead of rebuilding them.
+
+Usage:
+    python zygote.py [--socket /tmp/courtroom-simulator.sock] [--max-workers 32]
+
+Connect with, for example:
+    socat - UNIX-CONNECT:/tmp/courtroom-simulator.sock
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from settings import ZYGOTE_SOCKET, ZYGOTE_MAX_WORKERS, EMBED_BACKEND
+from tracing import percentile
+
+SPAWN_TIMES_KEPT = 1000  # Recent fork times behind the median printed on shutdown
+
+def preload():
+    """Imports everything and loads shared state in the parent. Returns the REPL module."""
+    start = time.perf_counter()
+    import main as repl
+    import dialogue_manager
+    # Run synchronously: the parent must not have live threads when it forks.
+    # Nor may it load torch, so local embeddings are left to the workers
+    local_embeddings = EMBED_BACKEND == "local"
+    dialogue_manager.warm_up(embed_model=not local_embeddings)
+    if local_embeddings:
+        print("EMBED_BACKEND is 'local': each worker loads the embedding model and document indexes "
+              "after the fork, on its first trial.")
+    else:
+        dialogue_manager.load_document_indexes()
+    # Build (and throw away) a manager so every lazily imported module is loaded
+    dialogue_manager.DialogueManager()
+    # Move everything loaded so far out of the GC's reach so that collections in the
+    # workers do not touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"Zygote preloaded in {(time.perf_counter() - start) * 1000:.0f} ms.")
+    return repl
+
+def run_worker(repl, conn: socket.socket, fork_started: float):
+    """Runs the REPL in a forked worker with the connection as its terminal."""
+    fd = conn.fileno()
+    for target in (0, 1, 2):
+        os.dup2(fd, target)
+    conn.close()
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", buffering=1, closefd=False)
+    sys.stderr = sys.stdout
+    # A worker must not rerun the parent's warm-up or share its signal handling
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGCHLD})
+    repl.STARTUP_WARMUP = False
+
+    exit_code = 0
+    try:
+        print(f"Worker {os.getpid()} ready in {(time.perf_counter() - fork_started) * 1000:.1f} ms.")
+        repl.main()
+    except Exception as e:
+        print(f"Worker error: {e}")
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        # Skip atexit handlers and buffers inherited from the parent
+        os._exit(exit_code)
+
+class ZygoteServer:
+    """Accepts connections on a Unix socket and forks one worker per connection."""
+    def __init__(self, socket_path=ZYGOTE_SOCKET, max_workers=ZYGOTE_MAX_WORKERS):
+        self.socket_path = socket_path
+        self.max_workers = max_workers
+        self.workers = {}  # pid -> start time
+        self.spawned = 0
+        self.spawn_times_ms = deque(maxlen=SPAWN_TIMES_KEPT)
+        self.exits = []  # (pid, seconds alive) of reaped workers not yet logged
+
+    def _reap(self, signum=None, frame=None):
+        """
+        Collects every finished child, registered or not, so none stays a zombie.
+
+        Also runs as the SIGCHLD handler, so it only records the exits; the main
+        loop logs them, since printing from a handler can interrupt another write.
+        """
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.workers.pop(pid, None)
+            self.exits.append((pid, time.time() - started if started is not None else None))
+
+    def _log_exits(self):
+        while self.exits:
+            pid, seconds = self.exits.pop(0)
+            print(f"Worker {pid} exited" + (f" after {seconds:.0f} s." if seconds is not None else "."))
+
+    def serve(self):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("The zygote server needs os.fork() and is not available on this platform.")
+        repl = preload()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        # Wake up regularly to log worker exits even when no client connects
+        server.settimeout(1.0)
+        signal.signal(signal.SIGCHLD, self._reap)
+        print(f"Zygote listening on {self.socket_path} (max {self.max_workers} workers).")
+
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except (InterruptedError, TimeoutError):
+                    self._log_exits()
+                    continue
+                self._reap()
+                self._log_exits()
+                if len(self.workers) >= self.max_workers:
+                    conn.sendall(b"Server busy: all trial workers are in use. Try again later.\n")
+                    conn.close()
+                    continue
+
+                fork_started = time.perf_counter()
+                # Hold SIGCHLD until the worker is registered; otherwise a worker that exits at once
+                # is reaped before it is in self.workers and would then count as active forever
+                signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGCHLD})
+                try:
+                    pid = os.fork()
+                    if pid == 0:
+                        server.close()
+                        run_worker(repl, conn, fork_started)
+                    self.workers[pid] = time.time()
+                finally:
+                    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGCHLD})
+                conn.close()
+                spawn_ms = (time.perf_counter() - fork_started) * 1000
+                self.spawned += 1
+                self.spawn_times_ms.append(spawn_ms)
+                print(f"Forked worker {pid} in {spawn_ms:.1f} ms ({len(self.workers)} active).")
+        except KeyboardInterrupt:
+            print("\nShutting down zygote.")
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            if self.spawn_times_ms:
+                print(f"Spawned {self.spawned} workers, median fork time "
+                      f"{percentile(self.spawn_times_ms, 50):.1f} ms (last {len(self.spawn_times_ms)}).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fork server for courtroom trial workers.")
+    parser.add_argument("--socket", default=ZYGOTE_SOCKET, help="Unix socket path to listen on")
+    parser.add_argument("--max-workers", type=int, default=ZYGOTE_MAX_WORKERS,
+                        help="Maximum number of concurrent trial workers")
+    args = parser.parse_args()
+    ZygoteServer(args.socket, args.max_workers).serve()
+
+if __name__ == "__main__":
+    main()